@@ -0,0 +1,97 @@
+"""
+查询结果格式化性能基准
+
+对比旧的逐单元格 convert_value 实现与 src.chat.result_formatter 中按列向量化的实现，
+并校验两者输出一致。
+
+用法（在 backend 目录下）：
+    PYTHONPATH=. python benchmarks/bench_format_results.py --rows 50000 --repeat 5
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from src.chat.result_formatter import format_results
+
+
+def legacy_format_results(results_df):
+    """旧实现：VannaService._format_results 优化前的版本"""
+    def convert_value(obj):
+        if pd.isna(obj):  # 处理 NaT 和其他空值
+            return None
+        if isinstance(obj, datetime):
+            return obj.strftime('%Y-%m-%d %H:%M:%S')
+        if isinstance(obj, Decimal):
+            return float(obj)  # 将 Decimal 转换为 float
+        return obj
+
+    results = results_df.to_dict('records')
+
+    formatted_results = []
+    for row in results:
+        formatted_row = {k: convert_value(v) for k, v in row.items()}
+        formatted_results.append(formatted_row)
+
+    return formatted_results
+
+
+def build_frame(rows: int) -> pd.DataFrame:
+    """构造与 MySQL 查询结果类似的测试数据：整数、带空值的浮点数、Decimal、时间戳和字符串"""
+    rng = np.random.default_rng(42)
+    start = datetime(2024, 1, 1)
+
+    amounts = rng.random(rows) * 10000
+    amounts[::17] = np.nan
+
+    create_time = [start + timedelta(minutes=int(m)) for m in rng.integers(0, 500000, rows)]
+    for i in range(0, rows, 23):
+        create_time[i] = None
+
+    names = [f"部门{i % 50}" for i in range(rows)]
+    for i in range(0, rows, 31):
+        names[i] = None
+
+    return pd.DataFrame({
+        "id": np.arange(rows),
+        "amount": amounts,
+        "price": [Decimal(f"{v:.2f}") for v in rng.random(rows) * 100],
+        "create_time": create_time,
+        "dept_name": names,
+    })
+
+
+def timeit(func, df, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(df)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查询结果格式化性能基准")
+    parser.add_argument("--rows", type=int, default=50000, help="测试数据行数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数，取最快一次")
+    args = parser.parse_args()
+
+    df = build_frame(args.rows)
+
+    if legacy_format_results(df) != format_results(df):
+        raise SystemExit("两种实现的输出不一致")
+
+    legacy = timeit(legacy_format_results, df, args.repeat)
+    vectorized = timeit(format_results, df, args.repeat)
+
+    print(f"行数: {args.rows}, 列数: {len(df.columns)}")
+    print(f"逐单元格实现: {legacy * 1000:.1f} ms")
+    print(f"按列向量化实现: {vectorized * 1000:.1f} ms")
+    print(f"加速比: {legacy / vectorized:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
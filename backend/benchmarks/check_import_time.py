@@ -0,0 +1,71 @@
+"""
+冷启动导入耗时检查
+
+在独立的子进程中逐个导入后端模块，测量导入耗时，并确认导入过程中没有加载嵌入模型
+（FlagEmbedding / torch）。任一模块超出预算或提前加载了模型时以非零状态码退出，可用于 CI。
+
+用法（在 backend 目录下）：
+    python benchmarks/check_import_time.py --budget 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 导入这些模块时不应加载嵌入模型
+MODULES = [
+    "src.vanna.chromadb.chromadb_vector",
+    "src.chat.vanna_service",
+    "src.routes.training",
+]
+
+HEAVY_MODULES = ["FlagEmbedding", "torch"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "PYTHONPATH": BACKEND_DIR},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="冷启动导入耗时检查")
+    parser.add_argument("--budget", type=float, default=float(os.getenv("IMPORT_TIME_BUDGET", 5)),
+                        help="每个模块允许的最大导入耗时（秒）")
+    args = parser.parse_args()
+
+    failed = False
+    for module in MODULES:
+        stats = measure(module)
+        status = "OK"
+        if stats["seconds"] > args.budget:
+            status = "超出预算"
+            failed = True
+        if stats["loaded"]:
+            status = f"提前加载了 {', '.join(stats['loaded'])}"
+            failed = True
+        print(f"{module:<40} {stats['seconds']:.2f}s  {status}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
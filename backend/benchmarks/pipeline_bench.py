@@ -0,0 +1,418 @@
+"""
+NL→SQL 流水线离线基准测试
+
+用 src.vanna.mock 的 mock 后端驱动 VannaService 的完整处理流程（命令缓存 → 检索 → 提示词构建 →
+LLM → SQL 执行 → 结果格式化 → 结果解释 → 查询缓存），不依赖 ChromaDB、BGE-M3、OpenAI 和 MySQL：
+
+- LLM 延迟是确定性的模拟值：固定耗时 + 按提示词 token 数增加的耗时 ± 按问题哈希计算的抖动
+- 数据库是本地 SQLite 夹具：表结构由 training_data/ddl.txt 转换，数据按固定种子生成
+- 问题和 SQL 来自 training_data/sql.txt，检索返回 training_data 中的 DDL 和文档
+
+场景：
+- cold：每个请求都是新问题，命令缓存和查询缓存都不命中
+- warm：重复的问题（预热后），全部命中缓存
+- mixed：按 --hit-ratio 混合重复问题和新问题
+
+输出每个场景在各并发数下的 p50/p95/p99 延迟、吞吐量，以及最高并发下的峰值内存（tracemalloc），
+结果可保存为基线，之后的运行与基线比较，退化超过 --tolerance 时以非零状态码退出，可用于 CI。
+
+用法（在 backend 目录下）：
+    PYTHONPATH=. python benchmarks/pipeline_bench.py --requests 100 --concurrency 1,8,32
+    PYTHONPATH=. python benchmarks/pipeline_bench.py --save-baseline
+    PYTHONPATH=. python benchmarks/pipeline_bench.py --check
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.chat.vanna_service import VannaService
+from src.vanna.base import VannaBase
+from src.vanna.mock import MockLLM, MockVectorDB
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRAINING_DIR = os.path.join(BACKEND_DIR, "training_data")
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, "benchmarks", "baselines", "pipeline_bench.json")
+
+SCENARIOS = ("cold", "warm", "mixed")
+# 基线比较的指标：越小越好 / 越大越好
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "peak_mb")
+HIGHER_IS_BETTER = ("throughput_rps",)
+
+# 新问题的格式：原问题 + 序号，mock LLM 据此返回原问题的 SQL
+UNIQUE_QUESTION = re.compile(r"^(.*) \(#(\d+)\)$", re.DOTALL)
+
+
+def read_text(name: str) -> str:
+    with open(os.path.join(TRAINING_DIR, name), encoding="utf-8") as f:
+        return f.read().replace("\r\n", "\n")
+
+
+def load_question_sql() -> List[Tuple[str, str]]:
+    """解析 sql.txt：每组为一行问题，后面是以分号结尾的 SQL"""
+    pairs, question, sql_lines = [], None, []
+    for line in read_text("sql.txt").split("\n"):
+        if question is None:
+            if line.strip():
+                question = line.strip()
+            continue
+        sql_lines.append(line)
+        if line.rstrip().endswith(";"):
+            pairs.append((question, "\n".join(sql_lines).strip()))
+            question, sql_lines = None, []
+    if not pairs:
+        raise SystemExit("training_data/sql.txt 中没有问题")
+    return pairs
+
+
+def load_ddl() -> List[str]:
+    return re.findall(r"CREATE TABLE .*?;", read_text("ddl.txt"), re.DOTALL)
+
+
+def load_documentation() -> List[str]:
+    return [chunk.strip() for chunk in re.split(r"\n\s*\n", read_text("documentation.txt")) if chunk.strip()]
+
+
+def sqlite_type(mysql_type: str) -> str:
+    mysql_type = mysql_type.lower()
+    if "int" in mysql_type:
+        return "INTEGER"
+    if mysql_type in ("decimal", "float", "double", "numeric"):
+        return "REAL"
+    return "TEXT"
+
+
+def build_fixture(path: str, rows: int, seed: int = 42) -> Dict[str, int]:
+    """按 ddl.txt 中的 MySQL 表结构创建 SQLite 表，并按固定种子生成数据"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    conn = sqlite3.connect(path)
+    tables = {}
+    for ddl in load_ddl():
+        table = re.search(r"CREATE TABLE `(\w+)`", ddl).group(1)
+        columns = re.findall(r"^\s*`(\w+)`\s+(\w+)", ddl, re.MULTILINE)
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.execute(f"CREATE TABLE {table} ({', '.join(f'{name} {sqlite_type(kind)}' for name, kind in columns)})")
+
+        data = []
+        for i in range(rows):
+            row = []
+            for name, kind in columns:
+                kind = kind.lower()
+                if kind in ("datetime", "date", "timestamp"):
+                    row.append((start + timedelta(minutes=rng.randrange(500000))).strftime("%Y-%m-%d %H:%M:%S"))
+                elif sqlite_type(kind) == "INTEGER":
+                    row.append(i + 1 if name.endswith("_id") and name == columns[0][0] else rng.randrange(1000))
+                elif sqlite_type(kind) == "REAL":
+                    row.append(rng.random() * 10000)
+                else:
+                    row.append(f"{name}_{rng.randrange(50)}")
+            data.append(row)
+        conn.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * len(columns))})", data)
+        tables[table] = len(columns)
+    conn.commit()
+    conn.close()
+    return tables
+
+
+class BenchVannaService(MockVectorDB, MockLLM, VannaService):
+    """
+    VannaService 的处理流程 + mock 检索和 LLM + SQLite 夹具
+
+    检索和嵌入在线程池中以 time.sleep 模拟耗时；LLM 以 asyncio.sleep 模拟（与 AsyncOpenAI 一样不占用线程）
+    """
+
+    def __init__(self, config: dict, fixture_path: str, question_sql: List[Tuple[str, str]]):
+        VannaBase.__init__(self, config=config)
+        self.async_client = None
+        self._init_pipeline(config)
+
+        self.question_sql = dict(question_sql)
+        self.examples = [{"question": q, "sql": s} for q, s in question_sql]
+        self.ddl = load_ddl()
+        self.documentation = load_documentation()
+        self.embed_ms = config["bench"]["embed_ms"]
+        self.retrieval_ms = config["bench"]["retrieval_ms"]
+        self.llm_ms = config["bench"]["llm_ms"]
+        self.llm_ms_per_1k_tokens = config["bench"]["llm_ms_per_1k_tokens"]
+        self.summary_ms = config["bench"]["summary_ms"]
+        self.jitter = config["bench"]["jitter"]
+        self.llm_calls = 0
+
+        # sqlite3 连接不能在线程间并发使用，每个 SQL 线程一个连接
+        local = threading.local()
+
+        def run_sql_sqlite(sql: str) -> pd.DataFrame:
+            conn = getattr(local, "conn", None)
+            if conn is None:
+                conn = local.conn = sqlite3.connect(fixture_path)
+            return pd.read_sql_query(sql, conn)
+
+        self.dialect = "SQLite"
+        self.run_sql = run_sql_sqlite
+        self.run_sql_is_set = True
+
+    def log(self, message: str, title: str = "Info"):
+        pass
+
+    def prepare_retrieval(self, question: str, **kwargs) -> dict:
+        time.sleep(self.embed_ms / 1000)
+        return kwargs
+
+    def get_related_ddl(self, question: str, **kwargs) -> list:
+        time.sleep(self.retrieval_ms / 1000)
+        return self.ddl
+
+    def get_related_documentation(self, question: str, **kwargs) -> list:
+        time.sleep(self.retrieval_ms / 1000)
+        return self.documentation
+
+    def get_similar_question_sql(self, question: str, **kwargs) -> list:
+        time.sleep(self.retrieval_ms / 1000)
+        return self.examples
+
+    def _mock_response(self, prompt) -> Tuple[float, str]:
+        """根据提示词返回（模拟耗时，响应文本），同一提示词的耗时和响应总是相同"""
+        question = prompt[-1]["content"]
+        tokens = sum(self.str_to_approx_token_count(message["content"]) for message in prompt)
+        # 由问题哈希得到 [-1, 1) 的抖动系数
+        jitter = (zlib.crc32(question.encode("utf-8")) % 2000 / 1000 - 1) * self.jitter
+
+        match = UNIQUE_QUESTION.match(question)
+        base_question = match.group(1) if match else question
+        sql = self.question_sql.get(base_question)
+        if sql is None:
+            # 结果解释的提示词
+            return self.summary_ms * (1 + jitter) / 1000, "查询结果显示了各部门的基本信息。"
+
+        if match:
+            # 新问题生成不同的 SQL 文本，使查询缓存也不命中
+            sql = sql.rstrip(";") + f" /* bench {match.group(2)} */;"
+        latency = (self.llm_ms + self.llm_ms_per_1k_tokens * tokens / 1000) * (1 + jitter)
+        return latency / 1000, sql
+
+    def submit_prompt(self, prompt, **kwargs) -> str:
+        self.llm_calls += 1
+        latency, response = self._mock_response(prompt)
+        time.sleep(latency)
+        return response
+
+    async def submit_prompt_async(self, prompt, **kwargs) -> str:
+        self.llm_calls += 1
+        latency, response = self._mock_response(prompt)
+        await asyncio.sleep(latency)
+        return response
+
+
+def build_service(args, fixture_path: str, question_sql) -> BenchVannaService:
+    config = {
+        "max_tokens": args.max_tokens,
+        "tokenizer": args.tokenizer,
+        "sql_executor_max_workers": args.sql_workers,
+        "query_cache": {"ttl_seconds": 3600},
+        "command_cache": {"ttl_seconds": 7200},
+        "bench": {
+            "embed_ms": args.embed_ms,
+            "retrieval_ms": args.retrieval_ms,
+            "llm_ms": args.llm_ms,
+            "llm_ms_per_1k_tokens": args.llm_ms_per_1k_tokens,
+            "summary_ms": args.summary_ms,
+            "jitter": args.jitter,
+        },
+    }
+    return BenchVannaService(config, fixture_path, question_sql)
+
+
+def build_workload(scenario: str, questions: List[str], requests: int, hit_ratio: float, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    workload = []
+    for i in range(requests):
+        question = questions[i % len(questions)]
+        repeated = scenario == "warm" or (scenario == "mixed" and rng.random() < hit_ratio)
+        workload.append(question if repeated else f"{question} (#{i})")
+    return workload
+
+
+async def run_load(service: BenchVannaService, workload: List[str], concurrency: int) -> Tuple[List[float], int, float]:
+    """并发 concurrency 个客户端依次处理 workload，返回（各请求耗时秒数，失败数，总耗时秒数）"""
+    queue: asyncio.Queue = asyncio.Queue()
+    for question in workload:
+        queue.put_nowait(question)
+    latencies, failures = [], 0
+
+    async def client():
+        nonlocal failures
+        while True:
+            try:
+                question = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            result = await service.process_question(question)
+            latencies.append(time.perf_counter() - started)
+            if not result["success"]:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, failures, time.perf_counter() - started
+
+
+async def run_scenario(args, fixture_path, question_sql, scenario: str, concurrency: int, trace_memory: bool) -> dict:
+    service = build_service(args, fixture_path, question_sql)
+    questions = [question for question, _ in question_sql]
+    if scenario != "cold":
+        # 预热：每个问题处理一次，写入命令缓存和查询缓存
+        await run_load(service, questions, 1)
+
+    workload = build_workload(scenario, questions, args.requests, args.hit_ratio, args.seed)
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        latencies, failures, elapsed = await run_load(service, workload, concurrency)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024 if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "failures": failures,
+        "llm_calls": service.llm_calls,
+        "peak_mb": round(peak_mb, 2) if peak_mb is not None else None,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> List[str]:
+    """
+    返回超出容差的退化项
+
+    缓存命中路径的耗时不到 1 ms，相对波动很大，所以差值还要超过 min_delta_ms 才算退化：
+    延迟直接比较毫秒差值，吞吐量换算为每个请求的毫秒数比较，峰值内存差值需超过 1 MB
+    """
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get("results", {}).get(key)
+        if not base:
+            continue
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            now, before = current.get(metric), base.get(metric)
+            if not now or not before:
+                continue
+            if metric in HIGHER_IS_BETTER:
+                worse = now < before * (1 - tolerance) and 1000 / now - 1000 / before > min_delta_ms
+            else:
+                floor = 1.0 if metric == "peak_mb" else min_delta_ms
+                worse = now > before * (1 + tolerance) and now - before > floor
+            if worse:
+                regressions.append(f"{key} {metric}: {before} -> {now}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NL→SQL 流水线离线基准测试")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="场景，逗号分隔：cold,warm,mixed")
+    parser.add_argument("--concurrency", default="1,8,32", help="并发客户端数，逗号分隔")
+    parser.add_argument("--requests", type=int, default=100, help="每轮请求数")
+    parser.add_argument("--hit-ratio", type=float, default=0.8, help="mixed 场景中重复问题的比例")
+    parser.add_argument("--rows", type=int, default=500, help="SQLite 夹具每张表的行数")
+    parser.add_argument("--embed-ms", type=float, default=10, help="模拟的问题嵌入耗时")
+    parser.add_argument("--retrieval-ms", type=float, default=5, help="模拟的每次向量检索耗时")
+    parser.add_argument("--llm-ms", type=float, default=200, help="模拟的 SQL 生成固定耗时")
+    parser.add_argument("--llm-ms-per-1k-tokens", type=float, default=20, help="模拟的每 1k 提示词 token 增加的耗时")
+    parser.add_argument("--summary-ms", type=float, default=100, help="模拟的结果解释耗时")
+    parser.add_argument("--jitter", type=float, default=0.2, help="LLM 耗时的抖动比例（按问题哈希确定）")
+    parser.add_argument("--max-tokens", type=int, default=14000, help="提示词 token 预算")
+    parser.add_argument("--tokenizer", default="cl100k_base", help="提示词计数使用的编码")
+    parser.add_argument("--sql-workers", type=int, default=10, help="SQL 线程池大小")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-memory", action="store_true", help="不测量峰值内存（tracemalloc 会拖慢运行）")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件")
+    parser.add_argument("--save-baseline", action="store_true", help="将本次结果保存为基线")
+    parser.add_argument("--check", action="store_true", help="与基线比较，退化超过容差时退出码为 1")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的退化比例")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="小于该毫秒数的延迟差值不算退化")
+    args = parser.parse_args()
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+    question_sql = load_question_sql()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture_path = os.path.join(tmp, "bench.sqlite")
+        tables = build_fixture(fixture_path, args.rows, args.seed)
+        print(f"SQLite 夹具: {len(tables)} 张表，每张 {args.rows} 行；问题 {len(question_sql)} 个")
+
+        # 服务内部的 print 日志不计入输出
+        with open(os.devnull, "w") as devnull:
+            for scenario in scenarios:
+                for concurrency in levels:
+                    with contextlib.redirect_stdout(devnull):
+                        result = asyncio.run(run_scenario(args, fixture_path, question_sql, scenario, concurrency, False))
+                    if not args.no_memory and concurrency == max(levels):
+                        with contextlib.redirect_stdout(devnull):
+                            memory = asyncio.run(run_scenario(args, fixture_path, question_sql, scenario, concurrency, True))
+                        result["peak_mb"] = memory["peak_mb"]
+                    results[f"{scenario}@{concurrency}"] = result
+
+    print(f"{'场景@并发':<12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'吞吐 rps':>11}{'LLM 调用':>10}{'失败':>6}{'峰值 MB':>10}")
+    for key, r in results.items():
+        peak = f"{r['peak_mb']:.1f}" if r["peak_mb"] is not None else "-"
+        print(f"{key:<12}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}"
+              f"{r['throughput_rps']:>11.1f}{r['llm_calls']:>10}{r['failures']:>6}{peak:>10}")
+
+    if any(r["failures"] for r in results.values()):
+        raise SystemExit("存在失败的请求")
+
+    run_info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "args": {k: v for k, v in vars(args).items() if k not in ("baseline", "save_baseline", "check", "tolerance", "min_delta_ms")},
+    }
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            raise SystemExit(f"基线文件不存在: {args.baseline}")
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("args") != run_info["args"]:
+            print("警告：本次参数与基线参数不同，比较结果仅供参考")
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"性能退化（超过 {args.tolerance:.0%}）：")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"与基线相比没有超过 {args.tolerance:.0%} 的退化")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"meta": run_info, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"基线已保存: {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
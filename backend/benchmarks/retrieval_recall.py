@@ -0,0 +1,112 @@
+"""
+DDL 检索召回率评测：dense（仅向量）与 hybrid（向量 + BGE-M3 词汇权重）对比
+
+将 training_data/ddl.txt 的表结构写入内存中的 ChromaDB，对 retrieval_questions.json 中标注了
+相关表的问题，按不同的 n_results 检索 DDL，统计：
+
+- 召回率：检索结果中包含的相关表占全部相关表的比例
+- 全部召回：所有相关表都被检索到的问题比例
+- 平均 DDL token 数：写入提示词的 DDL 长度，n_results 越小提示词越短
+
+用于选择 RETRIEVAL_MODE 和 RETRIEVAL_N_RESULTS：找到 hybrid 下召回率与 dense 当前配置相当的
+最小 n_results。需要 FlagEmbedding 和 BGE-M3 模型（首次运行会下载），问题和 DDL 都只编码一次。
+
+用法（在 backend 目录下）：
+    PYTHONPATH=. python benchmarks/retrieval_recall.py --n-results 1,2,3,5,10
+"""
+import argparse
+import contextlib
+import json
+import os
+import re
+from typing import Dict, List
+
+from pipeline_bench import load_ddl
+
+from src.vanna.chromadb.chromadb_vector import BGEM3EmbeddingFunction, ChromaDB_VectorStore
+from src.vanna.mock import MockLLM
+from src.vanna.types import TrainingItem
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_QUESTIONS = os.path.join(BENCH_DIR, "retrieval_questions.json")
+
+MODES = {
+    "dense": {"retrieval_mode": "dense"},
+    "hybrid-rrf": {"retrieval_mode": "hybrid", "hybrid_fusion": "rrf"},
+    "hybrid-weighted": {"retrieval_mode": "hybrid", "hybrid_fusion": "weighted"},
+}
+
+
+class RecallStore(ChromaDB_VectorStore, MockLLM):
+    def __init__(self, config=None):
+        ChromaDB_VectorStore.__init__(self, config=config)
+
+
+def table_name(ddl: str) -> str:
+    return re.search(r"CREATE TABLE `(\w+)`", ddl).group(1)
+
+
+def evaluate(store: RecallStore, questions: List[dict], n_results: int, min_similarity: float) -> Dict[str, float]:
+    store.n_results_ddl = n_results
+    recalled = relevant = complete = tokens = 0
+    for item in questions:
+        kwargs = store.prepare_retrieval(item["question"])
+        ddl_list = store.get_related_ddl(item["question"], min_similarity=min_similarity, **kwargs)
+        found = {table_name(ddl) for ddl in ddl_list} & set(item["tables"])
+        recalled += len(found)
+        relevant += len(item["tables"])
+        complete += len(found) == len(item["tables"])
+        tokens += sum(store.str_to_approx_token_count(ddl) for ddl in ddl_list)
+    return {
+        "recall": recalled / relevant,
+        "complete": complete / len(questions),
+        "ddl_tokens": tokens / len(questions),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DDL 检索召回率评测")
+    parser.add_argument("--questions", default=DEFAULT_QUESTIONS, help="标注了相关表的问题（JSON）")
+    parser.add_argument("--n-results", default="1,2,3,5,10", help="检索条数，逗号分隔")
+    parser.add_argument("--modes", default=",".join(MODES), help="检索方式，逗号分隔：" + ",".join(MODES))
+    parser.add_argument("--min-similarity", type=float, default=0.9, help="向量检索的距离阈值（与线上默认值相同）")
+    parser.add_argument("--json", help="将结果写入该 JSON 文件")
+    args = parser.parse_args()
+
+    with open(args.questions, encoding="utf-8") as f:
+        questions = json.load(f)
+    ddl_list = load_ddl()
+    tables = {table_name(ddl) for ddl in ddl_list}
+    unknown = {table for item in questions for table in item["tables"]} - tables
+    if unknown:
+        raise SystemExit(f"问题标注的表不在 ddl.txt 中: {', '.join(sorted(unknown))}")
+
+    # 所有检索方式共用一个嵌入函数，DDL 和问题的向量与词汇权重只计算一次
+    embedding_function = BGEM3EmbeddingFunction()
+    embedding_function.encode_hybrid(ddl_list + [item["question"] for item in questions])
+    print(f"DDL {len(ddl_list)} 条，问题 {len(questions)} 个")
+
+    levels = [int(n) for n in args.n_results.split(",") if n]
+    results = {}
+    # 检索过程中的 print 日志不计入输出
+    with open(os.devnull, "w") as devnull:
+        for mode in [m for m in args.modes.split(",") if m]:
+            store = RecallStore({"client": "in-memory", "embedding_function": embedding_function, **MODES[mode]})
+            store.remove_collection("ddl")
+            with contextlib.redirect_stdout(devnull):
+                store.add_training_batch([TrainingItem(TrainingItem.ITEM_TYPE_DDL, ddl) for ddl in ddl_list])
+                results[mode] = {n: evaluate(store, questions, n, args.min_similarity) for n in levels}
+
+    print(f"{'检索方式':<16}{'n_results':>10}{'召回率':>7}{'全部召回':>7}{'DDL token':>11}")
+    for mode, by_level in results.items():
+        for n, r in by_level.items():
+            print(f"{mode:<20}{n:>10}{r['recall']:>10.1%}{r['complete']:>11.1%}{r['ddl_tokens']:>11.0f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
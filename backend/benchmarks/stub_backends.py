@@ -0,0 +1,186 @@
+"""
+压测用的本地桩服务：代替 OpenAI 兼容接口、和风天气接口和 MySQL
+
+- POST /v1/chat/completions：按提示词类型返回 SQL（SQL 生成提示词）、结果解释、数据分析或闲聊回复，
+  支持 stream=True（SSE 分块）和 stream_options.include_usage，延迟按固定值加确定性抖动模拟
+- GET /v2/city/lookup、GET /v7/weather/now：返回固定的城市和天气数据
+- --fixture：生成 SQLite 数据库代替 MySQL（表结构来自 training_data/ddl.txt，与 pipeline_bench 相同）
+
+启动后打印后端需要设置的环境变量，后端以这些环境变量启动即可在不访问外部服务的情况下压测。
+BGE-M3 嵌入模型仍在后端本地运行（@查询统计 需要）。
+
+用法（在 backend 目录下）：
+    PYTHONPATH=. python benchmarks/stub_backends.py --port 8900 --fixture /tmp/smartdb_bench.sqlite
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+import zlib
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from pipeline_bench import build_fixture, load_question_sql
+
+app = FastAPI()
+settings = {}
+
+SUMMARY_TEXT = "查询结果显示了各部门的基本信息，共包含多个部门，大部分部门状态正常。"
+ANALYSIS_TEXT = "从数据来看，各部门分布较为均衡。\n\n建议重点关注停用部门的后续安排。"
+CHAT_TEXT = "您好，我是智能助手，可以帮您查询统计数据、天气和时间。\n\n请问有什么可以帮您？"
+
+
+def classify(messages) -> str:
+    system = "\n".join(m.get("content") or "" for m in messages if m.get("role") == "system")
+    if "===响应指南" in system:
+        return "sql"
+    if "You are a helpful data assistant" in system:
+        return "summary"
+    if "数据分析师" in system:
+        return "analysis"
+    return "chat"
+
+
+def reply_for(kind: str) -> str:
+    if kind == "sql":
+        return settings["sql"]
+    if kind == "summary":
+        return SUMMARY_TEXT
+    if kind == "analysis":
+        return ANALYSIS_TEXT
+    return CHAT_TEXT
+
+
+def latency_seconds(kind: str, messages) -> float:
+    """固定延迟 ± 按最后一条消息哈希计算的抖动，同一请求的延迟总是相同"""
+    base = settings["sql_ms"] if kind == "sql" else settings["llm_ms"]
+    last = (messages[-1].get("content") or "") if messages else ""
+    jitter = (zlib.crc32(last.encode("utf-8")) % 2000 / 1000 - 1) * settings["jitter"]
+    return base * (1 + jitter) / 1000
+
+
+def usage(messages, text: str) -> dict:
+    prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 2
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": len(text) // 2,
+        "total_tokens": prompt_tokens + len(text) // 2,
+        "prompt_tokens_details": {"cached_tokens": 0},
+    }
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages = body.get("messages", [])
+    kind = classify(messages)
+    text = reply_for(kind)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    model = body.get("model", "stub-model")
+    created = int(time.time())
+
+    await asyncio.sleep(latency_seconds(kind, messages))
+
+    if not body.get("stream"):
+        return JSONResponse({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage(messages, text),
+        })
+
+    include_usage = (body.get("stream_options") or {}).get("include_usage")
+
+    async def events():
+        size = settings["chunk_chars"]
+        for i in range(0, len(text), size):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": text[i:i + size]}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            await asyncio.sleep(settings["chunk_ms"] / 1000)
+        final = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        yield f"data: {json.dumps(final)}\n\n"
+        if include_usage:
+            yield f"data: {json.dumps({**final, 'choices': [], 'usage': usage(messages, text)})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/v2/city/lookup")
+async def city_lookup(location: str = ""):
+    return {"code": "200", "location": [{"id": "101010100", "name": location}]}
+
+
+@app.get("/v7/weather/now")
+async def weather_now(location: str = ""):
+    await asyncio.sleep(settings["weather_ms"] / 1000)
+    return {
+        "code": "200",
+        "now": {"temp": "22", "text": "晴", "humidity": "40", "windDir": "东南风", "windScale": "2"},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="压测用的 OpenAI / 天气 / MySQL 桩服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--llm-ms", type=float, default=300, help="解释、分析和闲聊回复的首字节前延迟")
+    parser.add_argument("--sql-ms", type=float, default=500, help="SQL 生成的延迟")
+    parser.add_argument("--jitter", type=float, default=0.2, help="延迟抖动比例")
+    parser.add_argument("--chunk-chars", type=int, default=8, help="流式响应每个分块的字符数")
+    parser.add_argument("--chunk-ms", type=float, default=20, help="流式分块间隔")
+    parser.add_argument("--weather-ms", type=float, default=50, help="天气接口延迟")
+    parser.add_argument("--fixture", help="生成 SQLite 数据库夹具到该路径")
+    parser.add_argument("--rows", type=int, default=500, help="夹具每张表的行数")
+    args = parser.parse_args()
+
+    settings.update(
+        llm_ms=args.llm_ms,
+        sql_ms=args.sql_ms,
+        jitter=args.jitter,
+        chunk_chars=args.chunk_chars,
+        chunk_ms=args.chunk_ms,
+        weather_ms=args.weather_ms,
+        sql=load_question_sql()[0][1],
+    )
+
+    base = f"http://{args.host}:{args.port}"
+    env = [
+        f"OPENAI_BASE_URL={base}/v1",
+        "OPENAI_API_KEY=stub",
+        "OPENAI_MODEL=stub-model",
+        "WEATHER_API_KEY=stub",
+        f"WEATHER_GEO_API={base}/v2/city/lookup",
+        f"WEATHER_API={base}/v7/weather/now",
+    ]
+    if args.fixture:
+        tables = build_fixture(args.fixture, args.rows)
+        print(f"SQLite 夹具已生成: {args.fixture}（{len(tables)} 张表，每张 {args.rows} 行）")
+        env += ["DB_TYPE=sqlite", f"SQLITE_PATH={args.fixture}"]
+
+    print("后端启动时设置以下环境变量：")
+    for line in env:
+        print(f"  {line}")
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
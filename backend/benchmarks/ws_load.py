@@ -0,0 +1,239 @@
+"""
+WebSocket /ws 压测工具
+
+按并发等级依次打开 N 个 WebSocket 连接，每个连接按权重随机发送 @查询统计、@查天气、analysis
+和闲聊（回退到 LLM 流式回复）消息，两条消息之间有可配置的思考时间。每条消息带 request_id 和
+notify_complete，后端在响应全部发送后追加 complete 帧，据此计算：
+
+- 连接建立耗时
+- 首帧耗时（发送消息到收到第一个响应帧）
+- 完整响应耗时（发送消息到收到 complete 帧）
+- 错误率（连接失败、error 帧、超时、连接中断，以及没有得到 SQL 的 @查询统计）
+
+配合 stub_backends.py 使用时不访问 OpenAI、天气接口和 MySQL。
+
+用法（在 backend 目录下）：
+    PYTHONPATH=. python benchmarks/stub_backends.py --fixture /tmp/smartdb_bench.sqlite
+    （按提示设置环境变量后启动后端：uvicorn src.app:app --port 3001）
+    python benchmarks/ws_load.py --url ws://127.0.0.1:3001/ws --concurrency 1,10,50 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+
+import numpy as np
+import websockets
+
+QUESTIONS = ["所有部门信息", "部门总数", "停用的部门有哪些", "各级别部门数量"]
+CITIES = ["北京", "上海", "广州", "深圳"]
+CHATS = ["你好，介绍一下你自己", "你能做什么？", "帮我写一段周报开头"]
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for item in value.split(","):
+        kind, weight = item.split("=")
+        mix[kind.strip()] = float(weight)
+    unknown = set(mix) - {"db", "weather", "analysis", "chat"}
+    if unknown:
+        raise SystemExit(f"未知的消息类型: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def build_message(kind: str, rng: random.Random, args) -> dict:
+    if kind == "db":
+        question = rng.choice(QUESTIONS)
+        if rng.random() < args.unique_ratio:
+            # 新问题不命中命令缓存，需要重新生成 SQL
+            question = f"{question}（{uuid.uuid4().hex[:6]}）"
+        message = {"messages": [{"role": "user", "content": f"@查询统计 {question}"}]}
+        if args.db_mode == "progressive":
+            message["progressive"] = True
+        elif args.db_mode == "stream":
+            message["stream_results"] = True
+        return message
+    if kind == "weather":
+        return {"messages": [{"role": "user", "content": f"@查天气 {rng.choice(CITIES)}"}]}
+    if kind == "analysis":
+        return {
+            "type": "analysis",
+            "messages": [{"role": "user", "content": "请分析以下数据：部门总数 12，停用 2，正常 10。"}],
+        }
+    return {"messages": [{"role": "user", "content": rng.choice(CHATS)}]}
+
+
+def is_error_frame(frame: dict) -> bool:
+    return frame.get("type") == "error" or frame.get("event") == "error"
+
+
+def has_sql(frame: dict) -> bool:
+    """
+    @查询统计 是否得到了查询结果：生成 SQL 失败时后端返回的是错误说明（或回退到闲聊），
+    不是 error 帧，所以以响应中是否带 SQL 判断
+    """
+    if frame.get("event") in ("sql", "columns"):
+        return True
+    content = frame.get("content")
+    return isinstance(content, str) and content.startswith("{") and '"sql"' in content
+
+
+class Stats:
+    def __init__(self):
+        self.connect_ms: List[float] = []
+        self.connect_errors = 0
+        self.first_frame_ms: Dict[str, List[float]] = defaultdict(list)
+        self.full_ms: Dict[str, List[float]] = defaultdict(list)
+        self.sent: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+
+async def run_client(client_id: int, args, mix: Dict[str, float], stats: Stats, deadline: float):
+    rng = random.Random(args.seed + client_id)
+    kinds, weights = list(mix), list(mix.values())
+
+    started = time.perf_counter()
+    try:
+        websocket = await asyncio.wait_for(websockets.connect(args.url, max_size=None), args.timeout)
+    except Exception:
+        stats.connect_errors += 1
+        return
+    stats.connect_ms.append((time.perf_counter() - started) * 1000)
+
+    try:
+        sent = 0
+        while time.perf_counter() < deadline and (not args.messages or sent < args.messages):
+            kind = rng.choices(kinds, weights)[0]
+            request_id = uuid.uuid4().hex[:16]
+            message = build_message(kind, rng, args)
+            message.update(request_id=request_id, notify_complete=True)
+
+            sent += 1
+            stats.sent[kind] += 1
+            sent_at = time.perf_counter()
+            first_frame_at = None
+            failed = False
+            answered = kind != "db"
+            try:
+                await websocket.send(json.dumps(message, ensure_ascii=False))
+                while True:
+                    remaining = args.timeout - (time.perf_counter() - sent_at)
+                    frame = json.loads(await asyncio.wait_for(websocket.recv(), max(remaining, 0.001)))
+                    if frame.get("request_id") != request_id:
+                        continue
+                    if first_frame_at is None:
+                        first_frame_at = time.perf_counter()
+                    if is_error_frame(frame):
+                        failed = True
+                    answered = answered or has_sql(frame)
+                    if frame.get("type") == "complete":
+                        break
+            except Exception:
+                # 超时或连接中断：该连接不再可用
+                stats.errors[kind] += 1
+                return
+
+            if failed or not answered:
+                stats.errors[kind] += 1
+            else:
+                stats.first_frame_ms[kind].append((first_frame_at - sent_at) * 1000)
+                stats.full_ms[kind].append((time.perf_counter() - sent_at) * 1000)
+
+            if args.think_ms > 0:
+                # 思考时间在 [0, 2 * think_ms] 内均匀分布
+                await asyncio.sleep(rng.uniform(0, 2 * args.think_ms) / 1000)
+    finally:
+        await websocket.close()
+
+
+def percentiles(values: List[float]) -> str:
+    if not values:
+        return f"{'-':>8}{'-':>8}{'-':>8}"
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return f"{p50:>8.0f}{p95:>8.0f}{p99:>8.0f}"
+
+
+async def run_level(concurrency: int, args, mix: Dict[str, float]) -> dict:
+    stats = Stats()
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(run_client(i, args, mix, stats, deadline) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    sent = sum(stats.sent.values())
+    errors = sum(stats.errors.values())
+    all_first = [v for values in stats.first_frame_ms.values() for v in values]
+    all_full = [v for values in stats.full_ms.values() for v in values]
+
+    print(f"\n并发 {concurrency}：连接 {len(stats.connect_ms)}/{concurrency} 成功，"
+          f"消息 {sent}，错误 {errors}（{errors / sent if sent else 0:.1%}），"
+          f"吞吐 {len(all_full) / elapsed:.1f} 消息/秒")
+    print(f"  {'':<10}{'p50':>8}{'p95':>8}{'p99':>8}  (ms)")
+    print(f"  {'连接建立':<8}{percentiles(stats.connect_ms)}")
+    print(f"  {'首帧':<9}{percentiles(all_first)}")
+    print(f"  {'完整响应':<8}{percentiles(all_full)}")
+    for kind in mix:
+        if stats.sent[kind]:
+            print(f"  {kind:<10}首帧{percentiles(stats.first_frame_ms[kind])}  完整{percentiles(stats.full_ms[kind])}"
+                  f"  错误 {stats.errors[kind]}/{stats.sent[kind]}")
+
+    def summary(values):
+        if not values:
+            return None
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {"p50": round(float(p50), 1), "p95": round(float(p95), 1), "p99": round(float(p99), 1)}
+
+    return {
+        "concurrency": concurrency,
+        "connections": len(stats.connect_ms),
+        "connect_errors": stats.connect_errors,
+        "messages": sent,
+        "errors": errors,
+        "error_rate": errors / sent if sent else 0.0,
+        "throughput": len(all_full) / elapsed,
+        "connect_ms": summary(stats.connect_ms),
+        "first_frame_ms": summary(all_first),
+        "full_ms": summary(all_full),
+        "by_kind": {
+            kind: {
+                "messages": stats.sent[kind],
+                "errors": stats.errors[kind],
+                "first_frame_ms": summary(stats.first_frame_ms[kind]),
+                "full_ms": summary(stats.full_ms[kind]),
+            }
+            for kind in mix
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket /ws 压测")
+    parser.add_argument("--url", default="ws://127.0.0.1:3001/ws")
+    parser.add_argument("--concurrency", default="1,10,50", help="并发连接数等级，逗号分隔，依次执行")
+    parser.add_argument("--duration", type=float, default=30, help="每个等级的持续秒数")
+    parser.add_argument("--messages", type=int, default=0, help="每个连接最多发送的消息数（0 表示不限）")
+    parser.add_argument("--mix", default="db=0.5,weather=0.2,analysis=0.1,chat=0.2", help="消息类型权重")
+    parser.add_argument("--db-mode", choices=["plain", "progressive", "stream"], default="plain",
+                        help="@查询统计 的响应方式")
+    parser.add_argument("--unique-ratio", type=float, default=0.2, help="@查询统计 中新问题（不命中缓存）的比例")
+    parser.add_argument("--think-ms", type=float, default=1000, help="两条消息之间的平均思考时间")
+    parser.add_argument("--timeout", type=float, default=120, help="连接和单条消息的超时秒数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="将结果写入该 JSON 文件")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    results = [asyncio.run(run_level(int(c), args, mix)) for c in args.concurrency.split(",") if c]
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "levels": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
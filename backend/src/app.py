@@ -1,4 +1,4 @@
-from fastapi import FastAPI, WebSocket, Form
+from fastapi import FastAPI, WebSocket, Body, Form, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from openai import AsyncOpenAI
 from src.chat.chat_manager import ChatManager
@@ -8,12 +8,15 @@ import os
 from datetime import datetime
 import pytz
 from dotenv import load_dotenv
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 import pandas as pd
 import asyncio
 from src.routes.websocket import WebSocketRoute
-from src.routes.training import TrainingRoute
+from src.routes.training import TrainingRoute, DEFAULT_PAGE_SIZE
 from src.routes.system import SystemRoute
+from src.routes.metrics import MetricsRoute
+from src.cache.cache_engine import run_cache_sweeper
+from src.vanna.tracing import configure_tracing
 
 # 加载环境变量
 load_dotenv()
@@ -46,23 +49,44 @@ client = AsyncOpenAI(
 )
 
 # 初始化路由处理器
-websocket_route = WebSocketRoute(chat_manager, client)
+metrics_route = MetricsRoute(chat_manager.vanna_service)
+websocket_route = WebSocketRoute(chat_manager, client, metrics_route)
 training_route = TrainingRoute(chat_manager)
 system_route = SystemRoute()
 
+# 统计进行中的 HTTP 请求
+@app.middleware("http")
+async def track_http_requests(request: Request, call_next):
+    with metrics_route.track_request("http"):
+        return await call_next(request)
+
 # WebSocket 路由
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):  # 添加类型注解
     try:
         await websocket.accept()
-        await websocket_route.handle_connection(websocket)
+        with metrics_route.track_connection():
+            await websocket_route.handle_connection(websocket)
     except Exception as e:
         print(f"WebSocket connection error: {e}")
 
 # 训练数据管理路由
+# 分页列出训练数据，可按类型、标题（完全匹配）和内容过滤
 @app.get("/api/training/list")
-async def list_training_data():
-    return await training_route.list_training_data()
+async def list_training_data(
+    limit: int = DEFAULT_PAGE_SIZE,
+    offset: int = 0,
+    data_type: Optional[str] = Query(None, alias="type"),
+    title: Optional[str] = None,
+    text: Optional[str] = None
+):
+    return await training_route.list_training_data(
+        limit=limit,
+        offset=offset,
+        data_type=data_type,
+        title=title,
+        text=text
+    )
 
 @app.post("/api/training/add")
 async def add_training_data(
@@ -80,6 +104,19 @@ async def add_training_data(
         note=note
     )
 
+# 批量导入训练数据（后台任务），通过任务 ID 查询进度
+@app.post("/api/training/bulk")
+async def bulk_import_training_data(payload: Dict[str, Any] = Body(...)):
+    return await training_route.bulk_import_training_data(payload)
+
+@app.get("/api/training/bulk")
+async def list_import_jobs():
+    return await training_route.list_import_jobs()
+
+@app.get("/api/training/bulk/{job_id}")
+async def get_import_job(job_id: str):
+    return await training_route.get_import_job(job_id)
+
 @app.delete("/api/training/{training_id}")
 async def delete_training_data(training_id: str):
     return await training_route.delete_training_data(training_id)
@@ -89,16 +126,71 @@ async def delete_training_data(training_id: str):
 async def get_current_time():
     return await system_route.get_current_time()
 
+@app.get("/api/db/pool-stats")
+async def get_db_pool_stats():
+    return await system_route.get_db_pool_stats(chat_manager.vanna_service)
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    return await system_route.get_cache_stats(chat_manager.vanna_service)
+
+@app.get("/metrics")
+async def get_metrics():
+    return await metrics_route.get_metrics()
+
 @app.get("/")
 async def health_check():
     return await system_route.health_check()
 
+@app.get("/api/ready")
+async def readiness_check(response: Response):
+    result = await system_route.readiness_check(chat_manager.vanna_service)
+    if result["status"] != "ready":
+        response.status_code = 503
+    return result
+
 # 启动时初始化
 @app.on_event("startup")
 async def startup_event():
     print("Starting application initialization...")
     check_env_variables()
     print("Environment variables checked")
+    # 请求链路追踪：TRACE_EXPORTER=jsonl / otlp 时将各阶段耗时（span）写入 TRACE_FILE
+    app.state.trace_exporter = configure_tracing(
+        os.getenv("TRACE_EXPORTER", "none"),
+        os.getenv("TRACE_FILE") or None
+    )
+    if app.state.trace_exporter:
+        print(f"Tracing enabled, spans are written to {app.state.trace_exporter.path}")
+    # 嵌入模型按需加载；默认在后台预热，设置 EMBEDDING_WARMUP=0 可关闭
+    embedding_function = chat_manager.vanna_service.embedding_function
+    if os.getenv("EMBEDDING_WARMUP", "1") != "0" and hasattr(embedding_function, "start_warm_up"):
+        embedding_function.start_warm_up()
+        print("Embedding model warm-up started in background")
+    # 启动缓存过期清理任务
+    vanna_service = chat_manager.vanna_service
+    app.state.background_tasks = [asyncio.create_task(run_cache_sweeper(
+        [vanna_service.query_cache, vanna_service.command_cache],
+        interval_seconds=float(os.getenv("CACHE_SWEEP_INTERVAL", 60))
+    ))]
+    print("Cache sweeper started")
+    # 定期探测缓存结果依赖的表，表发生变化时失效相关缓存；设置为 0 可关闭
+    probe_interval = float(os.getenv("CACHE_TABLE_PROBE_INTERVAL", 30))
+    # 表变化探测读取 MySQL information_schema，SQLite 数据库不启用
+    if probe_interval > 0 and getattr(vanna_service, "sql_pool", None) is not None:
+        table_monitor = vanna_service.create_table_monitor(probe_interval)
+        app.state.background_tasks.append(asyncio.create_task(table_monitor.run()))
+        print("Table change monitor started")
+
+# 关闭时清理后台任务
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in getattr(app.state, "background_tasks", []):
+        task.cancel()
+    training_route.import_jobs.shutdown()
+    # 写出尚未导出的 span
+    if getattr(app.state, "trace_exporter", None):
+        app.state.trace_exporter.shutdown()
     
 if __name__ == "__main__":
     uvicorn.run("app:app", host="0.0.0.0", port=3001, reload=True)
\ No newline at end of file
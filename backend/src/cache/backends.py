@@ -0,0 +1,339 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cache_engine import CacheEngine
+
+try:
+    import msgpack
+except ImportError:  # 未安装 msgpack 时退回 JSON 序列化
+    msgpack = None
+
+# 序列化格式标记，写在数据的第一个字节，不同 worker 即使序列化库不同也能互相读取
+_FORMAT_MSGPACK = b'm'
+_FORMAT_JSON = b'j'
+
+
+class CacheBackend(ABC):
+    """
+    缓存后端接口，QueryCache 和 CommandCache 通过它读写数据
+
+    - memory：进程内有界 LRU（CacheEngine），单进程部署的默认选项
+    - redis：Redis 协议的共享缓存，多个 uvicorn worker / 多个实例共享同一份 SQL 和结果缓存
+    """
+
+    name: str
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """获取缓存值，未命中或已过期时返回 None"""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None, meta: Optional[Dict[str, Any]] = None) -> bool:
+        """写入缓存，返回是否写入成功"""
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """删除指定条目"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """清空缓存"""
+
+    @abstractmethod
+    def sweep(self) -> int:
+        """删除所有过期条目，返回删除的数量"""
+
+    @abstractmethod
+    def items(self) -> List[Tuple[str, Any, float, Optional[Dict[str, Any]]]]:
+        """返回所有条目的快照：(key, value, expires_at, meta)"""
+
+    @abstractmethod
+    def get_stats(self, detailed: bool = True) -> Dict[str, Any]:
+        """获取缓存统计信息，detailed 为 False 时跳过需要遍历条目的统计（供指标抓取使用）"""
+
+
+class MemoryCacheBackend(CacheEngine, CacheBackend):
+    """进程内缓存后端"""
+
+    def get_stats(self, detailed: bool = True) -> Dict[str, Any]:
+        # 进程内统计只读计数器和条目字典，不需要区分
+        stats = super().get_stats()
+        stats['backend'] = 'memory'
+        return stats
+
+
+def _dumps(payload: Any) -> bytes:
+    if msgpack is not None:
+        return _FORMAT_MSGPACK + msgpack.packb(payload, use_bin_type=True)
+    return _FORMAT_JSON + json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+
+
+def _loads(data: bytes) -> Any:
+    marker, body = data[:1], data[1:]
+    if marker == _FORMAT_MSGPACK:
+        if msgpack is None:
+            raise ValueError("缓存数据为 msgpack 格式，但当前环境未安装 msgpack")
+        return msgpack.unpackb(body, raw=False)
+    if marker == _FORMAT_JSON:
+        return json.loads(body.decode('utf-8'))
+    raise ValueError(f"未知的缓存数据格式: {marker!r}")
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Redis 协议的共享缓存后端
+
+    - 键格式为 {key_prefix}:{name}:{key}，过期交给 Redis 的 TTL（SET ... EX）处理
+    - 值和 meta 一起用 msgpack 序列化（未安装时退回 JSON）
+    - meta 中的 tables 另外写入表索引：{key_prefix}:{name}-index:table:{表名} 是读取了该表的缓存键集合，
+      {key_prefix}:{name}-index:tables 是所有被依赖的表，按表失效和探测时不需要扫描、读取缓存值
+    - Redis 不可用时读写按未命中处理，只打印错误，不影响问答流程
+    - 可以传入现成的客户端，例如测试时使用 fakeredis.FakeRedis()
+    """
+
+    def __init__(self, name: str, ttl_seconds: int, client: Any = None, url: Optional[str] = None,
+                 key_prefix: str = 'smartdb', max_bytes: int = 64 * 1024 * 1024):
+        try:
+            import redis
+        except ImportError:
+            redis = None
+
+        if client is None:
+            if redis is None:
+                raise ImportError("使用 Redis 缓存后端需要安装 redis：pip install redis")
+            client = redis.Redis.from_url(url or 'redis://localhost:6379/0')
+
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.client = client
+        self._prefix = f"{key_prefix}:{name}:"
+        # 索引键不以 self._prefix 开头，扫描缓存条目时不会混入
+        self._index_prefix = f"{key_prefix}:{name}-index:"
+        self._tables_key = self._index_prefix + 'tables'
+        self._errors = (redis.RedisError, OSError) if redis is not None else (Exception,)
+        self._watch_error = redis.WatchError if redis is not None else Exception
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'errors': 0,
+            'rejections': 0,
+        }
+
+    def _key(self, key: str) -> str:
+        return self._prefix + key
+
+    def _table_key(self, table: str) -> str:
+        return f"{self._index_prefix}table:{table}"
+
+    def _scan_keys(self, prefix: Optional[str] = None) -> List[bytes]:
+        return list(self.client.scan_iter(match=(prefix or self._prefix) + '*', count=500))
+
+    @staticmethod
+    def _decode(value: Any) -> str:
+        return value.decode() if isinstance(value, bytes) else value
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            data = self.client.get(self._key(key))
+            if data is None:
+                self._counters['misses'] += 1
+                return None
+            value, _ = _loads(data)
+        except self._errors + (ValueError,) as e:
+            print(f"Redis cache get error ({self.name}): {e}")
+            self._counters['errors'] += 1
+            self._counters['misses'] += 1
+            return None
+        self._counters['hits'] += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None, meta: Optional[Dict[str, Any]] = None) -> bool:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        try:
+            data = _dumps([value, meta])
+            if len(data) > self.max_bytes:
+                self._counters['rejections'] += 1
+                return False
+            tables = (meta or {}).get('tables') or ()
+            pipe = self.client.pipeline()
+            pipe.set(self._key(key), data, ex=max(1, int(ttl)))
+            for table in tables:
+                pipe.sadd(self._table_key(table), key)
+            if tables:
+                pipe.sadd(self._tables_key, *tables)
+            pipe.execute()
+        except self._errors + (TypeError, ValueError) as e:
+            print(f"Redis cache set error ({self.name}): {e}")
+            self._counters['errors'] += 1
+            return False
+        return True
+
+    def delete(self, key: str) -> bool:
+        try:
+            return bool(self.client.delete(self._key(key)))
+        except self._errors as e:
+            print(f"Redis cache delete error ({self.name}): {e}")
+            self._counters['errors'] += 1
+            return False
+
+    def clear(self) -> None:
+        try:
+            keys = self._scan_keys() + self._scan_keys(self._index_prefix)
+            for i in range(0, len(keys), 500):
+                self.client.delete(*keys[i:i + 500])
+        except self._errors as e:
+            print(f"Redis cache clear error ({self.name}): {e}")
+            self._counters['errors'] += 1
+
+    def sweep(self) -> int:
+        # 过期由 Redis 自身处理
+        return 0
+
+    def items(self) -> List[Tuple[str, Any, float, Optional[Dict[str, Any]]]]:
+        try:
+            keys = self._scan_keys()
+            if not keys:
+                return []
+            pipe = self.client.pipeline()
+            for key in keys:
+                pipe.get(key)
+                pipe.ttl(key)
+            replies = pipe.execute()
+        except self._errors as e:
+            print(f"Redis cache scan error ({self.name}): {e}")
+            self._counters['errors'] += 1
+            return []
+
+        now = time.time()
+        result = []
+        for i, key in enumerate(keys):
+            data, ttl = replies[2 * i], replies[2 * i + 1]
+            if data is None:
+                continue
+            try:
+                value, meta = _loads(data)
+            except ValueError:
+                continue
+            result.append((self._decode(key)[len(self._prefix):], value, now + max(ttl, 0), meta))
+        return result
+
+    def tracked_tables(self) -> List[str]:
+        """返回表索引中的所有表（条目过期后可能残留，由 prune_tables() 清理）"""
+        try:
+            return sorted(self._decode(table) for table in self.client.smembers(self._tables_key))
+        except self._errors as e:
+            print(f"Redis cache index error ({self.name}): {e}")
+            self._counters['errors'] += 1
+            return []
+
+    def table_sizes(self) -> Dict[str, int]:
+        """每张表在索引中的缓存键数量（可能包含已过期的键）"""
+        tables = self.tracked_tables()
+        if not tables:
+            return {}
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for table in tables:
+                pipe.scard(self._table_key(table))
+            return dict(zip(tables, pipe.execute()))
+        except self._errors as e:
+            print(f"Redis cache index error ({self.name}): {e}")
+            self._counters['errors'] += 1
+            return {}
+
+    def pop_table(self, table: str) -> List[str]:
+        """取出并删除一张表的索引，返回读取了该表的缓存键（可能包含已过期的键）"""
+        try:
+            pipe = self.client.pipeline()
+            pipe.smembers(self._table_key(table))
+            pipe.delete(self._table_key(table))
+            pipe.srem(self._tables_key, table)
+            keys = pipe.execute()[0]
+        except self._errors as e:
+            print(f"Redis cache index error ({self.name}): {e}")
+            self._counters['errors'] += 1
+            return []
+        return [self._decode(key) for key in keys]
+
+    def prune_tables(self) -> int:
+        """
+        从表索引中删除已过期条目的键，没有剩余键的表移出被依赖的表，返回删除的键数量
+
+        只用 EXISTS 检查键是否还在，不读取缓存值
+        """
+        pruned = 0
+        try:
+            for table in self.tracked_tables():
+                table_key = self._table_key(table)
+                keys = list(self.client.smembers(table_key))
+                pipe = self.client.pipeline(transaction=False)
+                for key in keys:
+                    pipe.exists(self._key(self._decode(key)))
+                stale = [key for key, exists in zip(keys, pipe.execute()) if not exists]
+                if stale:
+                    self.client.srem(table_key, *stale)
+                    pruned += len(stale)
+                if len(stale) == len(keys):
+                    self._untrack_if_empty(table)
+        except self._errors as e:
+            print(f"Redis cache index error ({self.name}): {e}")
+            self._counters['errors'] += 1
+        return pruned
+
+    def _untrack_if_empty(self, table: str) -> None:
+        # WATCH 表索引：检查之后有其他 worker 写入该表的条目时放弃，表仍保留在被依赖的表中
+        table_key = self._table_key(table)
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(table_key)
+                if pipe.scard(table_key):
+                    return
+                pipe.multi()
+                pipe.srem(self._tables_key, table)
+                pipe.execute()
+            except self._watch_error:
+                pass
+
+    def get_stats(self, detailed: bool = True) -> Dict[str, Any]:
+        lookups = self._counters['hits'] + self._counters['misses']
+        stats = {
+            'name': self.name,
+            'backend': 'redis',
+            'serializer': 'msgpack' if msgpack is not None else 'json',
+            'max_bytes': self.max_bytes,
+            # 命中率只统计当前进程的读取
+            'hit_rate': self._counters['hits'] / lookups if lookups else 0.0,
+            **self._counters,
+        }
+        if detailed:
+            # 条目数需要 SCAN 整个键空间，指标抓取时不统计
+            try:
+                entries = len(self._scan_keys())
+            except self._errors:
+                entries = None
+            stats['total_entries'] = entries
+            stats['active_entries'] = entries
+        return stats
+
+
+def create_cache_backend(name: str, ttl_seconds: int, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024,
+                         backend: str = 'memory', redis_url: Optional[str] = None, key_prefix: str = 'smartdb',
+                         client: Any = None) -> CacheBackend:
+    """
+    根据配置创建缓存后端
+
+    Args:
+        backend: 'memory' 或 'redis'
+        redis_url: Redis 连接地址，backend 为 'redis' 时使用
+        client: 现成的 Redis 客户端（如 fakeredis），优先于 redis_url
+    """
+    backend = (backend or 'memory').lower()
+    if backend == 'memory':
+        return MemoryCacheBackend(name, ttl_seconds, max_entries=max_entries, max_bytes=max_bytes)
+    if backend == 'redis':
+        return RedisCacheBackend(name, ttl_seconds, client=client, url=redis_url,
+                                 key_prefix=key_prefix, max_bytes=max_bytes)
+    raise ValueError(f"不支持的缓存后端: {backend}")
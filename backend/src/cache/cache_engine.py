@@ -0,0 +1,170 @@
+import asyncio
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 估算大列表大小时抽样的元素个数
+_SIZE_SAMPLE = 20
+
+
+def estimate_size(obj: Any) -> int:
+    """
+    估算对象占用的内存字节数
+
+    递归累加 dict / list / tuple 中元素的 sys.getsizeof；元素较多的列表（如查询结果行）
+    只抽样前若干个元素，再按长度外推，避免估算本身成为瓶颈
+    """
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_size(k) + estimate_size(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        size = sys.getsizeof(obj)
+        if len(obj) <= _SIZE_SAMPLE:
+            return size + sum(estimate_size(item) for item in obj)
+        sample = sum(estimate_size(item) for item in obj[:_SIZE_SAMPLE])
+        return size + int(sample / _SIZE_SAMPLE * len(obj))
+    return sys.getsizeof(obj)
+
+
+class _Entry:
+    __slots__ = ('value', 'expires_at', 'size', 'meta')
+
+    def __init__(self, value: Any, expires_at: float, size: int, meta: Optional[Dict[str, Any]]):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.meta = meta
+
+
+class CacheEngine:
+    """
+    线程安全的有界 LRU 缓存引擎，QueryCache 和 CommandCache 共用
+
+    - 同时限制条目数（max_entries）和估算的总字节数（max_bytes），超出时淘汰最久未使用的条目
+    - 每个条目有过期时间，读取时惰性删除过期条目，sweep() 主动清理
+    - 记录命中、未命中、淘汰和过期次数
+    """
+
+    def __init__(self, name: str, ttl_seconds: int, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'rejections': 0,  # 单个条目超过 max_bytes，未缓存
+        }
+
+    def _remove(self, key: str) -> _Entry:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        return entry
+
+    def get(self, key: str) -> Optional[Any]:
+        """获取缓存值，未命中或已过期时返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            if time.time() >= entry.expires_at:
+                self._remove(key)
+                self._counters['expirations'] += 1
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return entry.value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None, meta: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        写入缓存，必要时淘汰最久未使用的条目
+
+        Returns:
+            bool: 是否写入成功（单个条目超过 max_bytes 时不缓存）
+        """
+        size = estimate_size(value)
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                self._counters['rejections'] += 1
+                return False
+            self._entries[key] = _Entry(value, time.time() + ttl, size, meta)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._counters['evictions'] += 1
+            return True
+
+    def delete(self, key: str) -> bool:
+        """删除指定条目"""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def sweep(self) -> int:
+        """删除所有过期条目，返回删除的数量"""
+        now = time.time()
+        with self._lock:
+            expired_keys = [key for key, entry in self._entries.items() if now >= entry.expires_at]
+            for key in expired_keys:
+                self._remove(key)
+            self._counters['expirations'] += len(expired_keys)
+        return len(expired_keys)
+
+    def items(self) -> List[Tuple[str, Any, float, Optional[Dict[str, Any]]]]:
+        """返回所有条目的快照：(key, value, expires_at, meta)"""
+        with self._lock:
+            return [(key, entry.value, entry.expires_at, entry.meta) for key, entry in self._entries.items()]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        now = time.time()
+        with self._lock:
+            active = sum(1 for entry in self._entries.values() if entry.expires_at > now)
+            lookups = self._counters['hits'] + self._counters['misses']
+            return {
+                'name': self.name,
+                'total_entries': len(self._entries),
+                'active_entries': active,
+                'expired_entries': len(self._entries) - active,
+                'max_entries': self.max_entries,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hit_rate': self._counters['hits'] / lookups if lookups else 0.0,
+                **self._counters,
+            }
+
+
+async def run_cache_sweeper(caches: Iterable[Any], interval_seconds: float = 60) -> None:
+    """
+    后台清理任务：定期调用各缓存的 remove_expired()，由应用启动钩子创建，关闭时取消
+
+    清理在线程中执行：共享后端的清理需要访问 Redis（修剪表索引），耗时随索引大小增长，不能阻塞事件循环
+    """
+    caches = list(caches)
+    while True:
+        await asyncio.sleep(interval_seconds)
+        for cache in caches:
+            try:
+                await asyncio.to_thread(cache.remove_expired)
+            except Exception as e:
+                print(f"Cache sweeper error: {e}")
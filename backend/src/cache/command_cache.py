@@ -1,10 +1,15 @@
 from typing import Dict, Optional
-from datetime import datetime, timedelta
 import hashlib
+import time
+from .backends import create_cache_backend
 
 class CommandCache:
-    def __init__(self, ttl_seconds: int = 7200):  # 默认缓存2小时
-        self._cache: Dict[str, Dict[str, any]] = {}
+    def __init__(self, ttl_seconds: int = 7200, max_entries: int = 5000, max_bytes: int = 16 * 1024 * 1024,
+                 backend: str = 'memory', redis_url: Optional[str] = None, key_prefix: str = 'smartdb'):  # 默认缓存2小时
+        # memory：有界 LRU，条目数和估算字节数超限时淘汰最久未使用的命令
+        # redis：集群内共享，同一个问题只需经过一次 LLM 生成 SQL
+        self._engine = create_cache_backend('command', ttl_seconds, max_entries=max_entries, max_bytes=max_bytes,
+                                            backend=backend, redis_url=redis_url, key_prefix=key_prefix)
         self._ttl_seconds = ttl_seconds
     
     def _generate_key(self, command: str) -> str:
@@ -15,49 +20,40 @@ class CommandCache:
     
     def get(self, command: str) -> Optional[str]:
         """获取缓存的 SQL"""
-        key = self._generate_key(command)
-        if key in self._cache:
-            cached_data = self._cache[key]
-            if datetime.now() < cached_data['expires_at']:
-                print(f"Command cache hit for: {command}")
-                return cached_data['sql']
-            else:
-                del self._cache[key]
-        return None
+        sql = self._engine.get(self._generate_key(command))
+        if sql is not None:
+            print(f"Command cache hit for: {command}")
+        return sql
+    
+    def peek(self, command: str) -> Optional[str]:
+        """获取缓存的 SQL，不打印命中日志（供语义缓存校验候选问题）"""
+        return self._engine.get(self._generate_key(command))
     
     def set(self, command: str, sql: str) -> None:
         """缓存命令对应的 SQL"""
-        key = self._generate_key(command)
-        self._cache[key] = {
-            'sql': sql,
-            'expires_at': datetime.now() + timedelta(seconds=self._ttl_seconds),
-            'command': command  # 保存原始命令用于调试
-        }
+        # 保存原始命令用于调试
+        self._engine.set(self._generate_key(command), sql, meta={'command': command})
         print(f"Cached SQL for command: {command}")
     
     def clear(self) -> None:
         """清空缓存"""
-        self._cache.clear()
+        self._engine.clear()
         print("Command cache cleared")
     
     def remove_expired(self) -> None:
         """删除过期缓存"""
-        now = datetime.now()
-        expired_keys = [
-            key for key, value in self._cache.items()
-            if now >= value['expires_at']
-        ]
-        for key in expired_keys:
-            del self._cache[key]
-        if expired_keys:
-            print(f"Removed {len(expired_keys)} expired command cache entries")
+        removed = self._engine.sweep()
+        if removed:
+            print(f"Removed {removed} expired command cache entries")
     
-    def get_stats(self) -> Dict[str, any]:
-        """获取缓存统计信息"""
-        now = datetime.now()
-        return {
-            'total_entries': len(self._cache),
-            'active_entries': sum(1 for v in self._cache.values() if v['expires_at'] > now),
-            'expired_entries': sum(1 for v in self._cache.values() if v['expires_at'] <= now),
-            'commands': [v['command'] for v in self._cache.values() if v['expires_at'] > now]
-        } 
\ No newline at end of file
+    def get_stats(self, detailed: bool = True) -> Dict[str, any]:
+        """获取缓存统计信息，detailed 为 False 时不列出缓存的命令（不读取条目）"""
+        stats = self._engine.get_stats(detailed)
+        if not detailed:
+            return stats
+        now = time.time()
+        stats['commands'] = [
+            meta['command'] for _, _, expires_at, meta in self._engine.items()
+            if expires_at > now
+        ]
+        return stats
@@ -1,13 +1,90 @@
-from typing import Dict, Any, Optional
-from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, List, Optional, Set
 import hashlib
 import json
+import threading
+import sqlparse
+from sqlparse.sql import Identifier, IdentifierList, Parenthesis
+from sqlparse.tokens import Keyword, DML
+from .backends import MemoryCacheBackend, create_cache_backend
+
+
+def _collect_tables(tokens, tables: Set[str], ctes: Set[str]) -> None:
+    """递归遍历语法树，收集 FROM / JOIN 之后的表名以及 WITH 定义的 CTE 名"""
+    expect_table = False
+    in_cte = False
+    for token in tokens:
+        if token.is_whitespace or token.ttype in sqlparse.tokens.Comment:
+            continue
+
+        if token.ttype is Keyword.CTE:
+            in_cte = True
+            continue
+
+        if in_cte and isinstance(token, (Identifier, IdentifierList)):
+            identifiers = token.get_identifiers() if isinstance(token, IdentifierList) else [token]
+            for identifier in identifiers:
+                if isinstance(identifier, Identifier):
+                    ctes.add(identifier.get_name().lower())
+                    _collect_tables(identifier.tokens, tables, ctes)
+            continue
+        if token.ttype is DML:
+            in_cte = False
+
+        if expect_table:
+            identifiers = token.get_identifiers() if isinstance(token, IdentifierList) else [token]
+            for identifier in identifiers:
+                _add_table(identifier, tables, ctes)
+            expect_table = False
+            continue
+
+        if token.ttype in Keyword and (token.normalized in ('FROM', 'INTO', 'UPDATE') or token.normalized.endswith('JOIN')):
+            expect_table = True
+        elif token.is_group:
+            _collect_tables(token.tokens, tables, ctes)
+
+
+def _add_table(token, tables: Set[str], ctes: Set[str]) -> None:
+    if isinstance(token, Parenthesis):
+        _collect_tables(token.tokens, tables, ctes)
+    elif isinstance(token, Identifier):
+        subquery = next((t for t in token.tokens if isinstance(t, Parenthesis)), None)
+        if subquery is not None:
+            # 派生表：(SELECT ...) AS t
+            _collect_tables(subquery.tokens, tables, ctes)
+        elif token.get_real_name():
+            tables.add(token.get_real_name().strip('`').lower())
+
+
+def extract_tables(sql: str) -> List[str]:
+    """
+    解析 SQL，返回其读取的表名（小写，去掉库名前缀和反引号）
+
+    包括 JOIN、子查询和派生表中的表，不包括 WITH 定义的 CTE 名
+    """
+    tables: Set[str] = set()
+    ctes: Set[str] = set()
+    for statement in sqlparse.parse(sql):
+        _collect_tables(statement.tokens, tables, ctes)
+    return sorted(tables - ctes)
+
 
 class QueryCache:
-    def __init__(self, ttl_seconds: int = 3600):  # 默认缓存1小时
-        self._cache: Dict[str, Dict[str, Any]] = {}
+    def __init__(self, ttl_seconds: int = 3600, max_entries: int = 1000, max_bytes: int = 128 * 1024 * 1024,
+                 backend: str = 'memory', redis_url: Optional[str] = None, key_prefix: str = 'smartdb',
+                 table_ttls: Optional[Dict[str, int]] = None):  # 默认缓存1小时
+        # memory：有界 LRU，条目数和估算字节数超限时淘汰最久未使用的结果
+        # redis：多个 worker 共享同一份查询结果
+        self._engine = create_cache_backend('query', ttl_seconds, max_entries=max_entries, max_bytes=max_bytes,
+                                            backend=backend, redis_url=redis_url, key_prefix=key_prefix)
         self._ttl_seconds = ttl_seconds
-    
+        # 按表覆盖 TTL：变化快的业务表缓存短一些，维度表可以长一些
+        self.table_ttls = {table.lower(): ttl for table, ttl in (table_ttls or {}).items()}
+        # 表 -> 缓存键 的依赖索引，用于按表失效
+        # 共享后端的索引由后端保存在 Redis 中（写入时随 meta 的 tables 一起记录），所有 worker 共用
+        self._shared = not isinstance(self._engine, MemoryCacheBackend)
+        self._table_index: Dict[str, Set[str]] = {}
+        self._index_lock = threading.Lock()
+
     def _generate_key(self, sql: str, params: tuple = None) -> str:
         """生成缓存键"""
         # 将 SQL 和参数组合成一个唯一的字符串
@@ -16,43 +93,87 @@ class QueryCache:
             cache_str += json.dumps(params, sort_keys=True)
         # 使用 MD5 生成固定长度的键
         return hashlib.md5(cache_str.encode()).hexdigest()
-    
+
+    def _ttl_for_tables(self, tables: Iterable[str]) -> int:
+        """SQL 读取多张表时取其中最短的 TTL"""
+        return min([self.table_ttls.get(table, self._ttl_seconds) for table in tables] or [self._ttl_seconds])
+
     def get(self, sql: str, params: tuple = None) -> Optional[Dict[str, Any]]:
         """获取缓存的查询结果"""
-        key = self._generate_key(sql, params)
-        if key in self._cache:
-            cached_data = self._cache[key]
-            # 检查是否过期
-            if datetime.now() < cached_data['expires_at']:
-                print(f"Cache hit for query: {sql[:100]}...")
-                return cached_data['data']
-            else:
-                # 删除过期数据
-                del self._cache[key]
-        return None
-    
+        data = self._engine.get(self._generate_key(sql, params))
+        if data is not None:
+            print(f"Cache hit for query: {sql[:100]}...")
+        return data
+
     def set(self, sql: str, params: tuple, data: Dict[str, Any]) -> None:
-        """缓存查询结果"""
+        """缓存查询结果，并记录 SQL 依赖的表"""
         key = self._generate_key(sql, params)
-        self._cache[key] = {
-            'data': data,
-            'expires_at': datetime.now() + timedelta(seconds=self._ttl_seconds)
-        }
-        print(f"Cached query result for: {sql[:100]}...")
-    
+        try:
+            tables = extract_tables(sql)
+        except Exception as e:
+            print(f"Failed to parse tables from SQL: {e}")
+            tables = []
+        if self._engine.set(key, data, ttl_seconds=self._ttl_for_tables(tables), meta={'tables': tables}):
+            if not self._shared:
+                with self._index_lock:
+                    for table in tables:
+                        self._table_index.setdefault(table, set()).add(key)
+            print(f"Cached query result for: {sql[:100]}... (tables: {', '.join(tables) or '-'})")
+        else:
+            print(f"Query result too large to cache: {sql[:100]}...")
+
+    def invalidate_table(self, table: str) -> int:
+        """删除所有读取了指定表的缓存结果，返回删除的数量"""
+        table = table.lower()
+        if self._shared:
+            # 索引中已过期的键删除时未命中，随表索引一起丢弃
+            keys = self._engine.pop_table(table)
+        else:
+            with self._index_lock:
+                keys = self._table_index.pop(table, set())
+        removed = sum(1 for key in keys if self._engine.delete(key))
+        if removed:
+            print(f"Invalidated {removed} cached results for table: {table}")
+        return removed
+
+    def get_tracked_tables(self) -> List[str]:
+        """返回当前缓存结果依赖的所有表"""
+        if self._shared:
+            return self._engine.tracked_tables()
+        with self._index_lock:
+            return sorted(self._table_index)
+
     def clear(self) -> None:
         """清空缓存"""
-        self._cache.clear()
+        self._engine.clear()
+        with self._index_lock:
+            self._table_index.clear()
         print("Cache cleared")
-    
+
     def remove_expired(self) -> None:
-        """删除所有过期的缓存"""
-        now = datetime.now()
-        expired_keys = [
-            key for key, value in self._cache.items()
-            if now >= value['expires_at']
-        ]
-        for key in expired_keys:
-            del self._cache[key]
-        if expired_keys:
-            print(f"Removed {len(expired_keys)} expired cache entries") 
\ No newline at end of file
+        """删除所有过期的缓存，并从依赖索引中移除已不存在的条目"""
+        removed = self._engine.sweep()
+        if removed:
+            print(f"Removed {removed} expired cache entries")
+        if self._shared:
+            pruned = self._engine.prune_tables()
+            if pruned:
+                print(f"Pruned {pruned} expired keys from the table index")
+        else:
+            live = {key for key, _, _, _ in self._engine.items()}
+            with self._index_lock:
+                for table in list(self._table_index):
+                    self._table_index[table] &= live
+                    if not self._table_index[table]:
+                        del self._table_index[table]
+
+    def get_stats(self, detailed: bool = True) -> Dict[str, Any]:
+        """获取缓存统计信息（条目数、字节数以及命中/未命中/淘汰计数），detailed 为 False 时不统计共享后端的条目和表索引"""
+        stats = self._engine.get_stats(detailed)
+        if self._shared and detailed:
+            stats['tables'] = self._engine.table_sizes()
+        elif not self._shared:
+            with self._index_lock:
+                stats['tables'] = {table: len(keys) for table, keys in self._table_index.items()}
+        stats['table_ttls'] = self.table_ttls
+        return stats
@@ -0,0 +1,297 @@
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .command_cache import CommandCache
+
+try:
+    import hnswlib  # 随 chromadb 一起安装（chroma-hnswlib）
+except ImportError:
+    hnswlib = None
+
+# 问题中的数字、中文数字和相对时间词，两个问题只有这些完全一致时才允许语义命中
+# 例如 "2023年销售额" 和 "2024年销售额"、"本月销售额" 和 "上个月销售额" 向量非常接近，但 SQL 不同
+_NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?|[零一二两三四五六七八九十百千万]+')
+_RELATIVE_TIME_PATTERN = re.compile(r'([今昨明前后去本上下这])\s*个?\s*(年|月|周|星期|礼拜|天|日|季度)')
+
+
+# 只起语气或礼貌作用的词，比较问题内容时去掉；"各"、"每个"、"多少"、"哪些" 等会改变 SQL 的词不在其中
+_STOPWORDS = ('帮我', '帮忙', '麻烦', '给我', '查询', '查一下', '查下', '看看', '看一下', '显示', '列出', '一下',
+              '请', '的', '了', '吗', '呢', '吧', '啊', '呀')
+_STOPWORD_PATTERN = re.compile('|'.join(sorted(_STOPWORDS, key=len, reverse=True)))
+# 方向、比较和状态词：向量相近但 SQL 相反（最高/最低、大于/小于、停用/正常、已/未）
+_POLARITY_PATTERN = re.compile(
+    r'最高|最低|最多|最少|最大|最小|最早|最晚|最新|最旧|最近|升序|降序|正序|倒序|大于|小于|高于|低于|等于|超过|不足|'
+    r'以上|以下|之前|之后|增加|减少|增长|下降|上升|停用|启用|禁用|正常|删除|通过|退回|驳回|拒绝|没有|已|未|不|非|前|后'
+)
+_IDENTIFIER_PATTERN = re.compile(r'[a-z_][a-z0-9_]*')
+_CJK_RUN_PATTERN = re.compile(r'[\u4e00-\u9fff]+')
+
+
+def _constraint_tokens(question: str) -> Tuple[str, ...]:
+    relative = [
+        ('本' if prefix == '这' else prefix) + ('周' if unit in ('星期', '礼拜') else unit)
+        for prefix, unit in _RELATIVE_TIME_PATTERN.findall(question)
+    ]
+    # 相对时间词里的字（如 "上个月" 中的 "上"）和语气词里的字（如 "一下" 中的 "一"）不再当作数字处理
+    remaining = _STOPWORD_PATTERN.sub('', _RELATIVE_TIME_PATTERN.sub(' ', question))
+    return tuple(sorted(_NUMBER_PATTERN.findall(remaining) + relative))
+
+
+def _polarity_tokens(question: str) -> Tuple[str, ...]:
+    return tuple(sorted(_POLARITY_PATTERN.findall(_RELATIVE_TIME_PATTERN.sub(' ', question))))
+
+
+def _content_tokens(question: str) -> frozenset:
+    """
+    问题的内容词：去掉数字、相对时间词和语气词后的英文标识符和中文字二元组（单字时为单字）
+
+    实体、筛选值不同的问题（研发部/市场部）内容词不同，只有措辞上的差别（"的"、"请"、标点）时相同
+    """
+    text = _RELATIVE_TIME_PATTERN.sub(' ', question.lower())
+    text = _NUMBER_PATTERN.sub(' ', _STOPWORD_PATTERN.sub('', text))
+    tokens = set(_IDENTIFIER_PATTERN.findall(text))
+    for run in _CJK_RUN_PATTERN.findall(text):
+        tokens.update([run] if len(run) == 1 else (run[i:i + 2] for i in range(len(run) - 1)))
+    return frozenset(tokens)
+
+
+def _match_guard(question: str) -> tuple:
+    """语义命中时两个问题必须一致的部分：数字和时间词、方向和比较词、内容词"""
+    return _constraint_tokens(question), _polarity_tokens(question), _content_tokens(question)
+
+
+def _normalize(vector: Sequence[float]) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class _HnswIndex:
+    """hnswlib 近似最近邻索引（余弦距离）"""
+
+    backend = 'hnswlib'
+
+    def __init__(self, dim: int, max_elements: int, ef_construction: int = 200, m: int = 16, ef_search: int = 32):
+        self._index = hnswlib.Index(space='cosine', dim=dim)
+        self._index.init_index(max_elements=max_elements, ef_construction=ef_construction, M=m,
+                               allow_replace_deleted=True)
+        self._index.set_ef(ef_search)
+        self._count = 0
+
+    def add(self, label: int, vector: np.ndarray) -> None:
+        self._index.add_items(vector.reshape(1, -1), [label], replace_deleted=True)
+        self._count += 1
+
+    def remove(self, label: int) -> None:
+        self._index.mark_deleted(label)
+        self._count -= 1
+
+    def search(self, vector: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        k = min(k, self._count)
+        if k <= 0:
+            return []
+        labels, distances = self._index.knn_query(vector.reshape(1, -1), k=k)
+        return [(int(label), 1.0 - float(distance)) for label, distance in zip(labels[0], distances[0])]
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class _NumpyIndex:
+    """未安装 hnswlib 时的暴力检索：归一化向量矩阵上做一次矩阵乘法"""
+
+    backend = 'numpy'
+
+    def __init__(self, dim: int, max_elements: int, **kwargs):
+        self._vectors = np.zeros((max_elements, dim), dtype=np.float32)
+        self._active = np.zeros(max_elements, dtype=bool)
+        self._slot_labels = np.full(max_elements, -1, dtype=np.int64)
+        self._slots: Dict[int, int] = {}
+        self._free_slots = list(range(max_elements - 1, -1, -1))
+
+    def add(self, label: int, vector: np.ndarray) -> None:
+        slot = self._free_slots.pop()
+        self._vectors[slot] = vector
+        self._active[slot] = True
+        self._slot_labels[slot] = label
+        self._slots[label] = slot
+
+    def remove(self, label: int) -> None:
+        slot = self._slots.pop(label)
+        self._active[slot] = False
+        self._free_slots.append(slot)
+
+    def search(self, vector: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        k = min(k, len(self._slots))
+        if k <= 0:
+            return []
+        scores = self._vectors @ vector
+        scores[~self._active] = -np.inf
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self._slot_labels[slot]), float(scores[slot])) for slot in top]
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+
+class SemanticCommandCache:
+    """
+    语义命令缓存：在 CommandCache 之上按问题向量相似度复用已生成的 SQL
+
+    - 精确匹配（规范化文本）仍是快速路径，命中时不计算向量
+    - 精确未命中时计算问题向量，在 ANN 索引中查找最相近的已缓存问题，
+      余弦相似度不低于 threshold，且数字/时间词、方向/比较词和内容词（去掉语气词后的标识符和
+      中文二元组）都一致时复用其 SQL；向量相近但实体或筛选条件不同的问题不会命中
+    - SQL 本身仍保存在 CommandCache 中（同样受 TTL 和 LRU 限制，可使用 Redis 后端），
+      索引只保存问题向量；对应的 SQL 过期后索引条目在查找时惰性删除
+    - 接口与 CommandCache 相同，可直接替换
+
+    Args:
+        command_cache: 保存 SQL 的精确缓存
+        embed: 文本列表 -> 向量列表，通常是向量库的 embedding_function（自带向量缓存）
+        threshold: 余弦相似度阈值
+        max_elements: 索引容量，写满后先清理过期问题，再淘汰最早加入的问题
+    """
+
+    def __init__(self, command_cache: CommandCache, embed: Callable[[List[str]], List[Sequence[float]]],
+                 threshold: float = 0.92, max_elements: int = 50000, candidates: int = 3):
+        self.command_cache = command_cache
+        self.embed = embed
+        self.threshold = threshold
+        self.max_elements = max_elements
+        self.candidates = candidates
+        self._index = None
+        self._labels: Dict[int, str] = {}  # 索引标签 -> 原始问题
+        self._keys: Dict[str, int] = {}  # 规范化问题 -> 索引标签
+        self._next_label = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'exact_hits': 0,
+            'semantic_hits': 0,
+            'misses': 0,
+            'constraint_rejections': 0,  # 相似度达标但数字/时间词、方向/比较词或内容词不一致
+            'stale_entries': 0,  # SQL 已过期，索引条目被删除
+            'evictions': 0,  # 索引写满时淘汰的问题
+            'lookup_time_total': 0.0,
+            'lookups': 0,
+        }
+
+    def _embed(self, command: str) -> np.ndarray:
+        return _normalize(self.embed([command])[0])
+
+    def _create_index(self, dim: int):
+        index_class = _HnswIndex if hnswlib is not None else _NumpyIndex
+        return index_class(dim, self.max_elements)
+
+    def _remove_label(self, label: int) -> None:
+        command = self._labels.pop(label, None)
+        if command is None:
+            return
+        self._keys.pop(self.command_cache._generate_key(command), None)
+        self._index.remove(label)
+
+    def _make_room(self) -> None:
+        """索引写满时先删除 SQL 已不在缓存中的问题，仍不够时淘汰最早加入的 10%"""
+        for label, command in list(self._labels.items()):
+            if self.command_cache.peek(command) is None:
+                self._remove_label(label)
+                self._stats['stale_entries'] += 1
+        if len(self._labels) >= self.max_elements:
+            # 标签按加入顺序递增，字典保持插入顺序
+            oldest = list(self._labels)[:max(1, self.max_elements // 10)]
+            for label in oldest:
+                self._remove_label(label)
+            self._stats['evictions'] += len(oldest)
+
+    def _add(self, command: str, vector: np.ndarray) -> None:
+        if self._index is None:
+            self._index = self._create_index(len(vector))
+        elif len(self._labels) >= self.max_elements:
+            self._make_room()
+        # 标签只增不减；hnswlib 会复用已删除条目的空间
+        label = self._next_label
+        self._next_label += 1
+        self._index.add(label, vector)
+        self._labels[label] = command
+        self._keys[self.command_cache._generate_key(command)] = label
+
+    def get(self, command: str) -> Optional[str]:
+        """获取缓存的 SQL：先精确匹配，再按语义相似度查找"""
+        sql = self.command_cache.get(command)
+        if sql is not None:
+            with self._lock:
+                self._stats['exact_hits'] += 1
+            return sql
+
+        with self._lock:
+            if self._index is None or len(self._index) == 0:
+                self._stats['misses'] += 1
+                return None
+
+        vector = self._embed(command)
+        guard = _match_guard(command)
+        with self._lock:
+            started = time.perf_counter()
+            matches = self._index.search(vector, self.candidates)
+            self._stats['lookup_time_total'] += time.perf_counter() - started
+            self._stats['lookups'] += 1
+            for label, similarity in matches:
+                if similarity < self.threshold:
+                    break
+                cached_command = self._labels.get(label)
+                if cached_command is None:
+                    continue
+                if _match_guard(cached_command) != guard:
+                    self._stats['constraint_rejections'] += 1
+                    continue
+                sql = self.command_cache.peek(cached_command)
+                if sql is None:
+                    self._stats['stale_entries'] += 1
+                    self._remove_label(label)
+                    continue
+                self._stats['semantic_hits'] += 1
+                print(f"Semantic command cache hit ({similarity:.3f}): {command} -> {cached_command}")
+                return sql
+
+            self._stats['misses'] += 1
+        return None
+
+    def set(self, command: str, sql: str) -> None:
+        """缓存命令对应的 SQL，并把问题向量加入索引"""
+        self.command_cache.set(command, sql)
+        vector = self._embed(command)
+        with self._lock:
+            if self.command_cache._generate_key(command) in self._keys:
+                return
+            self._add(command, vector)
+
+    def clear(self) -> None:
+        """清空缓存和索引"""
+        self.command_cache.clear()
+        with self._lock:
+            self._index = None
+            self._labels, self._keys = {}, {}
+
+    def remove_expired(self) -> None:
+        """删除过期缓存（索引条目在查找时惰性删除）"""
+        self.command_cache.remove_expired()
+
+    def get_stats(self, detailed: bool = True) -> Dict[str, Any]:
+        """获取缓存统计信息，包含精确缓存和语义索引两部分"""
+        stats = self.command_cache.get_stats(detailed)
+        with self._lock:
+            lookups = self._stats['lookups']
+            stats['semantic'] = {
+                'index_backend': self._index.backend if self._index is not None else None,
+                'indexed_questions': len(self._labels),
+                'max_elements': self.max_elements,
+                'threshold': self.threshold,
+                'avg_lookup_ms': self._stats['lookup_time_total'] / lookups * 1000 if lookups else 0.0,
+                **{key: value for key, value in self._stats.items() if key != 'lookup_time_total'},
+            }
+        return stats
@@ -0,0 +1,59 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+class SingleFlight:
+    """
+    单飞（single-flight）请求合并：相同 key 的并发调用共享同一个进行中的任务
+
+    缓存只有在第一个请求完成后才会写入，仪表盘同时发出的相同问题会全部未命中缓存；
+    通过 do() 调用后，只有第一个调用真正执行，其余调用等待同一个结果（或同一个异常）。
+
+    - key 为元组，第一个元素是调用类型（如 'sql'、'query'、'answer'），用于分类统计
+    - 任务独立于调用方运行，某个调用方被取消（如 WebSocket 断开）不会影响其他等待者
+    - 任务完成后立即移除，之后的调用由缓存负责复用
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        # 统计在事件循环中更新，/metrics 在线程中读取，新增类型时需要加锁
+        self._stats_lock = threading.Lock()
+
+    def _count(self, kind: str, *events: str) -> None:
+        with self._stats_lock:
+            stats = self._stats.setdefault(kind, {'calls': 0, 'executions': 0, 'collapsed': 0})
+            for event in events:
+                stats[event] += 1
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # 所有等待者都已取消时，避免 "exception was never retrieved" 警告
+            task.exception()
+
+    async def do(self, key: Tuple[Hashable, ...], fn: Callable[[], Awaitable[T]]) -> T:
+        """执行 fn，或等待相同 key 正在执行的调用的结果"""
+        task = self._calls.get(key)
+        if task is not None:
+            self._count(key[0], 'calls', 'collapsed')
+        else:
+            self._count(key[0], 'calls', 'executions')
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+
+        return await asyncio.shield(task)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取合并统计：各类型的调用次数、实际执行次数和被合并的次数"""
+        with self._stats_lock:
+            kinds = {kind: dict(stats) for kind, stats in self._stats.items()}
+        return {
+            'in_flight': len(self._calls),
+            **kinds,
+        }
@@ -0,0 +1,87 @@
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .query_cache import QueryCache
+
+
+class TableChangeMonitor:
+    """
+    表变化监测：定期探测查询缓存所依赖的表，发现变化后按表失效缓存结果
+
+    探测函数接收表名列表，返回 {表名: 版本签名}，签名变化即认为表已被修改。
+    MySQL 下通常取 information_schema.TABLES 的 UPDATE_TIME / TABLE_ROWS / DATA_LENGTH，
+    代价很低，不需要扫描表数据。
+
+    启动时立即探测一次作为基线；之后第一次出现的表没有基线，无法判断它在结果缓存之后是否被修改过，
+    按已变化处理，失效它的缓存结果（最多损失一个探测间隔的缓存）。表的缓存结果全部过期后签名仍然保留，
+    再次出现时与之比较即可。
+
+    Args:
+        query_cache: 要失效的查询缓存
+        probe: 表名列表 -> {表名: 签名}
+        interval_seconds: 探测间隔
+    """
+
+    def __init__(self, query_cache: QueryCache, probe: Callable[[List[str]], Dict[str, Tuple[Any, ...]]],
+                 interval_seconds: float = 30):
+        self.query_cache = query_cache
+        self.probe = probe
+        self.interval_seconds = interval_seconds
+        self._versions: Dict[str, Optional[Tuple[Any, ...]]] = {}
+        self._baseline_taken = False
+        self._tracked_tables = 0
+        self._stats = {
+            'probes': 0,
+            'probe_errors': 0,
+            'changed_tables': 0,
+            'invalidated_entries': 0,
+        }
+
+    def check(self) -> List[str]:
+        """
+        执行一次探测，返回发生变化的表
+
+        第一次探测只记录签名；之后签名变化或没有基线的表都会失效缓存
+        """
+        tables = self.query_cache.get_tracked_tables()
+        baseline_taken, self._baseline_taken = self._baseline_taken, True
+        self._tracked_tables = len(tables)
+        if not tables:
+            return []
+
+        versions = self.probe(tables)
+        self._stats['probes'] += 1
+
+        if baseline_taken:
+            changed = [
+                table for table in tables
+                if table not in self._versions or self._versions[table] != versions.get(table)
+            ]
+        else:
+            changed = []
+        self._versions.update((table, versions.get(table)) for table in tables)
+
+        for table in changed:
+            self._stats['invalidated_entries'] += self.query_cache.invalidate_table(table)
+        self._stats['changed_tables'] += len(changed)
+        return changed
+
+    async def run(self) -> None:
+        """后台探测任务，由应用启动钩子创建，关闭时取消；启动时先记录基线"""
+        while True:
+            try:
+                changed = await asyncio.to_thread(self.check)
+                if changed:
+                    print(f"Tables changed: {', '.join(changed)}")
+            except Exception as e:
+                self._stats['probe_errors'] += 1
+                print(f"Table change probe error: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取探测统计信息"""
+        return {
+            'interval_seconds': self.interval_seconds,
+            'tracked_tables': self._tracked_tables,
+            **self._stats,
+        }
@@ -1,22 +1,75 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, AsyncIterator
 import os
+from contextlib import aclosing
 from datetime import datetime
 from .vanna_service import VannaService
 from .weather_service import WeatherService
+from ..vanna.tracing import traced
 
 class ChatManager:
     def __init__(self):
+        # 缓存后端配置（memory / redis）
+        cache_backend = {
+            'backend': os.getenv('CACHE_BACKEND', 'memory'),
+            'redis_url': os.getenv('REDIS_URL'),
+            'key_prefix': os.getenv('CACHE_KEY_PREFIX', 'smartdb')
+        }
         # 初始化服务
         self.vanna_service = VannaService({
             'api_key': os.getenv('OPENAI_API_KEY'),
             'model': os.getenv('OPENAI_MODEL'),
             'base_url': os.getenv('OPENAI_BASE_URL'),
+            # 提示词预算使用的 tiktoken 编码（未安装 tiktoken 时按中英文字符估算）
+            'tokenizer': os.getenv('TOKENIZER_ENCODING', 'cl100k_base'),
+            # classic：检索内容在系统提示词中间；prefix_cache：固定内容在前、检索内容在后，便于 LLM 服务商复用提示词前缀缓存
+            'prompt_layout': os.getenv('PROMPT_LAYOUT', 'classic'),
+            # prefix_cache 布局下固定放在提示词前缀中的核心表 DDL
+            'pinned_ddl': [ddl for ddl in os.getenv('PINNED_DDL', '').split(';;') if ddl.strip()],
+            # 流式请求时要求服务商在最后一个分块返回 token 用量（部分兼容服务不支持 stream_options）
+            'stream_usage': os.getenv('LLM_STREAM_USAGE', '0') == '1',
+            # 检索方式：dense（仅向量），或 hybrid（向量 + BGE-M3 词汇权重倒排索引，按 RRF 或加权融合）
+            'retrieval_mode': os.getenv('RETRIEVAL_MODE', 'dense'),
+            'hybrid_fusion': os.getenv('HYBRID_FUSION', 'rrf'),
+            # 词汇匹配得分下限，只共享一个常见字词的文档不参与融合
+            'hybrid_min_lexical_score': float(os.getenv('HYBRID_MIN_LEXICAL_SCORE', 0.05)),
+            # 每类训练数据（问题-SQL、DDL、文档）召回的条数，hybrid 召回更准时可调小以缩短提示词
+            'n_results': int(os.getenv('RETRIEVAL_N_RESULTS', 10)),
+            # 数据库类型：mysql，或 sqlite（本地文件，用于压测和离线调试）
+            'db_type': os.getenv('DB_TYPE', 'mysql'),
+            'sqlite': {
+                'path': os.getenv('SQLITE_PATH', 'smart_dashboard.sqlite')
+            },
             'mysql': {
-                'host': '11.254.2.17',
-                'database': 'soei_oa',
-                'user': 'root',
-                'password': '123456',
-                'port': 3306
+                'host': os.getenv('MYSQL_HOST', '11.254.2.17'),
+                'database': os.getenv('MYSQL_DATABASE', 'soei_oa'),
+                'user': os.getenv('MYSQL_USER', 'root'),
+                'password': os.getenv('MYSQL_PASSWORD', '123456'),
+                'port': int(os.getenv('MYSQL_PORT', 3306)),
+                # 连接池配置
+                'pool_min_size': int(os.getenv('MYSQL_POOL_MIN_SIZE', 1)),
+                'pool_max_size': int(os.getenv('MYSQL_POOL_MAX_SIZE', 10)),
+                'pool_idle_timeout': float(os.getenv('MYSQL_POOL_IDLE_TIMEOUT', 300)),
+                'query_timeout': int(os.getenv('MYSQL_QUERY_TIMEOUT', 60))
+            },
+            # 缓存容量配置（条目数上限和估算内存上限）
+            # CACHE_BACKEND=redis 时多个 worker 通过 REDIS_URL 共享缓存
+            'query_cache': {
+                'max_entries': int(os.getenv('QUERY_CACHE_MAX_ENTRIES', 1000)),
+                'max_bytes': int(os.getenv('QUERY_CACHE_MAX_MB', 128)) * 1024 * 1024,
+                'table_ttls': self._parse_table_ttls(os.getenv('QUERY_CACHE_TABLE_TTLS', '')),
+                **cache_backend
+            },
+            'command_cache': {
+                'max_entries': int(os.getenv('COMMAND_CACHE_MAX_ENTRIES', 5000)),
+                'max_bytes': int(os.getenv('COMMAND_CACHE_MAX_MB', 16)) * 1024 * 1024,
+                **cache_backend
+            },
+            # 语义命令缓存：问题向量相似度不低于阈值（且数字、时间词、方向词和内容词一致）时复用已生成的 SQL
+            # 默认关闭：误命中会让用户拿到另一个问题的 SQL 和结果
+            'semantic_cache': {
+                'enabled': os.getenv('SEMANTIC_CACHE_ENABLED', '0') == '1',
+                'threshold': float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.92)),
+                'max_elements': int(os.getenv('SEMANTIC_CACHE_MAX_ELEMENTS', 50000))
             }
         })
         self.weather_service = WeatherService()
@@ -48,6 +101,40 @@ class ChatManager:
         
         return {"intent": "unknown"}
 
+    @staticmethod
+    def _parse_table_ttls(value: str) -> Dict[str, int]:
+        """解析按表 TTL 配置，格式：表名=秒数,表名=秒数"""
+        table_ttls = {}
+        for item in value.split(','):
+            if '=' in item:
+                table, ttl = item.split('=', 1)
+                table_ttls[table.strip()] = int(ttl)
+        return table_ttls
+
+    def is_db_query(self, message: str) -> bool:
+        """判断消息是否为数据库查询命令"""
+        return self._extract_intent(message).get("intent") == "db_query"
+
+    async def stream_db_query(self, message: str, max_rows: int = None) -> AsyncIterator[Dict[str, Any]]:
+        """以流式事件的形式处理数据库查询命令"""
+        events = self.vanna_service.process_question_stream(
+            message[len('@查询统计'):].strip(),
+            max_rows=max_rows
+        )
+        async with aclosing(events):
+            async for event in events:
+                yield event
+
+    async def progressive_db_query(self, message: str) -> AsyncIterator[Dict[str, Any]]:
+        """以渐进事件（sql → results → summary → done）的形式处理数据库查询命令"""
+        events = self.vanna_service.process_question_progressive(
+            message[len('@查询统计'):].strip()
+        )
+        async with aclosing(events):
+            async for event in events:
+                yield event
+
+    @traced("process_message")
     async def process_message(self, message: str) -> Dict[str, Any]:
         """处理用户消息"""
         intent_info = self._extract_intent(message)
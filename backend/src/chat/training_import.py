@@ -0,0 +1,175 @@
+import os
+import re
+import textwrap
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import sqlparse
+from ..vanna.tracing import request_scope, span
+from ..vanna.types import TrainingItem
+
+# 随项目提供的训练数据目录（backend/training_data）
+TRAINING_DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'training_data'))
+
+
+def parse_question_sql(text: str, title: str = "", note: str = "") -> List[TrainingItem]:
+    """解析问题-SQL 文件：每组为一行问题，后面是以分号结尾的 SQL"""
+    items, question, sql_lines = [], None, []
+    for line in text.replace('\r\n', '\n').split('\n'):
+        if question is None:
+            if line.strip():
+                question = line.strip()
+            continue
+        sql_lines.append(line)
+        if line.rstrip().endswith(';'):
+            items.append(TrainingItem(TrainingItem.ITEM_TYPE_SQL, '\n'.join(sql_lines).strip(),
+                                      question=question, title=title, note=note))
+            question, sql_lines = None, []
+    return items
+
+
+def parse_ddl(text: str, title: str = "", note: str = "") -> List[TrainingItem]:
+    """解析 DDL 文件：按语句拆分，语句前的注释保留在语句中，只有注释的片段跳过"""
+    items = []
+    for statement in sqlparse.split(text.replace('\r\n', '\n')):
+        statement = statement.strip()
+        if statement and sqlparse.format(statement, strip_comments=True).strip():
+            items.append(TrainingItem(TrainingItem.ITEM_TYPE_DDL, statement, title=title, note=note))
+    return items
+
+
+def parse_documentation(text: str, title: str = "", note: str = "") -> List[TrainingItem]:
+    """解析文档文件：以空行分隔的每一段为一条文档"""
+    chunks = re.split(r'\n\s*\n', text.replace('\r\n', '\n'))
+    return [
+        TrainingItem(TrainingItem.ITEM_TYPE_DOCUMENTATION, textwrap.dedent(chunk).strip(), title=title, note=note)
+        for chunk in chunks if chunk.strip()
+    ]
+
+
+PARSERS = {
+    TrainingItem.ITEM_TYPE_SQL: parse_question_sql,
+    TrainingItem.ITEM_TYPE_DDL: parse_ddl,
+    TrainingItem.ITEM_TYPE_DOCUMENTATION: parse_documentation,
+}
+
+
+def parse_training_file(data_type: str, text: str, title: str = "", note: str = "") -> List[TrainingItem]:
+    """按数据类型（sql/ddl/documentation）解析训练数据文件"""
+    if data_type not in PARSERS:
+        raise ValueError(f"不支持的数据类型: {data_type}")
+    return PARSERS[data_type](text, title=title, note=note)
+
+
+def load_training_data_dir(directory: str = TRAINING_DATA_DIR) -> List[TrainingItem]:
+    """
+    读取训练数据目录下的所有 .txt 文件，文件名决定类型：
+    ddl.txt 为 DDL，sql.txt 为问题-SQL，其余为文档；文件名作为标题
+    """
+    items = []
+    for name in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(name)
+        if ext != '.txt':
+            continue
+        data_type = stem if stem in (TrainingItem.ITEM_TYPE_SQL, TrainingItem.ITEM_TYPE_DDL) \
+            else TrainingItem.ITEM_TYPE_DOCUMENTATION
+        with open(os.path.join(directory, name), encoding='utf-8') as f:
+            items.extend(parse_training_file(data_type, f.read(), title=name))
+    return items
+
+
+class TrainingImportJobs:
+    """
+    训练数据批量导入的后台任务
+
+    - 任务在单独的工作线程中依次执行（嵌入模型已按批计算，多个导入同时运行只会互相争抢），
+      不占用问答使用的线程池
+    - 训练数据按批嵌入、每批每个集合写入一次，每批完成后更新进度
+    - 只保留最近 max_jobs 个任务的状态
+    """
+
+    def __init__(self, vanna_service, max_jobs: int = 20):
+        self.vanna_service = vanna_service
+        self.max_jobs = max_jobs
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="training-import")
+
+    def start(self, items: List[TrainingItem], include_schema: bool = False) -> Dict[str, Any]:
+        """
+        提交导入任务，立即返回任务状态
+        Args:
+            items: 要导入的训练数据
+            include_schema: 是否同时导入当前数据库 information_schema 中的表结构（在任务中读取）
+        """
+        job = {
+            "id": uuid.uuid4().hex[:16],
+            "status": "pending",
+            "total": len(items),
+            "processed": 0,
+            "counts": self._count_types(items),
+            "include_schema": include_schema,
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "elapsed_seconds": None,
+            "error": None,
+        }
+        self.jobs[job["id"]] = job
+        while len(self.jobs) > self.max_jobs:
+            oldest_id, oldest = next(iter(self.jobs.items()))
+            if oldest["status"] in ("pending", "running"):
+                break
+            del self.jobs[oldest_id]
+
+        self._executor.submit(self._run, job, items)
+        return dict(job)
+
+    @staticmethod
+    def _count_types(items: List[TrainingItem]) -> Dict[str, int]:
+        counts = {}
+        for item in items:
+            counts[item.item_type] = counts.get(item.item_type, 0) + 1
+        return counts
+
+    def _run(self, job: Dict[str, Any], items: List[TrainingItem]):
+        job["status"] = "running"
+        job["started_at"] = datetime.now().isoformat()
+        started = time.perf_counter()
+
+        def progress(done: int, total: int):
+            job["processed"] = done
+
+        status = "failed"
+        try:
+            with request_scope(job["id"]), span("training.import") as current:
+                if job["include_schema"]:
+                    items = items + self.vanna_service.get_schema_training_items()
+                    job["total"] = len(items)
+                    job["counts"] = self._count_types(items)
+                current.set_attribute("items", len(items))
+                self.vanna_service.add_training_batch(items, progress=progress)
+            status = "completed"
+            print(f"训练数据导入完成: {job['id']}，共 {job['total']} 条，耗时 {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            job["error"] = str(e)
+            print(f"训练数据导入失败: {job['id']}: {e}")
+        finally:
+            # 先写结束时间再更新状态，查询到 completed / failed 时其余字段已就绪
+            job["finished_at"] = datetime.now().isoformat()
+            job["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+            job["status"] = status
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """最近的任务，最新的在前"""
+        return [dict(job) for job in reversed(list(self.jobs.values()))]
+
+    def shutdown(self):
+        """停止接收任务，取消尚未开始的任务（正在执行的任务会继续完成）"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
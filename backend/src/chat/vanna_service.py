@@ -1,15 +1,21 @@
 import os
+import time
 import hashlib
 import pandas as pd
-from typing import Dict, Any, List
+from contextlib import aclosing
+from typing import Dict, Any, List, AsyncIterator
 from ..cache.query_cache import QueryCache
 from ..cache.command_cache import CommandCache
+from ..cache.semantic_cache import SemanticCommandCache
+from ..cache.table_monitor import TableChangeMonitor
+from ..cache.single_flight import SingleFlight
 # from vanna.openai.openai_chat import OpenAI_Chat
 # from vanna.chromadb.chromadb_vector import ChromaDB_VectorStore
 from ..vanna.openai.openai_chat import OpenAI_Chat
 from ..vanna.chromadb.chromadb_vector import ChromaDB_VectorStore
-from datetime import datetime
-from decimal import Decimal
+from ..vanna.tracing import current_span, span, traced
+from ..vanna.types import TrainingItem
+from .result_formatter import format_results
 
 class VannaService(ChromaDB_VectorStore, OpenAI_Chat):
     """
@@ -34,44 +40,151 @@ class VannaService(ChromaDB_VectorStore, OpenAI_Chat):
         if missing_config:
             raise ValueError(f"缺少必需的配置项: {', '.join(missing_config)}")
         
+        # SQL 线程池与连接池大小保持一致，避免线程在等待连接时空转
+        mysql_config = config.get('mysql', {})
+        pool_max_size = mysql_config.get('pool_max_size', 10)
+        config.setdefault('sql_executor_max_workers', pool_max_size)
+
         # 初始化父类
         ChromaDB_VectorStore.__init__(self, config=config)
         OpenAI_Chat.__init__(self, config=config)
-        # 连接 MySQL 数据库
-        mysql_config = config.get('mysql', {})
+        if config.get('db_type') == 'sqlite':
+            # 本地 SQLite 数据库（每个 SQL 线程一个连接）
+            self.connect_to_sqlite(config['sqlite']['path'])
+        else:
+            # 连接 MySQL 数据库（使用连接池，支持并发查询）
+            self._connect_mysql(mysql_config, pool_max_size)
+        self._init_pipeline(config)
+
+    def _connect_mysql(self, mysql_config: Dict[str, Any], pool_max_size: int):
+        """按配置连接 MySQL，查询通过连接池执行"""
         self.connect_to_mysql(
             host=mysql_config.get('host'),
             dbname=mysql_config.get('database'),
             user=mysql_config.get('user'),
             password=mysql_config.get('password'),
-            port=mysql_config.get('port', 3306)
+            port=mysql_config.get('port', 3306),
+            pool_min_size=mysql_config.get('pool_min_size', 1),
+            pool_max_size=pool_max_size,
+            pool_idle_timeout=mysql_config.get('pool_idle_timeout', 300),
+            pool_checkout_timeout=mysql_config.get('pool_checkout_timeout', 30),
+            query_timeout=mysql_config.get('query_timeout', 60)
         )
+
+    def _init_pipeline(self, config: Dict[str, Any]):
+        """
+        初始化缓存、请求合并和流式查询配置
+
+        与向量存储、LLM 和数据库连接无关，基准测试用 mock 后端构造服务时也调用该方法
+        """
         # 设置缓存
-        self.query_cache = QueryCache()  # 用于缓存SQL查询结果
-        self.command_cache = CommandCache()  # 用于缓存自然语言到SQL的转换
+        self.query_cache = QueryCache(**config.get('query_cache', {}))  # 用于缓存SQL查询结果
+        self.command_cache = CommandCache(**config.get('command_cache', {}))  # 用于缓存自然语言到SQL的转换
+        self.table_monitor = None
+        # 相同问题 / 相同 SQL 的并发请求合并为一次 LLM 调用和一次数据库查询
+        self.single_flight = SingleFlight()
+        semantic_config = config.get('semantic_cache', {})
+        if semantic_config.get('enabled', False):
+            # 语义命令缓存：相似问题（如“本月销售额”和“这个月的销售额”）复用同一条 SQL
+            self.command_cache = SemanticCommandCache(
+                self.command_cache,
+                self.embedding_function,
+                threshold=semantic_config.get('threshold', 0.92),
+                max_elements=semantic_config.get('max_elements', 50000)
+            )
+        # 流式查询配置
+        self.stream_max_rows = config.get('stream_max_rows', 10000)  # 单次流式查询最多返回的行数
+        self.stream_batch_size = config.get('stream_batch_size', 500)  # 每个 rows 事件的行数
+        self.stream_summary_rows = config.get('stream_summary_rows', 200)  # 用于生成结果解释的行数
+        self.stream_cache_max_rows = config.get('stream_cache_max_rows', 5000)  # 超过该行数的流式结果不写入查询缓存
     
     def _format_results(self, results_df):
-        """格式化查询结果，处理时间戳等特殊类型"""
-        def convert_value(obj):
-            if pd.isna(obj):  # 处理 NaT 和其他空值
-                return None
-            if isinstance(obj, datetime):
-                return obj.strftime('%Y-%m-%d %H:%M:%S')
-            if isinstance(obj, Decimal):
-                return float(obj)  # 将 Decimal 转换为 float
-            return obj
-
-        # 转换 DataFrame 为字典列表
-        results = results_df.to_dict('records')
-        
-        # 处理每一行数据
-        formatted_results = []
-        for row in results:
-            formatted_row = {k: convert_value(v) for k, v in row.items()}
-            formatted_results.append(formatted_row)
-            
-        return formatted_results
+        """格式化查询结果，处理时间戳等特殊类型（按列向量化转换，查询缓存和 WebSocket 输出共用）"""
+        return format_results(results_df)
+
+    def probe_table_versions(self, tables: List[str]) -> Dict[str, tuple]:
+        """
+        读取表的版本签名（UPDATE_TIME、TABLE_ROWS、DATA_LENGTH），用于判断缓存结果是否过期
+
+        只查询 information_schema，不扫描表数据
+        """
+        placeholders = ', '.join(['%s'] * len(tables))
+        with self.sql_pool.connection() as conn:
+            with conn.cursor() as cs:
+                try:
+                    # MySQL 8 默认缓存表统计信息 24 小时，这里要求读取最新值
+                    cs.execute("SET SESSION information_schema_stats_expiry = 0")
+                except Exception:
+                    pass  # MySQL 5.7 / MariaDB 没有该变量，统计信息本身就是实时的
+                cs.execute(
+                    "SELECT TABLE_NAME, UPDATE_TIME, TABLE_ROWS, DATA_LENGTH FROM information_schema.TABLES "
+                    f"WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({placeholders})",
+                    tables
+                )
+                rows = cs.fetchall()
+        return {
+            row['TABLE_NAME'].lower(): (row['UPDATE_TIME'], row['TABLE_ROWS'], row['DATA_LENGTH'])
+            for row in rows
+        }
 
+    def create_table_monitor(self, interval_seconds: float = 30) -> TableChangeMonitor:
+        """创建查询缓存的表变化监测任务"""
+        self.table_monitor = TableChangeMonitor(self.query_cache, self.probe_table_versions, interval_seconds)
+        return self.table_monitor
+
+    def get_cache_stats(self, detailed: bool = True) -> Dict[str, Any]:
+        """
+        获取缓存、请求合并、表变化监测和 LLM token 用量（含提示词前缀缓存命中）的统计信息
+
+        detailed 为 False 时只读取计数器，不遍历缓存条目（不列出缓存的命令，Redis 后端不做 SCAN），供指标抓取使用
+        """
+        return {
+            "query_cache": self.query_cache.get_stats(detailed),
+            "command_cache": self.command_cache.get_stats(detailed),
+            "single_flight": self.single_flight.get_stats(),
+            "table_monitor": self.table_monitor.get_stats() if self.table_monitor else None,
+            "llm_usage": self.get_llm_usage_stats()
+        }
+
+    @staticmethod
+    def _question_key(question: str) -> str:
+        """请求合并使用的问题键（与命令缓存相同的规范化方式）"""
+        return ' '.join(question.lower().split())
+
+    def _template_summary(self, df: pd.DataFrame):
+        """单值结果（一行一列）直接用模板生成解释，不调用 LLM；其他结果返回 None"""
+        if df.shape != (1, 1):
+            return None
+        column = df.columns[0]
+        value = self._format_results(df)[0][column]
+        return f"查询结果：{column} 为 {value}"
+
+    async def _get_or_generate_sql(self, question: str) -> str:
+        """获取问题对应的 SQL，相同问题并发时只查一次缓存、只调用一次 LLM"""
+        return await self.single_flight.do(
+            ('sql', self._question_key(question)),
+            lambda: self._lookup_or_generate_sql(question)
+        )
+
+    async def _lookup_or_generate_sql(self, question: str) -> str:
+        """先查命令缓存，未命中时调用 LLM 生成 SQL 并写入缓存"""
+        # 语义缓存查找需要计算问题向量，放到线程池中执行
+        with span("command_cache") as cache_span:
+            cached_sql = await self._run_blocking(self.command_cache.get, question)
+            cache_span.set_attribute("hit", bool(cached_sql))
+        if cached_sql:
+            print("命令缓存命中，使用缓存的SQL")
+            return cached_sql
+
+        print("开始生成SQL...")
+        sql = await self.generate_sql_async(question)
+        print(f"SQL生成成功: {sql}")
+        if sql:
+            await self._run_blocking(self.command_cache.set, question, sql)
+            print("已缓存新的SQL命令")
+        return sql
+
+    @traced("process_question")
     async def process_question(self, question: str) -> Dict[str, Any]:
         """
         处理用户的自然语言问题
@@ -83,6 +196,11 @@ class VannaService(ChromaDB_VectorStore, OpenAI_Chat):
         4. 如果查询缓存未命中，执行SQL查询
         5. 生成结果解释
         6. 缓存查询结果
+
+        检索、LLM 调用和 SQL 执行都走异步路径（LLM 使用 AsyncOpenAI，数据库调用在
+        有界线程池中执行），并受各阶段超时限制，不会阻塞事件循环
+
+        并发的相同问题共享同一次 SQL 生成和结果解释，并发的相同 SQL 共享同一次数据库查询
         
         Args:
             question: 用户的自然语言问题
@@ -93,26 +211,15 @@ class VannaService(ChromaDB_VectorStore, OpenAI_Chat):
             - data/message: 成功时返回数据，失败时返回错误信息
         """
         try:
-            # 1. 尝试从命令缓存获取SQL 
-            cached_sql = self.command_cache.get(question)
-            if cached_sql:
-                sql = cached_sql
-                print("命令缓存命中，使用缓存的SQL")
-            else:
-                # 生成新的SQL
-                print("开始生成SQL...")
-                try:
-                    sql = self.generate_sql(question)
-                    print(f"SQL生成成功: {sql}")
-                    if sql:
-                        self.command_cache.set(question, sql)
-                        print("已缓存新的SQL命令")
-                except Exception as e:
-                    print(f"生成SQL时出错: {e}")
-                    return {
-                        "success": False,
-                        "message": f"生成SQL失败: {str(e)}"
-                    }
+            # 1. 尝试从命令缓存获取SQL，未命中则生成新的SQL
+            try:
+                sql = await self._get_or_generate_sql(question)
+            except Exception as e:
+                print(f"生成SQL时出错: {e}")
+                return {
+                    "success": False,
+                    "message": f"生成SQL失败: {str(e)}"
+                }
             
             if not sql:
                 return {
@@ -121,9 +228,27 @@ class VannaService(ChromaDB_VectorStore, OpenAI_Chat):
                 }
             
             print("生成的SQL:", sql)
-            
+
+            return await self.single_flight.do(
+                ('answer', self._question_key(question), sql),
+                lambda: self._answer_question(question, sql)
+            )
+
+        except Exception as e:
+            print(f"处理问题时出错: {e}")
+            import traceback
+            traceback.print_exc()  # 打印完整的堆栈跟踪
+            return {
+                "success": False,
+                "message": f"查询执行失败: {str(e)}"
+            }
+
+    async def _answer_question(self, question: str, sql: str) -> Dict[str, Any]:
+        """执行 SQL 并生成结果解释（process_question 的第 2-6 步）"""
+        try:
             # 2. 尝试从查询缓存获取结果
-            cached_result = self.query_cache.get(sql)
+            cached_result = await self._run_blocking(self.query_cache.get, sql)
+            current_span().set_attribute("query_cache_hit", bool(cached_result))
             if cached_result:
                 return {
                     "success": True,
@@ -133,7 +258,7 @@ class VannaService(ChromaDB_VectorStore, OpenAI_Chat):
             # 3. 使用 Vanna 的 run_sql 执行查询
             try:
                 print("开始执行SQL查询...")
-                results_df = self.run_sql(sql)
+                results_df = await self.single_flight.do(('query', sql), lambda: self.run_sql_async(sql))
                 print(f"查询成功，返回 {len(results_df)} 条记录")
             except Exception as e:
                 print(f"执行SQL查询时出错: {e}")
@@ -142,18 +267,21 @@ class VannaService(ChromaDB_VectorStore, OpenAI_Chat):
                     "message": f"SQL执行失败: {str(e)}"
                 }
 
-            # 格式化结果
-            formatted_results = self._format_results(results_df)
+            # 格式化结果（大结果集的格式化比较耗 CPU，放到线程池中执行）
+            with span("format_results", rows=len(results_df)):
+                formatted_results = await self._run_blocking(self._format_results, results_df)
             columns = results_df.columns.tolist()
             
-            # 4. 生成结果解释
+            # 4. 生成结果解释（单值结果使用模板）
             try:
-                print("开始生成结果解释...")
-                explanation = self.generate_summary(
-                    question=question,
-                    df=results_df
-                )
-                print("结果解释生成成功")
+                explanation = self._template_summary(results_df)
+                if explanation is None:
+                    print("开始生成结果解释...")
+                    explanation = await self.generate_summary_async(
+                        question=question,
+                        df=results_df
+                    )
+                    print("结果解释生成成功")
             except Exception as e:
                 print(f"生成解释时出错: {e}")
                 explanation = f"查询到 {len(results_df)} 条记录"
@@ -168,7 +296,7 @@ class VannaService(ChromaDB_VectorStore, OpenAI_Chat):
             }
             
             # 6. 缓存查询结果
-            self.query_cache.set(sql, None, response_data)
+            await self._run_blocking(self.query_cache.set, sql, None, response_data)
             
             return {
                 "success": True,
@@ -184,6 +312,287 @@ class VannaService(ChromaDB_VectorStore, OpenAI_Chat):
                 "message": f"查询执行失败: {str(e)}"
             }
 
+    async def process_question_stream(self, question: str, max_rows: int = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        以流式方式处理用户的自然语言问题
+
+        与 process_question 流程相同，但 SQL 通过服务端游标分批读取，结果以事件的形式逐步产出，
+        不会在内存中同时保留完整的结果集：
+        1. columns: 生成的 SQL 和列名
+        2. rows: 每批格式化后的行数据（offset 为该批第一行的序号）
+        3. summary: 结果解释、总行数以及是否因行数上限被截断
+        任一步骤出错时产出 error 事件并结束
+
+        Args:
+            question: 用户的自然语言问题
+            max_rows: 最多返回的行数，不超过配置的 stream_max_rows
+
+        Yields:
+            Dict，其中 event 字段为事件类型
+        """
+        row_cap = self.stream_max_rows if max_rows is None else min(int(max_rows), self.stream_max_rows)
+
+        try:
+            sql = await self._get_or_generate_sql(question)
+        except Exception as e:
+            print(f"生成SQL时出错: {e}")
+            yield {"event": "error", "message": f"生成SQL失败: {str(e)}"}
+            return
+
+        if not sql:
+            yield {"event": "error", "message": "无法生成有效的SQL查询"}
+            return
+
+        # 查询缓存命中时直接分块回放缓存的结果
+        cached_result = await self._run_blocking(self.query_cache.get, sql)
+        if cached_result:
+            results = cached_result["results"][:row_cap]
+            yield {"event": "columns", "sql": sql, "columns": cached_result["columns"]}
+            for offset in range(0, len(results), self.stream_batch_size):
+                yield {"event": "rows", "offset": offset, "rows": results[offset:offset + self.stream_batch_size]}
+            yield {
+                "event": "summary",
+                "message": cached_result["message"],
+                "type": cached_result["type"],
+                "row_count": len(results),
+                "truncated": len(cached_result["results"]) > row_cap
+            }
+            return
+
+        columns = None
+        row_count = 0
+        truncated = False
+        summary_frames = []  # 保留前 stream_summary_rows 行原始数据用于生成解释
+        summary_rows = 0
+        cache_rows = []  # 结果不超过 stream_cache_max_rows 时写入查询缓存，超过后置为 None
+
+        try:
+            print("开始流式执行SQL查询...")
+            async with aclosing(self.run_sql_stream_async(sql, batch_size=self.stream_batch_size)) as batches:
+                async for batch in batches:
+                    if columns is None:
+                        columns = batch.columns.tolist()
+                        yield {"event": "columns", "sql": sql, "columns": columns}
+
+                    if row_count + len(batch) > row_cap:
+                        batch = batch.iloc[:row_cap - row_count]
+                        truncated = True
+
+                    if len(batch) > 0:
+                        rows = await self._run_blocking(self._format_results, batch)
+                        yield {"event": "rows", "offset": row_count, "rows": rows}
+                        row_count += len(rows)
+
+                        if summary_rows < self.stream_summary_rows:
+                            summary_frames.append(batch.head(self.stream_summary_rows - summary_rows))
+                            summary_rows += len(summary_frames[-1])
+
+                        if cache_rows is not None:
+                            if row_count <= self.stream_cache_max_rows:
+                                cache_rows.extend(rows)
+                            else:
+                                cache_rows = None
+
+                    if truncated:
+                        break
+            print(f"流式查询完成，返回 {row_count} 条记录{'（已截断）' if truncated else ''}")
+        except Exception as e:
+            print(f"执行SQL查询时出错: {e}")
+            yield {"event": "error", "message": f"SQL执行失败: {str(e)}"}
+            return
+
+        try:
+            summary_df = pd.concat(summary_frames) if summary_frames else pd.DataFrame(columns=columns)
+            explanation = self._template_summary(summary_df) if row_count == 1 else None
+            if explanation is None:
+                explanation = await self.generate_summary_async(question=question, df=summary_df)
+        except Exception as e:
+            print(f"生成解释时出错: {e}")
+            explanation = f"查询到 {row_count} 条记录"
+
+        result_type = "single" if (len(columns) == 1 and row_count == 1) else "table"
+        yield {
+            "event": "summary",
+            "message": explanation,
+            "type": result_type,
+            "row_count": row_count,
+            "truncated": truncated
+        }
+
+        if cache_rows is not None and not truncated:
+            await self._run_blocking(self.query_cache.set, sql, None, {
+                "message": explanation,
+                "sql": sql,
+                "results": cache_rows,
+                "type": result_type,
+                "columns": columns
+            })
+
+    async def process_question_progressive(self, question: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        以渐进方式处理用户的自然语言问题，数据准备好后立即发送，不等待结果解释
+
+        事件顺序：
+        1. sql: SQL 生成后立即发送
+        2. results: 查询完成后发送完整结果（time_to_first_data_ms 为从收到问题到结果可用的耗时）
+        3. summary: 结果解释的增量文本（delta），LLM 边生成边发送；单值结果使用模板，只有一帧
+        4. done: 完整的解释文本以及 time_to_first_data_ms、total_ms
+        出错时发送 error 并结束
+
+        Yields:
+            Dict，其中 event 字段为事件类型
+        """
+        started = time.perf_counter()
+
+        def elapsed_ms() -> int:
+            return int((time.perf_counter() - started) * 1000)
+
+        try:
+            sql = await self._get_or_generate_sql(question)
+        except Exception as e:
+            print(f"生成SQL时出错: {e}")
+            yield {"event": "error", "message": f"生成SQL失败: {str(e)}"}
+            return
+
+        if not sql:
+            yield {"event": "error", "message": "无法生成有效的SQL查询"}
+            return
+
+        yield {"event": "sql", "sql": sql, "elapsed_ms": elapsed_ms()}
+
+        # 查询缓存命中时结果和解释都已就绪
+        cached_result = await self._run_blocking(self.query_cache.get, sql)
+        if cached_result:
+            time_to_first_data_ms = elapsed_ms()
+            yield {
+                "event": "results",
+                "results": cached_result["results"],
+                "columns": cached_result["columns"],
+                "type": cached_result["type"],
+                "cached": True,
+                "time_to_first_data_ms": time_to_first_data_ms
+            }
+            yield {"event": "summary", "delta": cached_result["message"]}
+            yield {
+                "event": "done",
+                "message": cached_result["message"],
+                "time_to_first_data_ms": time_to_first_data_ms,
+                "total_ms": elapsed_ms()
+            }
+            return
+
+        try:
+            print("开始执行SQL查询...")
+            results_df = await self.single_flight.do(('query', sql), lambda: self.run_sql_async(sql))
+            print(f"查询成功，返回 {len(results_df)} 条记录")
+        except Exception as e:
+            print(f"执行SQL查询时出错: {e}")
+            yield {"event": "error", "message": f"SQL执行失败: {str(e)}"}
+            return
+
+        with span("format_results", rows=len(results_df)):
+            formatted_results = await self._run_blocking(self._format_results, results_df)
+        columns = results_df.columns.tolist()
+        result_type = "single" if (len(columns) == 1 and len(formatted_results) == 1) else "table"
+        time_to_first_data_ms = elapsed_ms()
+        yield {
+            "event": "results",
+            "results": formatted_results,
+            "columns": columns,
+            "type": result_type,
+            "cached": False,
+            "time_to_first_data_ms": time_to_first_data_ms
+        }
+
+        explanation = self._template_summary(results_df)
+        if explanation is not None:
+            yield {"event": "summary", "delta": explanation}
+        else:
+            parts = []
+            try:
+                async with aclosing(self.generate_summary_stream_async(question=question, df=results_df)) as deltas:
+                    async for delta in deltas:
+                        parts.append(delta)
+                        yield {"event": "summary", "delta": delta}
+                explanation = ''.join(parts)
+            except Exception as e:
+                print(f"生成解释时出错: {e}")
+                explanation = None
+            if not explanation:
+                # 解释生成失败或中途失败时，用固定文本替换已发送的部分
+                explanation = f"查询到 {len(results_df)} 条记录"
+                yield {"event": "summary", "delta": explanation, "replace": True}
+
+        await self._run_blocking(self.query_cache.set, sql, None, {
+            "message": explanation,
+            "sql": sql,
+            "results": formatted_results,
+            "type": result_type,
+            "columns": columns
+        })
+
+        total_ms = elapsed_ms()
+        print(f"渐进响应完成：首个数据 {time_to_first_data_ms} ms，总耗时 {total_ms} ms")
+        yield {
+            "event": "done",
+            "message": explanation,
+            "time_to_first_data_ms": time_to_first_data_ms,
+            "total_ms": total_ms
+        }
+
+    @staticmethod
+    def _training_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """将训练数据 DataFrame 转换为接口返回的字典列表，非字符串的值（None、NaN）统一为空字符串"""
+        if df.empty:
+            return []
+
+        def text_column(name: str) -> List[str]:
+            if name not in df:
+                return [""] * len(df)
+            return [value if isinstance(value, str) else "" for value in df[name]]
+
+        def metadata_column(name: str) -> List[str]:
+            # 清理掉早期写入的 Form 对象字符串（包含 "annotation=NoneType"）
+            return ["" if "annotation=NoneType" in value else value for value in text_column(name)]
+
+        records = []
+        for id, data_type, content, question, title, note in zip(
+            text_column("id"), text_column("training_data_type"), text_column("content"),
+            text_column("question"), metadata_column("title"), metadata_column("note")
+        ):
+            records.append({
+                "id": id,
+                "type": data_type,
+                "content": content,
+                "title": title,
+                "note": note,
+                # 只有问题-SQL对有问题字段，其余类型为空
+                "question": question if data_type == "sql" else ""
+            })
+        return records
+
+    def get_training_page(self, limit: int = None, offset: int = 0, data_type: str = None,
+                          title: str = None, text: str = None) -> Dict[str, Any]:
+        """
+        分页获取训练数据，只读取当前页的记录
+        Args:
+            limit: 每页条数，None 表示全部
+            offset: 跳过的条数
+            data_type: 按类型过滤 (sql/documentation/ddl)
+            title: 按标题过滤（完全匹配）
+            text: 按内容过滤（包含该文本，区分大小写）
+        Returns:
+            Dict[str, Any]: items 为当前页的训练数据，total 为符合条件的总条数
+        """
+        df, total = self.get_training_data_page(
+            limit=limit,
+            offset=offset,
+            training_data_type=data_type or None,
+            title=title or None,
+            text=text or None
+        )
+        return {"items": self._training_records(df), "total": total}
+
     def get_training_data(self) -> List[Dict[str, Any]]:
         """
         获取所有训练数据
@@ -191,46 +600,12 @@ class VannaService(ChromaDB_VectorStore, OpenAI_Chat):
             List[Dict[str, Any]]: 包含所有训练数据的列表，每条数据包含类型、内容、标题和备注
         """
         try:
-       
-            # 直接调用父类的 get_training_data 方法获取 DataFrame
-            df = super().get_training_data()
-            # 将 DataFrame 转换为所需的字典列表格式
-            training_data = []
-            
-            for _, row in df.iterrows():
-                # 使用安全的方式获取值，提供默认值防止 None 错误
-                data = {
-                    "id": row.get("id", "") if isinstance(row.get("id"), str) else "",
-                    "type": row.get("training_data_type", "") if isinstance(row.get("training_data_type"), str) else "",
-                    "content": row.get("content", "") if isinstance(row.get("content"), str) else "",
-                }
-                
-                # 处理标题和备注，清理掉可能的 Form 对象字符串
-                title = row.get("title", "")
-                note = row.get("note", "")
-                
-                # 如果标题或备注包含 "annotation=NoneType"，说明是 Form 对象的字符串表示，需要清理
-                if isinstance(title, str) and "annotation=NoneType" in title:
-                    title = ""
-                if isinstance(note, str) and "annotation=NoneType" in note:
-                    note = ""
-                    
-                data["title"] = title
-                data["note"] = note
-                
-                # 如果是问题-SQL对,添加问题字段
-                if row.get("training_data_type") == "sql":
-                    data["question"] = row.get("question", "") if isinstance(row.get("question"), str) else ""
-                else:
-                    data["question"] = ""  # 为非SQL类型也添加空的问题字段
-                    
-                training_data.append(data)
-                
-            return training_data
+            return self.get_training_page()["items"]
         except Exception as e:
             print(f"获取训练数据时出错: {e}")
             # 返回空列表而不是抛出异常，这样前端至少能显示空表格
             return []
+
     def add_training_data(self, data_type: str, content: str, question: str = None, title: str = "", note: str = "") -> str:
         """
         添加新的训练数据
@@ -276,6 +651,16 @@ class VannaService(ChromaDB_VectorStore, OpenAI_Chat):
         except Exception as e:
             print(f"添加训练数据时出错: {e}")
             raise
+    def get_schema_training_items(self) -> List[TrainingItem]:
+        """
+        读取当前 MySQL 数据库 information_schema.COLUMNS 中的列信息，
+        按表生成文档类训练数据（get_training_plan_generic）
+        """
+        if self.dialect != 'MySQL':
+            raise ValueError(f"仅支持从 MySQL 导入表结构，当前数据库为 {self.dialect}")
+        df = self.run_sql("SELECT * FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE()")
+        return self.training_plan_items(self.get_training_plan_generic(df))
+
     def remove_training_data(self, training_id: str) -> bool:
         """
         删除指定的训练数据
@@ -6,8 +6,9 @@ import json
 class WeatherService:
     def __init__(self):
         self.api_key = os.getenv("WEATHER_API_KEY")
-        self.geo_api = "https://geoapi.qweather.com/v2/city/lookup"
-        self.weather_api = "https://devapi.qweather.com/v7/weather/now"
+        # 接口地址可通过环境变量替换（如压测时指向本地桩服务）
+        self.geo_api = os.getenv("WEATHER_GEO_API", "https://geoapi.qweather.com/v2/city/lookup")
+        self.weather_api = os.getenv("WEATHER_API", "https://devapi.qweather.com/v7/weather/now")
 
     async def get_location_id(self, city: str) -> str:
         """获取城市的位置 ID"""
@@ -0,0 +1,163 @@
+import asyncio
+from contextlib import contextmanager
+from fastapi import Response
+from typing import Iterator
+from ..vanna.tracing import Span, add_span_processor
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+except ImportError:
+    CollectorRegistry = None
+
+# 各阶段耗时分布：缓存命中在毫秒级，LLM 调用在数秒到数十秒
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+EMBEDDING_BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+# 从缓存统计中导出的计数器（累计值）
+CACHE_EVENTS = ('hits', 'misses', 'evictions', 'expirations', 'rejections', 'errors')
+SEMANTIC_EVENTS = ('exact_hits', 'semantic_hits', 'misses', 'constraint_rejections', 'stale_entries', 'evictions')
+POOL_EVENTS = ('created', 'closed', 'checkouts', 'waits', 'checkout_timeouts', 'health_check_failures')
+
+
+class _StatsCollector:
+    """抓取时读取 VannaService 已有的统计信息（缓存、请求合并、数据库连接池），不在请求路径上重复计数"""
+
+    def __init__(self, vanna_service):
+        self.vanna_service = vanna_service
+
+    def collect(self):
+        stats = self.vanna_service.get_cache_stats(detailed=False)
+
+        cache_events = CounterMetricFamily(
+            'smartdb_cache_events', '缓存命中、未命中、淘汰等事件次数', labels=['cache', 'event'])
+        cache_entries = GaugeMetricFamily('smartdb_cache_entries', '缓存条目数', labels=['cache'])
+        cache_bytes = GaugeMetricFamily('smartdb_cache_bytes', '缓存占用字节数（估算）', labels=['cache'])
+        for name in ('query_cache', 'command_cache'):
+            cache_stats = stats.get(name) or {}
+            for event in CACHE_EVENTS:
+                if event in cache_stats:
+                    cache_events.add_metric([name, event], cache_stats[event])
+            if 'total_entries' in cache_stats:
+                cache_entries.add_metric([name], cache_stats['total_entries'])
+            if 'bytes' in cache_stats:
+                cache_bytes.add_metric([name], cache_stats['bytes'])
+        yield cache_events
+        yield cache_entries
+        yield cache_bytes
+
+        semantic = (stats.get('command_cache') or {}).get('semantic')
+        if semantic:
+            semantic_events = CounterMetricFamily(
+                'smartdb_semantic_cache_events', '语义缓存查找结果次数', labels=['event'])
+            for event in SEMANTIC_EVENTS:
+                semantic_events.add_metric([event], semantic.get(event, 0))
+            yield semantic_events
+
+        single_flight = CounterMetricFamily(
+            'smartdb_single_flight_calls', '请求合并调用次数（collapsed 为被合并的调用）', labels=['kind', 'result'])
+        for kind, kind_stats in (stats.get('single_flight') or {}).items():
+            if isinstance(kind_stats, dict):
+                single_flight.add_metric([kind, 'executed'], kind_stats['executions'])
+                single_flight.add_metric([kind, 'collapsed'], kind_stats['collapsed'])
+        yield single_flight
+
+        pool_stats = self.vanna_service.get_sql_pool_stats()
+        if pool_stats:
+            pool_connections = GaugeMetricFamily('smartdb_db_pool_connections', '数据库连接池连接数', labels=['state'])
+            pool_connections.add_metric(['idle'], pool_stats['idle'])
+            pool_connections.add_metric(['in_use'], pool_stats['in_use'])
+            yield pool_connections
+            pool_events = CounterMetricFamily('smartdb_db_pool_events', '数据库连接池事件次数', labels=['event'])
+            for event in POOL_EVENTS:
+                pool_events.add_metric([event], pool_stats.get(event, 0))
+            yield pool_events
+
+
+class MetricsRoute:
+    """
+    Prometheus /metrics 指标
+
+    - 各阶段耗时直方图来自追踪 span（阶段名即 span 名，如 retrieval、llm、sql、summary）
+    - LLM 按模型统计 token 用量和调用耗时，嵌入模型统计每次调用的批大小
+    - 缓存、请求合并和数据库连接池的计数在抓取时从已有统计中读取
+    - WebSocket 连接数和进行中的请求数由 track_connection / track_request 维护
+
+    未安装 prometheus_client 时所有方法都是空操作，/metrics 返回 503
+    """
+
+    def __init__(self, vanna_service):
+        self.enabled = CollectorRegistry is not None
+        if not self.enabled:
+            print("prometheus_client 未安装，/metrics 不可用")
+            return
+
+        self.registry = CollectorRegistry()
+        self.stage_seconds = Histogram(
+            'smartdb_stage_duration_seconds', '各处理阶段耗时（秒）', ['stage', 'status'],
+            buckets=STAGE_BUCKETS, registry=self.registry)
+        self.llm_seconds = Histogram(
+            'smartdb_llm_request_duration_seconds', 'LLM 调用耗时（秒）', ['model'],
+            buckets=STAGE_BUCKETS, registry=self.registry)
+        self.llm_tokens = Counter(
+            'smartdb_llm_tokens', 'LLM token 用量（cached 为命中服务商前缀缓存的提示词 token）', ['model', 'kind'],
+            registry=self.registry)
+        self.embedding_batch_size = Histogram(
+            'smartdb_embedding_batch_size', '每次嵌入调用的文本数', buckets=EMBEDDING_BATCH_BUCKETS,
+            registry=self.registry)
+        self.websocket_connections = Gauge(
+            'smartdb_websocket_connections', '当前打开的 WebSocket 连接数', registry=self.registry)
+        self.requests_in_flight = Gauge(
+            'smartdb_requests_in_flight', '正在处理的请求数', ['kind'], registry=self.registry)
+        self.registry.register(_StatsCollector(vanna_service))
+
+        add_span_processor(self._observe_span)
+
+    def _observe_span(self, span: Span) -> None:
+        seconds = span.duration_ms / 1000
+        self.stage_seconds.labels(span.name, span.status).observe(seconds)
+
+        attributes = span.attributes
+        model = attributes.get('llm.model')
+        if model:
+            self.llm_seconds.labels(model).observe(seconds)
+            for kind in ('prompt', 'cached', 'completion'):
+                tokens = attributes.get(f'llm.{kind}_tokens')
+                if tokens:
+                    self.llm_tokens.labels(model, kind).inc(tokens)
+
+        batch_size = attributes.get('embedding.batch_size')
+        if batch_size is not None:
+            self.embedding_batch_size.observe(batch_size)
+
+    @contextmanager
+    def track_connection(self) -> Iterator[None]:
+        """统计打开的 WebSocket 连接"""
+        if not self.enabled:
+            yield
+            return
+        self.websocket_connections.inc()
+        try:
+            yield
+        finally:
+            self.websocket_connections.dec()
+
+    @contextmanager
+    def track_request(self, kind: str) -> Iterator[None]:
+        """统计正在处理的请求（kind 为 http 或 websocket）"""
+        if not self.enabled:
+            yield
+            return
+        gauge = self.requests_in_flight.labels(kind)
+        gauge.inc()
+        try:
+            yield
+        finally:
+            gauge.dec()
+
+    async def get_metrics(self) -> Response:
+        if not self.enabled:
+            return Response("prometheus_client is not installed\n", status_code=503, media_type="text/plain")
+        # 收集器会读取缓存和连接池的统计，可能访问 Redis，放到线程中执行，不阻塞事件循环
+        output = await asyncio.to_thread(generate_latest, self.registry)
+        return Response(output, media_type=CONTENT_TYPE_LATEST)
@@ -34,4 +34,52 @@ class SystemRoute:
             return {
                 "status": "error",
                 "message": str(e)
+            }
+
+    @staticmethod
+    async def readiness_check(vanna_service):
+        """就绪检查：嵌入模型加载完成后才视为就绪"""
+        try:
+            embedding_function = vanna_service.embedding_function
+            if hasattr(embedding_function, "get_status"):
+                model_status = embedding_function.get_status()
+            else:
+                # 自定义嵌入函数没有加载状态，视为已就绪
+                model_status = {"state": "ready"}
+            return {
+                "status": "ready" if model_status["state"] == "ready" else "not_ready",
+                "embedding_model": model_status,
+                "timestamp": datetime.now().isoformat()
+            }
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": str(e)
+            }
+
+    @staticmethod
+    async def get_db_pool_stats(vanna_service):
+        try:
+            return {
+                "success": True,
+                "data": vanna_service.get_sql_pool_stats()
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    @staticmethod
+    async def get_cache_stats(vanna_service):
+        """缓存命中、请求合并（collapsed 为被合并的调用次数）等统计"""
+        try:
+            return {
+                "success": True,
+                "data": vanna_service.get_cache_stats()
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
             }
\ No newline at end of file
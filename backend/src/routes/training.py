@@ -1,18 +1,38 @@
 from fastapi import APIRouter, Form
-from typing import Optional
+from typing import Any, Dict, Optional
+from ..chat.training_import import TrainingImportJobs, load_training_data_dir, parse_training_file
+from ..vanna.types import TrainingItem
 
 router = APIRouter(prefix="/api/training", tags=["training"])
 
+# 训练数据列表的默认每页条数和上限
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 200
+
 class TrainingRoute:
     def __init__(self, chat_manager):
         self.chat_manager = chat_manager
+        self.import_jobs = TrainingImportJobs(chat_manager.vanna_service)
 
-    async def list_training_data(self):
+    async def list_training_data(self, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0,
+                                 data_type: Optional[str] = None, title: Optional[str] = None,
+                                 text: Optional[str] = None):
         try:
-            training_data = self.chat_manager.vanna_service.get_training_data()
+            limit = min(max(limit, 1), MAX_PAGE_SIZE)
+            offset = max(offset, 0)
+            page = self.chat_manager.vanna_service.get_training_page(
+                limit=limit,
+                offset=offset,
+                data_type=data_type,
+                title=title,
+                text=text
+            )
             return {
                 "success": True,
-                "data": training_data
+                "data": page["items"],
+                "total": page["total"],
+                "limit": limit,
+                "offset": offset
             }
         except Exception as e:
             return {
@@ -49,6 +69,73 @@ class TrainingRoute:
                 "message": str(e)
             }
 
+    async def bulk_import_training_data(self, payload: Dict[str, Any]):
+        """
+        批量导入训练数据，在后台任务中按批嵌入和写入，返回任务状态（通过 get_import_job 查询进度）
+
+        请求体（均为可选，至少提供一项）：
+            items: 单条训练数据列表，字段同 /api/training/add（type、content、question、title、note）
+            files: 训练数据文件列表，每项包含 type（sql/ddl/documentation）、content（文件内容）、title、note，
+                   格式同 training_data 目录下的文件
+            training_data: 为 true 时导入 backend/training_data 目录下的文件
+            schema: 为 true 时导入当前数据库 information_schema 中的表结构
+        """
+        try:
+            items = [
+                TrainingItem(
+                    str(item.get("type") or ""),
+                    str(item.get("content") or ""),
+                    question=item.get("question") or None,
+                    title=item.get("title") or "",
+                    note=item.get("note") or ""
+                )
+                for item in payload.get("items") or []
+            ]
+            for file in payload.get("files") or []:
+                items.extend(parse_training_file(
+                    file.get("type"),
+                    file.get("content") or "",
+                    title=file.get("title") or "",
+                    note=file.get("note") or ""
+                ))
+            if payload.get("training_data"):
+                items.extend(load_training_data_dir())
+
+            include_schema = bool(payload.get("schema"))
+            if not items and not include_schema:
+                return {
+                    "success": False,
+                    "message": "没有可导入的训练数据"
+                }
+
+            return {
+                "success": True,
+                "data": self.import_jobs.start(items, include_schema=include_schema)
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"批量导入训练数据失败: {str(e)}"
+            }
+
+    async def list_import_jobs(self):
+        return {
+            "success": True,
+            "data": self.import_jobs.list()
+        }
+
+    async def get_import_job(self, job_id: str):
+        job = self.import_jobs.get(job_id)
+        if job is None:
+            return {
+                "success": False,
+                "message": "导入任务不存在"
+            }
+        return {
+            "success": True,
+            "data": job
+        }
+
     async def delete_training_data(self, training_id: str):
         try:
             self.chat_manager.vanna_service.remove_training_data(training_id)
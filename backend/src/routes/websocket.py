@@ -1,26 +1,41 @@
 from fastapi import WebSocket
+from contextlib import aclosing, nullcontext
 import json
 import os
+import time
 from typing import Dict, Any
+from ..vanna.tracing import get_request_id, request_scope, span
 
 class WebSocketRoute:
-    def __init__(self, chat_manager, openai_client):
+    def __init__(self, chat_manager, openai_client, metrics=None):
         self.chat_manager = chat_manager
         self.client = openai_client
+        self.metrics = metrics
 
     async def handle_connection(self, websocket: WebSocket):
         try:
             while True:
                 data = await websocket.receive_text()
                 message_data = json.loads(data)
-                
-                # 处理分析请求
-                if message_data.get("type") == "analysis":
-                    await self._handle_analysis(websocket, message_data)
-                    continue
-                
-                # 处理常规消息
-                await self._handle_regular_message(websocket, message_data)
+
+                # 每条消息作为一个请求追踪，request_id 可由客户端指定，并随每个响应帧返回
+                with request_scope(message_data.get("request_id")), \
+                        span("websocket.message", type=message_data.get("type", "chat")), \
+                        self._track_request():
+                    started = time.perf_counter()
+                    if message_data.get("type") == "analysis":
+                        # 处理分析请求
+                        await self._handle_analysis(websocket, message_data)
+                    else:
+                        # 处理常规消息
+                        await self._handle_regular_message(websocket, message_data)
+
+                    # 客户端声明 notify_complete 时，响应全部发送后追加 complete 帧（用于压测等需要判断响应结束的客户端）
+                    if message_data.get("notify_complete"):
+                        await self._send(websocket, {
+                            "type": "complete",
+                            "elapsed_ms": int((time.perf_counter() - started) * 1000)
+                        })
                 
         except Exception as e:
             print(f"WebSocket error: {e}")
@@ -30,6 +45,17 @@ class WebSocketRoute:
             except:
                 pass
 
+    def _track_request(self):
+        """统计进行中的 WebSocket 请求（未启用指标时为空操作）"""
+        return self.metrics.track_request("websocket") if self.metrics else nullcontext()
+
+    async def _send(self, websocket: WebSocket, frame: Dict[str, Any]):
+        """发送响应帧，附带当前请求的 request_id"""
+        request_id = get_request_id()
+        if request_id:
+            frame["request_id"] = request_id
+        await websocket.send_json(frame)
+
     async def _handle_analysis(self, websocket: WebSocket, message_data: Dict[str, Any]):
         try:
             response = await self.client.chat.completions.create(
@@ -43,27 +69,63 @@ class WebSocketRoute:
             )
             
             result = response.choices[0].message.content if response.choices else "无法生成分析结果"
-            await websocket.send_json({
+            await self._send(websocket, {
                 "type": "analysis_complete",
                 "content": result
             })
             
         except Exception as e:
-            await websocket.send_json({
+            await self._send(websocket, {
                 "type": "error",
                 "content": f"分析失败：{str(e)}"
             })
 
     async def _handle_regular_message(self, websocket: WebSocket, message_data: Dict[str, Any]):
-        chat_result = await self.chat_manager.process_message(
-            message_data.get("messages", [{}])[-1].get("content", "")
-        )
+        content = message_data.get("messages", [{}])[-1].get("content", "")
+
+        # 客户端声明 progressive 时，SQL、结果和解释依次推送，不等待解释生成完成
+        if message_data.get("progressive") and self.chat_manager.is_db_query(content):
+            await self._progressive_db_query(websocket, content)
+            return
+
+        # 客户端声明 stream_results 时，数据库查询结果分块推送
+        if message_data.get("stream_results") and self.chat_manager.is_db_query(content):
+            await self._stream_db_query(websocket, content, message_data.get("max_rows"))
+            return
+
+        chat_result = await self.chat_manager.process_message(content)
         
         if chat_result["success"] and not chat_result.get("should_fallback"):
             await self._send_success_response(websocket, chat_result)
         else:
             await self._handle_fallback(websocket, message_data)
 
+    async def _stream_db_query(self, websocket: WebSocket, message: str, max_rows: int = None):
+        """
+        以增量 stream 帧发送查询结果：先发送列头（columns），再分块发送行数据（rows），
+        最后发送结果解释（summary），出错时发送 error
+        """
+        async with aclosing(self.chat_manager.stream_db_query(message, max_rows=max_rows)) as events:
+            async for event in events:
+                await self._send(websocket, {
+                    "type": "stream",
+                    "event": event.pop("event"),
+                    "content": event
+                })
+
+    async def _progressive_db_query(self, websocket: WebSocket, message: str):
+        """
+        以渐进 stream 帧发送查询：sql（SQL 生成后）、results（查询完成后）、
+        summary（解释的增量文本）、done（完整解释和耗时），出错时发送 error
+        """
+        async with aclosing(self.chat_manager.progressive_db_query(message)) as events:
+            async for event in events:
+                await self._send(websocket, {
+                    "type": "stream",
+                    "event": event.pop("event"),
+                    "content": event
+                })
+
     async def _send_success_response(self, websocket: WebSocket, chat_result: Dict[str, Any]):
         if "sql" in chat_result["data"]:
             formatted_content = {
@@ -76,7 +138,7 @@ class WebSocketRoute:
         else:
             formatted_content = chat_result["data"]
         
-        await websocket.send_json({
+        await self._send(websocket, {
             "type": "stream",
             "content": json.dumps(formatted_content, ensure_ascii=False)
         })
@@ -91,7 +153,7 @@ class WebSocketRoute:
 
         async for chunk in stream:
             if chunk.choices[0].delta.content:
-                await websocket.send_json({
+                await self._send(websocket, {
                     "type": "stream",
                     "content": chunk.choices[0].delta.content
                 })
\ No newline at end of file
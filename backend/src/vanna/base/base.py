@@ -48,13 +48,21 @@ flowchart
 
 """
 
+import asyncio
+import contextvars
+import hashlib
+import functools
 import json
 import os
 import re
 import sqlite3
+import threading
+import time
 import traceback
 from abc import ABC, abstractmethod
-from typing import List, Tuple, Union
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterator, List, Tuple, Union
 from urllib.parse import urlparse
 
 import pandas as pd
@@ -64,12 +72,62 @@ import plotly.graph_objects as go
 import requests
 import sqlparse
 
-from ..exceptions import DependencyError, ImproperlyConfigured, ValidationError
-from ..types import TrainingPlan, TrainingPlanItem
+from ..exceptions import (
+    DependencyError,
+    ImproperlyConfigured,
+    StageTimeoutError,
+    ValidationError,
+)
+from ..digest import build_result_digest
+from ..prompt_builder import MESSAGE_OVERHEAD_TOKENS, PromptBuilder
+from ..tracing import span, start_span, traced, use_span
+from ..tokenizer import get_token_counter
+from ..types import TrainingItem, TrainingPlan, TrainingPlanItem
 from ..utils import validate_config_path
 
 
 class VannaBase(ABC):
+    # Default per-stage time budgets (seconds) for the async pipeline.
+    # Override with config["stage_timeouts"]; a value of None disables the timeout.
+    DEFAULT_STAGE_TIMEOUTS = {
+        "retrieval": 30.0,
+        "llm": 120.0,
+        "sql": 60.0,
+        "summary": 60.0,
+    }
+
+    # Worker threads per executor, override with config["<kind>_executor_max_workers"]
+    # (config["executor_max_workers"] for the default executor)
+    DEFAULT_EXECUTOR_SIZES = {
+        "default": 8,
+        "sql": 4,
+        "retrieval": 12,
+    }
+
+    # The lookups run for every question, concurrently unless config["parallel_retrieval"] is False
+    RETRIEVAL_LOOKUPS = (
+        "get_similar_question_sql",
+        "get_related_ddl",
+        "get_related_documentation",
+    )
+
+    # How the prompt budget left after the fixed text is split between the retrieved sections,
+    # override with config["prompt_section_shares"]; tokens a section leaves unused go to the next ones
+    DEFAULT_PROMPT_SECTION_SHARES = {
+        "ddl": 0.5,
+        "documentation": 0.25,
+        "question_sql": 0.25,
+    }
+
+    # Assembled prompt segments kept per instance for the "prefix_cache" layout
+    PROMPT_SEGMENT_CACHE_SIZE = 256
+
+    # Training items embedded and written per call in add_training_batch, override with config["training_batch_size"]
+    TRAINING_BATCH_SIZE = 256
+
+    _executor_lock = threading.Lock()
+    _stats_lock = threading.Lock()
+
     def __init__(self, config=None):
         if config is None:
             config = {}
@@ -80,16 +138,39 @@ class VannaBase(ABC):
         self.dialect = self.config.get("dialect", "MySQL")
         self.language = self.config.get("language", None)
         self.max_tokens = self.config.get("max_tokens", 14000)
+        self.result_digest_max_tokens = self.config.get("result_digest_max_tokens", 2000)
+        self.token_counter = get_token_counter(self.config.get("tokenizer"))
+        self.prompt_section_shares = self.config.get(
+            "prompt_section_shares", self.DEFAULT_PROMPT_SECTION_SHARES
+        )
+        # "classic": retrieved DDL and documentation sit in the middle of the system message.
+        # "prefix_cache": stable text (role, guidelines, pinned DDL) comes first and retrieval last,
+        # so providers that cache prompt prefixes (OpenAI, DeepSeek, Qwen) can reuse them.
+        self.prompt_layout = self.config.get("prompt_layout", "classic")
+        self.pinned_ddl = list(self.config.get("pinned_ddl", []))
 
     def log(self, message: str, title: str = "Info"):
         print(f"{title}: {message}")
 
+    def _result_digest(self, df: pd.DataFrame) -> str:
+        """
+        Describe a query result for a prompt, capped at config["result_digest_max_tokens"].
+
+        See [`build_result_digest`][vanna.digest.build_result_digest].
+        """
+        return build_result_digest(
+            df,
+            max_tokens=self.result_digest_max_tokens,
+            token_counter=self.str_to_approx_token_count,
+        )
+
     def _response_language(self) -> str:
         if self.language is None:
             return ""
 
         return f"Respond in the {self.language} language."
 
+    @traced("generate_sql")
     def generate_sql(self, question: str, allow_llm_to_see_data=False, **kwargs) -> str:
         """
         Example:
@@ -122,20 +203,21 @@ class VannaBase(ABC):
         else:
             initial_prompt = None
 
-        question_sql_list = self.get_similar_question_sql(question, **kwargs)
-        ddl_list = self.get_related_ddl(question, **kwargs)
-        doc_list = self.get_related_documentation(question, **kwargs)
-       
-        prompt = self.get_sql_prompt(
-            initial_prompt=initial_prompt,
-            question=question,
-            question_sql_list=question_sql_list,
-            ddl_list=ddl_list,
-            doc_list=doc_list,
-            **kwargs,
-        )
+        with span("retrieval"):
+            question_sql_list, ddl_list, doc_list = self._retrieve_context(question, **kwargs)
+
+        with span("prompt"):
+            prompt = self.get_sql_prompt(
+                initial_prompt=initial_prompt,
+                question=question,
+                question_sql_list=question_sql_list,
+                ddl_list=ddl_list,
+                doc_list=doc_list,
+                **kwargs,
+            )
         self.log(title="SQL Prompt", message=prompt)
-        llm_response = self.submit_prompt(prompt, **kwargs)
+        with span("llm"):
+            llm_response = self.submit_prompt(prompt, **kwargs)
         self.log(title="LLM Response", message=llm_response)
 
         if 'intermediate_sql' in llm_response:
@@ -147,18 +229,20 @@ class VannaBase(ABC):
 
                 try:
                     self.log(title="Running Intermediate SQL", message=intermediate_sql)
-                    df = self.run_sql(intermediate_sql)
+                    with span("sql", intermediate=True):
+                        df = self.run_sql(intermediate_sql)
 
                     prompt = self.get_sql_prompt(
                         initial_prompt=initial_prompt,
                         question=question,
                         question_sql_list=question_sql_list,
                         ddl_list=ddl_list,
-                        doc_list=doc_list+[f"The following is a pandas DataFrame with the results of the intermediate SQL query {intermediate_sql}: \n" + df.to_markdown()],
+                        doc_list=doc_list+[f"The following is a pandas DataFrame with the results of the intermediate SQL query {intermediate_sql}: \n" + self._result_digest(df)],
                         **kwargs,
                     )
                     self.log(title="Final SQL Prompt", message=prompt)
-                    llm_response = self.submit_prompt(prompt, **kwargs)
+                    with span("llm", intermediate=True):
+                        llm_response = self.submit_prompt(prompt, **kwargs)
                     self.log(title="LLM Response", message=llm_response)
                 except Exception as e:
                     return f"Error running intermediate SQL: {e}"
@@ -166,6 +250,139 @@ class VannaBase(ABC):
 
         return self.extract_sql(llm_response)
 
+    def _retrieve_context(self, question: str, **kwargs) -> Tuple[list, list, list]:
+        """
+        Fetch the similar question-SQL pairs, related DDL and related documentation for a question.
+
+        The three lookups run concurrently on the `retrieval` executor, so every vector store gets
+        parallel retrieval without changes of its own. Set config["parallel_retrieval"] to False to
+        run them one after another.
+
+        Args:
+            question (str): The question to retrieve context for.
+
+        Returns:
+            Tuple[list, list, list]: The question-SQL list, the DDL list and the documentation list.
+        """
+        with span("embedding"):
+            kwargs = self.prepare_retrieval(question, **kwargs)
+
+        if not self._parallel_retrieval():
+            return tuple(
+                self._timed_lookup(lookup, question, **kwargs) for lookup in self.RETRIEVAL_LOOKUPS
+            )
+
+        executor = self._get_executor("retrieval")
+        # Each lookup runs in a copy of the caller's context so its span nests under the caller's
+        futures = [
+            executor.submit(contextvars.copy_context().run, self._timed_lookup, lookup, question, **kwargs)
+            for lookup in self.RETRIEVAL_LOOKUPS
+        ]
+        return tuple(future.result() for future in futures)
+
+    async def _retrieve_context_async(self, question: str, **kwargs) -> Tuple[list, list, list]:
+        """
+        Async counterpart of `_retrieve_context`.
+
+        A vector store can provide native async lookups by defining `get_similar_question_sql_async`,
+        `get_related_ddl_async` and/or `get_related_documentation_async`; those are awaited directly
+        and the remaining sync lookups run on the `retrieval` executor.
+        """
+        with span("embedding"):
+            kwargs = await self._run_blocking(self.prepare_retrieval, question, executor="retrieval", **kwargs)
+
+        async def run_lookup(lookup: str):
+            async_lookup = getattr(self, f"{lookup}_async", None)
+            if async_lookup is None:
+                return await self._run_blocking(
+                    self._timed_lookup, lookup, question, executor="retrieval", **kwargs
+                )
+
+            started = time.perf_counter()
+            try:
+                with span(lookup):
+                    return await async_lookup(question, **kwargs)
+            finally:
+                self._record_retrieval_latency(lookup, time.perf_counter() - started)
+
+        if not self._parallel_retrieval():
+            return tuple([await run_lookup(lookup) for lookup in self.RETRIEVAL_LOOKUPS])
+
+        return tuple(await asyncio.gather(*(run_lookup(lookup) for lookup in self.RETRIEVAL_LOOKUPS)))
+
+    def _parallel_retrieval(self) -> bool:
+        config = getattr(self, "config", None) or {}
+        return config.get("parallel_retrieval", True)
+
+    def _timed_lookup(self, lookup: str, question: str, **kwargs) -> list:
+        started = time.perf_counter()
+        try:
+            with span(lookup):
+                return getattr(self, lookup)(question, **kwargs)
+        finally:
+            self._record_retrieval_latency(lookup, time.perf_counter() - started)
+
+    def _record_retrieval_latency(self, lookup: str, seconds: float) -> None:
+        with VannaBase._stats_lock:
+            all_stats = self.__dict__.setdefault("_retrieval_stats", {})
+            stats = all_stats.setdefault(
+                lookup, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "last_seconds": 0.0}
+            )
+            stats["count"] += 1
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["last_seconds"] = seconds
+
+        self.log(title="Retrieval Latency", message=f"{lookup}: {seconds * 1000:.1f} ms")
+
+    def get_retrieval_stats(self) -> dict:
+        """
+        Return the per-lookup retrieval latency statistics (count, average, max and last, in seconds).
+        """
+        with VannaBase._stats_lock:
+            return {
+                lookup: {
+                    **stats,
+                    "avg_seconds": stats["total_seconds"] / stats["count"] if stats["count"] else 0.0,
+                }
+                for lookup, stats in self.__dict__.get("_retrieval_stats", {}).items()
+            }
+
+    def _record_llm_usage(self, prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> None:
+        """
+        Record the token usage reported by the LLM for one request, including the prompt tokens
+        served from the provider's prefix cache.
+        """
+        with VannaBase._stats_lock:
+            stats = self.__dict__.setdefault(
+                "_llm_usage", {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+            )
+            stats["requests"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["cached_tokens"] += cached_tokens
+            stats["completion_tokens"] += completion_tokens
+
+        self.log(
+            title="LLM Usage",
+            message=f"prompt={prompt_tokens} (cached={cached_tokens}) completion={completion_tokens}",
+        )
+
+    def get_llm_usage_stats(self) -> dict:
+        """
+        Return the accumulated LLM token usage and the share of prompt tokens that hit the provider's prefix cache.
+        """
+        with VannaBase._stats_lock:
+            stats = dict(
+                self.__dict__.get(
+                    "_llm_usage", {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+                )
+            )
+            segments = dict(self.__dict__.get("_prompt_segment_stats", {"hits": 0, "misses": 0}))
+        stats["cached_ratio"] = stats["cached_tokens"] / stats["prompt_tokens"] if stats["prompt_tokens"] else 0.0
+        stats["prompt_layout"] = self.prompt_layout
+        stats["prompt_segments"] = segments
+        return stats
+
     def extract_sql(self, llm_response: str) -> str:
         """
         Example:
@@ -308,7 +525,7 @@ class VannaBase(ABC):
 
         message_log = [
             self.system_message(
-                f"You are a helpful data assistant. The user asked the question: '{question}'\n\nThe SQL query for this question was: {sql}\n\nThe following is a pandas DataFrame with the results of the query: \n{df.head(25).to_markdown()}\n\n"
+                f"You are a helpful data assistant. The user asked the question: '{question}'\n\nThe SQL query for this question was: {sql}\n\nThe following is a pandas DataFrame with the results of the query: \n{self._result_digest(df)}\n\n"
             ),
             self.user_message(
                 f"Generate a list of {n_questions} followup questions that the user might ask about this data. Respond with a list of questions, one per line. Do not answer with any explanations -- just the questions. Remember that there should be an unambiguous SQL query that can be generated from the question. Prefer questions that are answerable outside of the context of this conversation. Prefer questions that are slight modifications of the SQL query that was generated that allow digging deeper into the data. Each question will be turned into a button that the user can click to generate a new SQL query so don't use 'example' type questions. Each question must have a one-to-one correspondence with an instantiated SQL query." +
@@ -351,9 +568,16 @@ class VannaBase(ABC):
             str: The summary of the results of the SQL query.
         """
 
-        message_log = [
+        message_log = self._get_summary_prompt(question, df)
+
+        summary = self.submit_prompt(message_log, **kwargs)
+
+        return summary
+
+    def _get_summary_prompt(self, question: str, df: pd.DataFrame) -> list:
+        return [
             self.system_message(
-                f"You are a helpful data assistant. The user asked the question: '{question}'\n\nThe following is a pandas DataFrame with the results of the query: \n{df.to_markdown()}\n\n"
+                f"You are a helpful data assistant. The user asked the question: '{question}'\n\nThe following is a pandas DataFrame with the results of the query: \n{self._result_digest(df)}\n\n"
             ),
             self.user_message(
                 "Briefly summarize the data based on the question that was asked. Do not respond with any additional explanation beyond the summary." +
@@ -361,9 +585,241 @@ class VannaBase(ABC):
             ),
         ]
 
-        summary = self.submit_prompt(message_log, **kwargs)
+    # ----------------- Async Pipeline ----------------- #
 
-        return summary
+    def _get_executor(self, kind: str = "default") -> ThreadPoolExecutor:
+        """
+        Return the bounded thread pool used to run blocking work off the event loop.
+
+        Separate pools are kept per kind of work so a burst of slow SQL cannot starve retrieval
+        and LLM calls: `default`, `sql` and `retrieval`, sized by DEFAULT_EXECUTOR_SIZES.
+        """
+        executors = self.__dict__.get("_executors")
+        if executors is not None and kind in executors:
+            return executors[kind]
+
+        with VannaBase._executor_lock:
+            executors = self.__dict__.setdefault("_executors", {})
+            if kind not in executors:
+                config = getattr(self, "config", None) or {}
+                config_key = "executor_max_workers" if kind == "default" else f"{kind}_executor_max_workers"
+                max_workers = config.get(config_key, self.DEFAULT_EXECUTOR_SIZES.get(kind, 8))
+                executors[kind] = ThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix=f"vanna-{kind}"
+                )
+            return executors[kind]
+
+    async def _run_blocking(self, func, *args, executor: str = "default", **kwargs):
+        # run_in_executor does not carry context variables over, so the current span and
+        # request ID are passed along explicitly (like asyncio.to_thread does)
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._get_executor(executor), functools.partial(context.run, func, *args, **kwargs)
+        )
+
+    def _stage_timeout(self, stage: str) -> Union[float, None]:
+        config = getattr(self, "config", None) or {}
+        timeouts = config.get("stage_timeouts", {})
+        return timeouts.get(stage, self.DEFAULT_STAGE_TIMEOUTS.get(stage))
+
+    async def _run_stage(self, stage: str, awaitable):
+        """
+        Await a pipeline stage under its time budget, traced as a span named after the stage.
+
+        Note that a stage running on the executor cannot be interrupted: on timeout the caller
+        gets a StageTimeoutError straight away while the worker thread finishes in the background.
+        """
+        timeout = self._stage_timeout(stage)
+        with span(stage):
+            if timeout is None:
+                return await awaitable
+
+            try:
+                return await asyncio.wait_for(awaitable, timeout=timeout)
+            except asyncio.TimeoutError:
+                raise StageTimeoutError(f"Stage '{stage}' timed out after {timeout}s")
+
+    async def submit_prompt_async(self, prompt, **kwargs) -> str:
+        """
+        Async counterpart of [`submit_prompt`][vanna.base.base.VannaBase.submit_prompt].
+
+        The default implementation runs the blocking `submit_prompt` on the executor.
+        LLM integrations with a native async client should override this.
+        """
+        return await self._run_blocking(self.submit_prompt, prompt, **kwargs)
+
+    async def submit_prompt_stream_async(self, prompt, **kwargs) -> AsyncIterator[str]:
+        """
+        Stream the LLM response as text deltas.
+
+        The default implementation yields the whole response of
+        [`submit_prompt_async`][vanna.base.base.VannaBase.submit_prompt_async] as a single chunk.
+        LLM integrations that support streaming should override this.
+        """
+        yield await self.submit_prompt_async(prompt, **kwargs)
+
+    async def run_sql_async(self, sql: str, **kwargs) -> pd.DataFrame:
+        """
+        Async counterpart of [`run_sql`][vanna.base.base.VannaBase.run_sql].
+
+        Runs the blocking database call on the bounded `sql` executor under the `sql` stage timeout.
+        """
+        return await self._run_stage(
+            "sql", self._run_blocking(self.run_sql, sql, executor="sql")
+        )
+
+    async def run_sql_stream_async(self, sql: str, batch_size: int = 500) -> AsyncIterator[pd.DataFrame]:
+        """
+        Async counterpart of [`run_sql_stream`][vanna.base.base.VannaBase.run_sql_stream].
+
+        Each batch is fetched on the bounded `sql` executor under the `sql` stage timeout.
+        Close the iterator (e.g. with `contextlib.aclosing`) when stopping early so the
+        underlying cursor is released.
+        """
+        stream = self.run_sql_stream(sql, batch_size=batch_size)
+        exhausted = object()
+        try:
+            while True:
+                batch = await self._run_stage(
+                    "sql", self._run_blocking(next, stream, exhausted, executor="sql")
+                )
+                if batch is exhausted:
+                    break
+                yield batch
+        finally:
+            try:
+                await self._run_blocking(stream.close, executor="sql")
+            except ValueError:
+                # Still running on a timed out worker, it is closed when collected
+                pass
+
+    @traced("generate_sql")
+    async def generate_sql_async(self, question: str, allow_llm_to_see_data=False, **kwargs) -> str:
+        """
+        Example:
+        ```python
+        sql = await vn.generate_sql_async("What are the top 10 customers by sales?")
+        ```
+
+        Async counterpart of [`generate_sql`][vanna.base.base.VannaBase.generate_sql].
+        The three retrieval lookups run concurrently, the LLM call goes through
+        [`submit_prompt_async`][vanna.base.base.VannaBase.submit_prompt_async] and every stage
+        is bounded by its timeout, so the event loop stays free while the question is answered.
+
+        Args:
+            question (str): The question to generate a SQL query for.
+            allow_llm_to_see_data (bool): Whether to allow the LLM to see the data (for the purposes of introspecting the data to generate the final SQL).
+
+        Returns:
+            str: The SQL query that answers the question.
+        """
+        if self.config is not None:
+            initial_prompt = self.config.get("initial_prompt", None)
+        else:
+            initial_prompt = None
+
+        question_sql_list, ddl_list, doc_list = await self._run_stage(
+            "retrieval", self._retrieve_context_async(question, **kwargs)
+        )
+
+        with span("prompt"):
+            prompt = self.get_sql_prompt(
+                initial_prompt=initial_prompt,
+                question=question,
+                question_sql_list=question_sql_list,
+                ddl_list=ddl_list,
+                doc_list=doc_list,
+                **kwargs,
+            )
+        self.log(title="SQL Prompt", message=prompt)
+        llm_response = await self._run_stage("llm", self.submit_prompt_async(prompt, **kwargs))
+        self.log(title="LLM Response", message=llm_response)
+
+        if 'intermediate_sql' in llm_response:
+            if not allow_llm_to_see_data:
+                return "The LLM is not allowed to see the data in your database. Your question requires database introspection to generate the necessary SQL. Please set allow_llm_to_see_data=True to enable this."
+
+            intermediate_sql = self.extract_sql(llm_response)
+
+            try:
+                self.log(title="Running Intermediate SQL", message=intermediate_sql)
+                df = await self.run_sql_async(intermediate_sql)
+
+                prompt = self.get_sql_prompt(
+                    initial_prompt=initial_prompt,
+                    question=question,
+                    question_sql_list=question_sql_list,
+                    ddl_list=ddl_list,
+                    doc_list=doc_list+[f"The following is a pandas DataFrame with the results of the intermediate SQL query {intermediate_sql}: \n" + self._result_digest(df)],
+                    **kwargs,
+                )
+                self.log(title="Final SQL Prompt", message=prompt)
+                llm_response = await self._run_stage("llm", self.submit_prompt_async(prompt, **kwargs))
+                self.log(title="LLM Response", message=llm_response)
+            except Exception as e:
+                return f"Error running intermediate SQL: {e}"
+
+        return self.extract_sql(llm_response)
+
+    async def generate_summary_async(self, question: str, df: pd.DataFrame, **kwargs) -> str:
+        """
+        Async counterpart of [`generate_summary`][vanna.base.base.VannaBase.generate_summary].
+
+        Args:
+            question (str): The question that was asked.
+            df (pd.DataFrame): The results of the SQL query.
+
+        Returns:
+            str: The summary of the results of the SQL query.
+        """
+        message_log = self._get_summary_prompt(question, df)
+
+        return await self._run_stage("summary", self.submit_prompt_async(message_log, **kwargs))
+
+    async def generate_summary_stream_async(self, question: str, df: pd.DataFrame, **kwargs) -> AsyncIterator[str]:
+        """
+        Streaming counterpart of [`generate_summary_async`][vanna.base.base.VannaBase.generate_summary_async].
+
+        Yields the summary as text deltas so they can be shown while the LLM is still writing.
+        The whole stream is bounded by the `summary` stage timeout.
+
+        Args:
+            question (str): The question that was asked.
+            df (pd.DataFrame): The results of the SQL query.
+
+        Yields:
+            str: The next piece of the summary.
+        """
+        message_log = self._get_summary_prompt(question, df)
+
+        loop = asyncio.get_running_loop()
+        timeout = self._stage_timeout("summary")
+        deadline = loop.time() + timeout if timeout is not None else None
+
+        # The span is only made current around each step: a context variable set here would
+        # otherwise leak into the consumer between yields
+        summary_span = start_span("summary", streamed=True)
+        chunks = 0
+        stream = self.submit_prompt_stream_async(message_log, **kwargs)
+        try:
+            while True:
+                remaining = deadline - loop.time() if deadline is not None else None
+                try:
+                    with use_span(summary_span):
+                        chunk = await asyncio.wait_for(stream.__anext__(), timeout=remaining)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError as e:
+                    summary_span.record_error(e)
+                    raise StageTimeoutError(f"Stage 'summary' timed out after {timeout}s")
+                chunks += 1
+                yield chunk
+        finally:
+            summary_span.set_attribute("chunks", chunks)
+            summary_span.end()
+            with use_span(summary_span):
+                await stream.aclose()
 
     # ----------------- Use Any Embeddings API ----------------- #
     @abstractmethod
@@ -371,6 +827,21 @@ class VannaBase(ABC):
         pass
 
     # ----------------- Use Any Database to Store and Retrieve Context ----------------- #
+    def prepare_retrieval(self, question: str, **kwargs) -> dict:
+        """
+        Hook called once per question before the similar question-SQL, DDL and documentation lookups.
+
+        Vector stores can override it to do shared work up front, e.g. embed the question once and
+        pass the vector to all three lookups through the returned keyword arguments.
+
+        Args:
+            question (str): The question that is about to be looked up.
+
+        Returns:
+            dict: The keyword arguments passed on to the lookups.
+        """
+        return kwargs
+
     @abstractmethod
     def get_similar_question_sql(self, question: str, **kwargs) -> list:
         """
@@ -465,6 +936,48 @@ class VannaBase(ABC):
         """
         pass
 
+    def get_training_data_page(
+        self,
+        limit: Union[int, None] = None,
+        offset: int = 0,
+        training_data_type: Union[str, None] = None,
+        title: Union[str, None] = None,
+        text: Union[str, None] = None,
+        **kwargs,
+    ) -> Tuple[pd.DataFrame, int]:
+        """
+        Example:
+        ```python
+        df, total = vn.get_training_data_page(limit=20, offset=40, training_data_type="ddl")
+        ```
+
+        Get one page of the training data, optionally filtered. This default implementation filters
+        the full [`vn.get_training_data()`][vanna.base.base.VannaBase.get_training_data] result;
+        vector stores override it to read only the requested page.
+
+        Args:
+            limit (int): The maximum number of rows to return, or None for all of them.
+            offset (int): The number of matching rows to skip.
+            training_data_type (str): Only return "sql", "ddl" or "documentation" rows.
+            title (str): Only return rows with this title.
+            text (str): Only return rows whose content (or question) contains this text.
+
+        Returns:
+            Tuple[pd.DataFrame, int]: The rows of the page and the number of rows matching the filters.
+        """
+        df = self.get_training_data(**kwargs)
+        if training_data_type:
+            df = df[df["training_data_type"] == training_data_type]
+        if title:
+            df = df[df["title"] == title]
+        if text:
+            df = df[
+                df["content"].str.contains(text, regex=False, na=False)
+                | df["question"].str.contains(text, regex=False, na=False)
+            ]
+        end = None if limit is None else offset + limit
+        return df.iloc[offset:end], len(df)
+
     @abstractmethod
     def remove_training_data(self, id: str, **kwargs) -> bool:
         """
@@ -483,6 +996,62 @@ class VannaBase(ABC):
         """
         pass
 
+    def add_training_batch(
+        self,
+        items: List[TrainingItem],
+        batch_size: Union[int, None] = None,
+        progress: Union[Callable[[int, int], None], None] = None,
+    ) -> List[str]:
+        """
+        Example:
+        ```python
+        vn.add_training_batch([
+            TrainingItem(TrainingItem.ITEM_TYPE_DDL, "CREATE TABLE ..."),
+            TrainingItem(TrainingItem.ITEM_TYPE_SQL, "SELECT ...", question="How many ...?"),
+        ])
+        ```
+
+        Add many pieces of training data. Items are handed to the vector store `batch_size` at a
+        time, so stores that override `_add_training_batch` embed and write each batch in one call.
+        All items are validated before anything is written.
+
+        Args:
+            items (List[TrainingItem]): The training data to add.
+            batch_size (int): Items per batch. Defaults to config["training_batch_size"] or TRAINING_BATCH_SIZE.
+            progress (Callable[[int, int], None]): Called after every batch with the number of items done and the total.
+
+        Returns:
+            List[str]: The IDs of the training data, in the order of `items`.
+        """
+        item_types = (TrainingItem.ITEM_TYPE_SQL, TrainingItem.ITEM_TYPE_DDL, TrainingItem.ITEM_TYPE_DOCUMENTATION)
+        for index, item in enumerate(items):
+            if item.item_type not in item_types:
+                raise ValidationError(f"Training item {index} has an unknown type: {item.item_type}")
+            if not item.content:
+                raise ValidationError(f"Training item {index} is empty")
+            if item.item_type == TrainingItem.ITEM_TYPE_SQL and not item.question:
+                raise ValidationError(f"Training item {index} is SQL without a question")
+
+        batch_size = batch_size or self.config.get("training_batch_size", self.TRAINING_BATCH_SIZE)
+        ids = []
+        for start in range(0, len(items), batch_size):
+            ids.extend(self._add_training_batch(items[start:start + batch_size]))
+            if progress is not None:
+                progress(len(ids), len(items))
+        return ids
+
+    def _add_training_batch(self, items: List[TrainingItem]) -> List[str]:
+        """Add one batch of validated items. Vector stores override this to embed and insert the batch at once."""
+        ids = []
+        for item in items:
+            if item.item_type == TrainingItem.ITEM_TYPE_SQL:
+                ids.append(self.add_question_sql(question=item.question, sql=item.content, title=item.title, note=item.note))
+            elif item.item_type == TrainingItem.ITEM_TYPE_DDL:
+                ids.append(self.add_ddl(item.content, title=item.title, note=item.note))
+            else:
+                ids.append(self.add_documentation(item.content, title=item.title, note=item.note))
+        return ids
+
     # ----------------- Use Any Language Model API ----------------- #
 
     @abstractmethod
@@ -498,24 +1067,16 @@ class VannaBase(ABC):
         pass
 
     def str_to_approx_token_count(self, string: str) -> int:
-        return len(string) / 4
+        """Count the tokens of a string with the configured tokenizer (config["tokenizer"])."""
+        counter = getattr(self, "token_counter", None) or get_token_counter()
+        return counter.count(string)
 
     def add_ddl_to_prompt(
         self, initial_prompt: str, ddl_list: list[str], max_tokens: int = 14000
     ) -> str:
-        if len(ddl_list) > 0:
-            # initial_prompt += "\n===Tables \n"
-            initial_prompt += "\n===表 \n"
-
-            for ddl in ddl_list:
-                if (
-                    self.str_to_approx_token_count(initial_prompt)
-                    + self.str_to_approx_token_count(ddl)
-                    < max_tokens
-                ):
-                    initial_prompt += f"{ddl}\n\n"
-
-        return initial_prompt
+        builder = PromptBuilder(self.str_to_approx_token_count, initial_prompt)
+        builder.add_section("\n===表 \n", ddl_list, max_tokens - builder.tokens)
+        return builder.build()
 
     def add_documentation_to_prompt(
         self,
@@ -523,36 +1084,32 @@ class VannaBase(ABC):
         documentation_list: list[str],
         max_tokens: int = 14000,
     ) -> str:
-        if len(documentation_list) > 0:
-            # initial_prompt += "\n===Additional Context \n\n"
-            initial_prompt += "\n===附加上下文 \n\n"
-
-            for documentation in documentation_list:
-                if (
-                    self.str_to_approx_token_count(initial_prompt)
-                    + self.str_to_approx_token_count(documentation)
-                    < max_tokens
-                ):
-                    initial_prompt += f"{documentation}\n\n"
-
-        return initial_prompt
+        builder = PromptBuilder(self.str_to_approx_token_count, initial_prompt)
+        builder.add_section("\n===附加上下文 \n\n", documentation_list, max_tokens - builder.tokens)
+        return builder.build()
 
     def add_sql_to_prompt(
         self, initial_prompt: str, sql_list: list[str], max_tokens: int = 14000
     ) -> str:
-        if len(sql_list) > 0:
-            # initial_prompt += "\n===Question-SQL Pairs\n\n"
-            initial_prompt += "\n===问题-SQL对\n\n"
-
-            for question in sql_list:
-                if (
-                    self.str_to_approx_token_count(initial_prompt)
-                    + self.str_to_approx_token_count(question["sql"])
-                    < max_tokens
-                ):
-                    initial_prompt += f"{question['question']}\n{question['sql']}\n\n"
+        builder = PromptBuilder(self.str_to_approx_token_count, initial_prompt)
+        builder.add_section(
+            "\n===问题-SQL对\n\n",
+            [f"{question['question']}\n{question['sql']}" for question in sql_list],
+            max_tokens - builder.tokens,
+        )
+        return builder.build()
 
-        return initial_prompt
+    def _section_budget(self, remaining: int, sections: list, index: int) -> int:
+        """
+        Token budget of sections[index] out of the tokens still available.
+
+        Each section gets its share (config["prompt_section_shares"]) of what is left among itself and the
+        sections after it, so tokens an earlier section does not use flow on to the later ones.
+        """
+        shares = [self.prompt_section_shares.get(name, 0) for name in sections[index:]]
+        if index == len(sections) - 1 or sum(shares) <= 0:
+            return max(remaining, 0)
+        return max(int(remaining * shares[0] / sum(shares)), 0)
 
     def get_sql_prompt(
         self,
@@ -597,17 +1154,9 @@ class VannaBase(ABC):
             initial_prompt = f"您是一位 {self.dialect} 专家。 " + \
             "请帮助生成一个SQL查询来回答问题。你的回答应仅基于给定的上下文，并遵循响应指南和格式说明。 "
 
-        initial_prompt = self.add_ddl_to_prompt(
-            initial_prompt, ddl_list, max_tokens=self.max_tokens
-        )
-
-        if self.static_documentation != "":
+        if self.static_documentation != "" and self.prompt_layout != "prefix_cache":
             doc_list.append(self.static_documentation)
 
-        initial_prompt = self.add_documentation_to_prompt(
-            initial_prompt, doc_list, max_tokens=self.max_tokens
-        )
-
         # initial_prompt += (
         #     "===Response Guidelines \n"
         #     "1. If the provided context is sufficient, please generate a valid SQL query without any explanations for the question. \n"
@@ -621,7 +1170,7 @@ class VannaBase(ABC):
         # 作者：Zapz 
         # 时间：2025-03-24
         # 优化提示词为中文！
-        initial_prompt += (
+        guidelines = (
             "===响应指南 \n"
             "1. 如果提供的上下文足够，请为问题生成一个有效的SQL查询，无需任何解释。 \n"
             "2. 如果提供的上下文几乎足够，但需要知道特定列中的特定字符串，请生成一个中间SQL查询，以查找该列中的不同字符串。在查询前添加一条注释，说明intermediate_sql \n"
@@ -631,15 +1180,139 @@ class VannaBase(ABC):
             f"6. 确保输出的SQL符合 {self.dialect} 规范，可执行，并且没有语法错误。 \n"
         )
 
-        message_log = [self.system_message(initial_prompt)]
-
+        examples = []
         for example in question_sql_list:
             if example is None:
                 print("example is None")
-            else:
-                if example is not None and "question" in example and "sql" in example:
-                    message_log.append(self.user_message(example["question"]))
-                    message_log.append(self.assistant_message(example["sql"]))
+            elif "question" in example and "sql" in example:
+                examples.append(example)
+
+        if self.prompt_layout == "prefix_cache":
+            return self._get_prefix_cached_sql_prompt(
+                initial_prompt, guidelines, question, examples, ddl_list, doc_list
+            )
+
+        # The fixed text (instructions, guidelines and the question) is counted first, what is left of
+        # max_tokens is shared between the DDL, documentation and question-SQL examples in one pass
+        count = self.str_to_approx_token_count
+        builder = PromptBuilder(count, initial_prompt)
+        remaining = (
+            self.max_tokens - builder.tokens - count(guidelines) - count(question)
+            - 2 * MESSAGE_OVERHEAD_TOKENS
+        )
+        sections = ["ddl", "documentation", "question_sql"]
+
+        remaining -= builder.add_section(
+            "\n===表 \n", ddl_list, self._section_budget(remaining, sections, 0)
+        )
+        remaining -= builder.add_section(
+            "\n===附加上下文 \n\n", doc_list, self._section_budget(remaining, sections, 1)
+        )
+        builder.add_text(guidelines)
+
+        message_log = [self.system_message(builder.build())]
+
+        budget = self._section_budget(remaining, sections, 2)
+        for example in examples:
+            tokens = count(example["question"]) + count(example["sql"]) + 2 * MESSAGE_OVERHEAD_TOKENS
+            if tokens <= budget:
+                message_log.append(self.user_message(example["question"]))
+                message_log.append(self.assistant_message(example["sql"]))
+                budget -= tokens
+
+        message_log.append(self.user_message(question))
+
+        return message_log
+
+    def _prompt_segment(self, key: tuple, build) -> tuple:
+        """
+        Return the memoized (text, tokens) of a prompt segment, calling `build` on a miss.
+
+        The key holds everything the segment depends on (its documents and token budget), hashed so
+        large document sets are not kept twice.
+        """
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        with VannaBase._stats_lock:
+            segments = self.__dict__.setdefault("_prompt_segments", OrderedDict())
+            stats = self.__dict__.setdefault("_prompt_segment_stats", {"hits": 0, "misses": 0})
+            segment = segments.get(digest)
+            if segment is not None:
+                segments.move_to_end(digest)
+                stats["hits"] += 1
+                return segment
+            stats["misses"] += 1
+
+        segment = build()
+        with VannaBase._stats_lock:
+            segments[digest] = segment
+            while len(segments) > self.PROMPT_SEGMENT_CACHE_SIZE:
+                segments.popitem(last=False)
+        return segment
+
+    def _get_prefix_cached_sql_prompt(
+        self,
+        initial_prompt: str,
+        guidelines: str,
+        question: str,
+        examples: list,
+        ddl_list: list,
+        doc_list: list,
+    ) -> list:
+        """
+        The "prefix_cache" layout of [`get_sql_prompt`][vanna.base.base.VannaBase.get_sql_prompt].
+
+        Messages go from the most to the least stable: a system message with the role, the guidelines,
+        the pinned DDL (config["pinned_ddl"]) and the static documentation, which is byte-identical for
+        every question; a second system message with the retrieved DDL and documentation; the
+        question-SQL examples; and the question. Both system messages are memoized, the second one per
+        set of retrieved documents.
+        """
+        count = self.str_to_approx_token_count
+
+        def build_stable():
+            builder = PromptBuilder(count, initial_prompt)
+            builder.add_text(guidelines)
+            builder.add_section("\n===表 \n", self.pinned_ddl, self.max_tokens)
+            if self.static_documentation != "":
+                builder.add_section("\n===附加上下文 \n\n", [self.static_documentation], self.max_tokens)
+            return builder.build(), builder.tokens
+
+        stable_text, stable_tokens = self._prompt_segment(
+            ("stable", initial_prompt, guidelines, tuple(self.pinned_ddl), self.static_documentation),
+            build_stable,
+        )
+
+        pinned = set(self.pinned_ddl)
+        ddl_list = [ddl for ddl in ddl_list if ddl not in pinned]
+        available = self.max_tokens - stable_tokens - 3 * MESSAGE_OVERHEAD_TOKENS
+        sections = ["ddl", "documentation", "question_sql"]
+
+        def build_retrieval():
+            builder = PromptBuilder(count)
+            remaining = available
+            remaining -= builder.add_section(
+                "===表 \n", ddl_list, self._section_budget(remaining, sections, 0)
+            )
+            builder.add_section(
+                "\n===附加上下文 \n\n", doc_list, self._section_budget(remaining, sections, 1)
+            )
+            return builder.build(), builder.tokens
+
+        retrieval_text, retrieval_tokens = self._prompt_segment(
+            ("retrieval", tuple(ddl_list), tuple(doc_list), available), build_retrieval
+        )
+
+        message_log = [self.system_message(stable_text)]
+        if retrieval_text:
+            message_log.append(self.system_message(retrieval_text))
+
+        budget = available - retrieval_tokens - count(question)
+        for example in examples:
+            tokens = count(example["question"]) + count(example["sql"]) + 2 * MESSAGE_OVERHEAD_TOKENS
+            if tokens <= budget:
+                message_log.append(self.user_message(example["question"]))
+                message_log.append(self.assistant_message(example["sql"]))
+                budget -= tokens
 
         message_log.append(self.user_message(question))
 
@@ -654,26 +1327,28 @@ class VannaBase(ABC):
         **kwargs,
     ) -> list:
         initial_prompt = f"The user initially asked the question: '{question}': \n\n"
+        instruction = "Generate a list of followup questions that the user might ask about this data. Respond with a list of questions, one per line. Do not answer with any explanations -- just the questions."
 
-        initial_prompt = self.add_ddl_to_prompt(
-            initial_prompt, ddl_list, max_tokens=self.max_tokens
-        )
+        count = self.str_to_approx_token_count
+        builder = PromptBuilder(count, initial_prompt)
+        remaining = self.max_tokens - builder.tokens - count(instruction) - 2 * MESSAGE_OVERHEAD_TOKENS
+        sections = ["ddl", "documentation", "question_sql"]
 
-        initial_prompt = self.add_documentation_to_prompt(
-            initial_prompt, doc_list, max_tokens=self.max_tokens
+        remaining -= builder.add_section(
+            "\n===表 \n", ddl_list, self._section_budget(remaining, sections, 0)
         )
-
-        initial_prompt = self.add_sql_to_prompt(
-            initial_prompt, question_sql_list, max_tokens=self.max_tokens
+        remaining -= builder.add_section(
+            "\n===附加上下文 \n\n", doc_list, self._section_budget(remaining, sections, 1)
         )
-
-        message_log = [self.system_message(initial_prompt)]
-        message_log.append(
-            self.user_message(
-                "Generate a list of followup questions that the user might ask about this data. Respond with a list of questions, one per line. Do not answer with any explanations -- just the questions."
-            )
+        builder.add_section(
+            "\n===问题-SQL对\n\n",
+            [f"{example['question']}\n{example['sql']}" for example in question_sql_list],
+            self._section_budget(remaining, sections, 2),
         )
 
+        message_log = [self.system_message(builder.build())]
+        message_log.append(self.user_message(instruction))
+
         return message_log
 
     @abstractmethod
@@ -739,6 +1414,13 @@ class VannaBase(ABC):
 
         return plotly_code
 
+    def get_df_metadata(self, df: pd.DataFrame) -> str:
+        """
+        Describe a DataFrame for [`generate_plotly_code`][vanna.base.base.VannaBase.generate_plotly_code]:
+        its dtypes followed by a token-budgeted digest of the values.
+        """
+        return f"Running df.dtypes gives:\n {df.dtypes}\n\n{self._result_digest(df)}"
+
     def generate_plotly_code(
         self, question: str = None, sql: str = None, df_metadata: str = None, **kwargs
     ) -> str:
@@ -851,6 +1533,10 @@ class VannaBase(ABC):
         """
         Connect to a SQLite database. This is just a helper function to set [`vn.run_sql`][vanna.base.base.VannaBase.run_sql]
 
+        A sqlite3 connection cannot run statements from several threads at once, so every thread of the
+        `sql` executor opens its own connection to a database file. An in-memory database keeps a single
+        shared connection, since each connection would see a different database.
+
         Args:
             url (str): The URL of the database to connect to.
             check_same_thread (str): Allow the connection may be accessed in multiple threads.
@@ -872,14 +1558,20 @@ class VannaBase(ABC):
             url = path
 
         # Connect to the database
-        conn = sqlite3.connect(
-            url,
-            check_same_thread=check_same_thread,
-            **kwargs
-        )
+        if url == ":memory:":
+            shared = sqlite3.connect(url, check_same_thread=check_same_thread, **kwargs)
+            get_connection = lambda: shared
+        else:
+            local = threading.local()
+
+            def get_connection():
+                conn = getattr(local, "conn", None)
+                if conn is None:
+                    conn = local.conn = sqlite3.connect(url, check_same_thread=check_same_thread, **kwargs)
+                return conn
 
         def run_sql_sqlite(sql: str):
-            return pd.read_sql_query(sql, conn)
+            return pd.read_sql_query(sql, get_connection())
 
         self.dialect = "SQLite"
         self.run_sql = run_sql_sqlite
@@ -1019,8 +1711,38 @@ class VannaBase(ABC):
         user: str = None,
         password: str = None,
         port: int = None,
+        pool_min_size: int = 1,
+        pool_max_size: int = 10,
+        pool_idle_timeout: float = 300.0,
+        pool_checkout_timeout: float = 30.0,
+        query_timeout: int = 60,
         **kwargs
     ):
+        """
+        Connect to MySQL using the PyMySQL connector through a connection pool. This is just a helper function to set [`vn.run_sql`][vanna.base.base.VannaBase.run_sql]
+        **Example:**
+        ```python
+        vn.connect_to_mysql(
+            host="myhost",
+            dbname="mydatabase",
+            user="myuser",
+            password="mypassword",
+            port=3306,
+            pool_max_size=10,
+        )
+        ```
+        Args:
+            host (str): The MySQL host.
+            dbname (str): The MySQL database name.
+            user (str): The MySQL user.
+            password (str): The MySQL password.
+            port (int): The MySQL port.
+            pool_min_size (int): Connections opened up front and kept open while idle.
+            pool_max_size (int): Maximum number of concurrent connections.
+            pool_idle_timeout (float): Seconds after which idle connections above `pool_min_size` are closed.
+            pool_checkout_timeout (float): Seconds to wait for a free connection before failing the query.
+            query_timeout (int): Per-query timeout in seconds, applied as the socket read timeout and as the server-side `max_execution_time` for SELECTs.
+        """
 
         try:
             import pymysql.cursors
@@ -1030,6 +1752,8 @@ class VannaBase(ABC):
                 " run command: \npip install PyMySQL"
             )
 
+        from ..pool import ConnectionPool
+
         if not host:
             host = os.getenv("HOST")
 
@@ -1060,26 +1784,52 @@ class VannaBase(ABC):
         if not port:
             raise ImproperlyConfigured("Please set your MySQL port")
 
-        conn = None
+        # Pooled connections are long-lived, so run in autocommit mode to avoid
+        # serving reads from a stale REPEATABLE READ snapshot
+        kwargs.setdefault("autocommit", True)
+        if query_timeout:
+            kwargs.setdefault("read_timeout", query_timeout)
 
-        try:
+        def connect_to_db():
             conn = pymysql.connect(
                 host=host,
                 user=user,
                 password=password,
                 database=dbname,
-                port=port,
+                port=int(port),
                 cursorclass=pymysql.cursors.DictCursor,
                 **kwargs
             )
+            if query_timeout:
+                try:
+                    with conn.cursor() as cs:
+                        cs.execute(f"SET SESSION max_execution_time = {int(query_timeout * 1000)}")
+                except pymysql.Error:
+                    # Not supported by this server (e.g. MariaDB), read_timeout still applies
+                    pass
+            return conn
+
+        def health_check(conn) -> bool:
+            conn.ping(reconnect=False)
+            return True
+
+        try:
+            pool = ConnectionPool(
+                connect_to_db,
+                min_size=pool_min_size,
+                max_size=pool_max_size,
+                idle_timeout=pool_idle_timeout,
+                checkout_timeout=pool_checkout_timeout,
+                health_check=health_check,
+            )
         except pymysql.Error as e:
             raise ValidationError(e)
 
         def run_sql_mysql(sql: str) -> Union[pd.DataFrame, None]:
-            if conn:
-                try:
-                    conn.ping(reconnect=True)
-                    cs = conn.cursor()
+            conn = pool.acquire()
+            broken = False
+            try:
+                with conn.cursor() as cs:
                     cs.execute(sql)
                     results = cs.fetchall()
 
@@ -1087,18 +1837,64 @@ class VannaBase(ABC):
                     df = pd.DataFrame(
                         results, columns=[desc[0] for desc in cs.description]
                     )
-                    return df
+                return df
 
-                except pymysql.Error as e:
-                    conn.rollback()
-                    raise ValidationError(e)
+            except (pymysql.OperationalError, pymysql.InterfaceError) as e:
+                # Lost or timed out connection, don't hand it back to the pool
+                broken = True
+                raise ValidationError(e)
 
-                except Exception as e:
-                    conn.rollback()
-                    raise e
+            except pymysql.Error as e:
+                conn.rollback()
+                raise ValidationError(e)
+
+            except Exception as e:
+                conn.rollback()
+                raise e
+
+            finally:
+                pool.release(conn, discard=broken)
+
+        def run_sql_stream_mysql(sql: str, batch_size: int = 500) -> Iterator[pd.DataFrame]:
+            conn = pool.acquire()
+            exhausted = False
+            broken = False
+            try:
+                # Unbuffered cursor: rows stay on the server until fetched
+                cs = conn.cursor(pymysql.cursors.SSCursor)
+                cs.execute(sql)
+                columns = [desc[0] for desc in cs.description]
+
+                empty = True
+                while True:
+                    rows = cs.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    empty = False
+                    yield pd.DataFrame(list(rows), columns=columns)
+
+                if empty:
+                    yield pd.DataFrame([], columns=columns)
+
+                cs.close()
+                exhausted = True
+
+            except (pymysql.OperationalError, pymysql.InterfaceError) as e:
+                broken = True
+                raise ValidationError(e)
+
+            except pymysql.Error as e:
+                raise ValidationError(e)
 
+            finally:
+                # Closing an abandoned unbuffered cursor would drain every remaining
+                # row off the socket, so drop the connection instead
+                pool.release(conn, discard=broken or not exhausted)
+
+        self.sql_pool = pool
         self.run_sql_is_set = True
         self.run_sql = run_sql_mysql
+        self.run_sql_stream = run_sql_stream_mysql
 
     def connect_to_clickhouse(
         self,
@@ -1668,6 +2464,15 @@ class VannaBase(ABC):
       self.run_sql_is_set = True
       self.run_sql = run_sql_hive
 
+    def get_sql_pool_stats(self) -> dict:
+        """
+        Return the connection pool statistics of the connected database, or an empty dict if it is not pooled.
+        """
+        pool = getattr(self, "sql_pool", None)
+        if pool is None:
+            return {}
+        return pool.get_stats()
+
     def run_sql(self, sql: str, **kwargs) -> pd.DataFrame:
         """
         Example:
@@ -1687,6 +2492,36 @@ class VannaBase(ABC):
             "You need to connect to a database first by running vn.connect_to_snowflake(), vn.connect_to_postgres(), similar function, or manually set vn.run_sql"
         )
 
+    def run_sql_stream(self, sql: str, batch_size: int = 500) -> Iterator[pd.DataFrame]:
+        """
+        Example:
+        ```python
+        for batch in vn.run_sql_stream("SELECT * FROM my_table", batch_size=1000):
+            print(len(batch))
+        ```
+
+        Run a SQL query and yield the results in DataFrame batches of at most `batch_size` rows.
+        At least one (possibly empty) batch is always yielded so the caller learns the columns.
+
+        Database connectors that support server-side cursors replace this with a true streaming
+        implementation; the default runs [`run_sql`][vanna.base.base.VannaBase.run_sql] and slices the result.
+
+        Args:
+            sql (str): The SQL query to run.
+            batch_size (int): The maximum number of rows per batch.
+
+        Returns:
+            Iterator[pd.DataFrame]: The result batches.
+        """
+        df = self.run_sql(sql)
+
+        if len(df) == 0:
+            yield df
+            return
+
+        for start in range(0, len(df), batch_size):
+            yield df.iloc[start:start + batch_size]
+
     def ask(
         self,
         question: Union[str, None] = None,
@@ -1766,7 +2601,7 @@ class VannaBase(ABC):
                     plotly_code = self.generate_plotly_code(
                         question=question,
                         sql=sql,
-                        df_metadata=f"Running df.dtypes gives:\n {df.dtypes}",
+                        df_metadata=self.get_df_metadata(df),
                     )
                     fig = self.get_plotly_figure(plotly_code=plotly_code, df=df)
                     if print_results:
@@ -1847,13 +2682,20 @@ class VannaBase(ABC):
             return self.add_ddl(ddl)
 
         if plan:
-            for item in plan._plan:
-                if item.item_type == TrainingPlanItem.ITEM_TYPE_DDL:
-                    self.add_ddl(item.item_value)
-                elif item.item_type == TrainingPlanItem.ITEM_TYPE_IS:
-                    self.add_documentation(item.item_value)
-                elif item.item_type == TrainingPlanItem.ITEM_TYPE_SQL:
-                    self.add_question_sql(question=item.item_name, sql=item.item_value)
+            self.add_training_batch(self.training_plan_items(plan))
+
+    @staticmethod
+    def training_plan_items(plan: TrainingPlan) -> List[TrainingItem]:
+        """Convert a training plan into items for [`vn.add_training_batch()`][vanna.base.base.VannaBase.add_training_batch]."""
+        items = []
+        for item in plan._plan:
+            if item.item_type == TrainingPlanItem.ITEM_TYPE_DDL:
+                items.append(TrainingItem(TrainingItem.ITEM_TYPE_DDL, item.item_value))
+            elif item.item_type == TrainingPlanItem.ITEM_TYPE_IS:
+                items.append(TrainingItem(TrainingItem.ITEM_TYPE_DOCUMENTATION, item.item_value))
+            elif item.item_type == TrainingPlanItem.ITEM_TYPE_SQL:
+                items.append(TrainingItem(TrainingItem.ITEM_TYPE_SQL, item.item_value, question=item.item_name))
+        return items
 
     def _get_databases(self) -> List[str]:
         try:
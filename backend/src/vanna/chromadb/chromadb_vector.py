@@ -1,32 +1,205 @@
 import json
-from typing import List
+import os
+import threading
+import time
+from typing import Any, Dict, List, Tuple, Union
 
 import chromadb
+import numpy as np
 import pandas as pd
 from chromadb.config import Settings
 from chromadb.utils import embedding_functions
 
 from ..base import VannaBase
+from ..embedding_cache import EmbeddingCache
+from ..exceptions import DependencyError
+from ..tracing import span
+from ..types import TrainingItem
 from ..utils import deterministic_uuid
-
-from FlagEmbedding import BGEM3FlagModel
+from .lexical_index import LexicalIndex, LexicalWeights, reciprocal_rank_fusion, weighted_fusion
 
 # zpaz 2025-03-24 自定义嵌入函数类
-# 创建 BGE-M3 模型实例
-bge_m3_model = BGEM3FlagModel('BAAI/bge-m3', use_fp16=True)
 class BGEM3EmbeddingFunction:
+    """
+    BGE-M3 embedding function with a content-hash keyed embedding cache.
+
+    Only the texts missing from the cache are encoded, deduplicated and in a single
+    batched `encode` call. The cache holds float32 arrays; they become lists only when
+    handed back to Chroma. Set `cache_path` (or the EMBEDDING_CACHE_PATH environment
+    variable for the default instance) to also keep the vectors on disk.
+
+    [`encode_hybrid`][vanna.chromadb.chromadb_vector.BGEM3EmbeddingFunction.encode_hybrid] also
+    returns the sparse lexical weights of the same forward pass, for hybrid retrieval; they are
+    cached next to the vectors.
+
+    The model is loaded lazily on the first encode, so importing this module stays cheap.
+    Call [`start_warm_up`][vanna.chromadb.chromadb_vector.BGEM3EmbeddingFunction.start_warm_up]
+    to load it in the background ahead of the first question.
+    """
+
+    STATE_NOT_LOADED = "not_loaded"
+    STATE_LOADING = "loading"
+    STATE_READY = "ready"
+    STATE_FAILED = "failed"
+
+    def __init__(self, model_name: str = "BAAI/bge-m3", batch_size: int = 32, max_length: int = 8192,
+                 cache_size: int = 4096, cache_path: str = None, use_fp16: bool = True):
+        self.model_name = model_name
+        self.use_fp16 = use_fp16
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.cache = EmbeddingCache(max_entries=cache_size, path=cache_path, namespace=model_name)
+        # Lexical weights are cached as flat (token ID, weight, token ID, weight, ...) float32 vectors;
+        # BGE-M3 token IDs (< 2 ** 24) are exact in float32
+        self.lexical_cache = EmbeddingCache(max_entries=cache_size, path=cache_path, namespace=model_name + ":lexical")
+
+        self._model = None
+        self._model_lock = threading.Lock()
+        self.state = self.STATE_NOT_LOADED
+        self.load_seconds = None
+        self.load_error = None
+
+    def _get_model(self):
+        if self._model is not None:
+            return self._model
+
+        with self._model_lock:
+            if self._model is None:
+                self.state = self.STATE_LOADING
+                started = time.perf_counter()
+                try:
+                    try:
+                        from FlagEmbedding import BGEM3FlagModel
+                    except ImportError:
+                        raise DependencyError(
+                            "FlagEmbedding is not installed. Please install it with 'pip install FlagEmbedding'."
+                        )
+                    # 创建 BGE-M3 模型实例
+                    self._model = BGEM3FlagModel(self.model_name, use_fp16=self.use_fp16)
+                except Exception as e:
+                    self.state = self.STATE_FAILED
+                    self.load_error = str(e)
+                    raise
+                self.load_seconds = time.perf_counter() - started
+                self.load_error = None
+                self.state = self.STATE_READY
+                print(f"Loaded embedding model {self.model_name} in {self.load_seconds:.1f}s")
+
+        return self._model
+
+    def warm_up(self) -> None:
+        """Load the model now instead of on the first encode."""
+        self._get_model()
+
+    def start_warm_up(self) -> threading.Thread:
+        """Load the model on a background daemon thread and return that thread."""
+
+        def run():
+            try:
+                self.warm_up()
+            except Exception as e:
+                print(f"Embedding model warm-up failed: {e}")
+
+        thread = threading.Thread(target=run, name="embedding-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "state": self.state,
+            "load_seconds": self.load_seconds,
+            "error": self.load_error,
+            "cache": self.cache.get_stats(),
+        }
+
     def __call__(self, input):  # 修改参数名为 input 而不是 texts
         if not input:
             return []
-        # 使用 BGE-M3 模型生成嵌入向量
-        embeddings = bge_m3_model.encode(input, batch_size=12, max_length=8192)['dense_vecs']
-        return embeddings.tolist()
+
+        embeddings = self.cache.get_many(input)
+        missing = list(dict.fromkeys(text for text, embedding in zip(input, embeddings) if embedding is None))
+
+        if missing:
+            # 使用 BGE-M3 模型生成嵌入向量
+            with span("embedding.encode", **{"embedding.batch_size": len(missing)}):
+                encoded = self._get_model().encode(missing, batch_size=self.batch_size, max_length=self.max_length)['dense_vecs']
+            self.cache.set_many(missing, encoded)
+            encoded_by_text = dict(zip(missing, encoded))
+            embeddings = [
+                embedding if embedding is not None else encoded_by_text[text]
+                for text, embedding in zip(input, embeddings)
+            ]
+
+        return [embedding.tolist() for embedding in embeddings]
+
+    def encode_hybrid(self, input: List[str]) -> Tuple[List[List[float]], List[LexicalWeights]]:
+        """
+        Dense vectors and lexical weights of texts, both from one `encode` call over the texts
+        missing either from the caches.
+
+        Returns:
+            Tuple: The vectors and the lexical weights (token ID -> weight), one per text.
+        """
+        if not input:
+            return [], []
+
+        embeddings = self.cache.get_many(input)
+        packed = self.lexical_cache.get_many(input)
+        missing = list(dict.fromkeys(
+            text for text, embedding, weights in zip(input, embeddings, packed) if embedding is None or weights is None
+        ))
+
+        if missing:
+            with span("embedding.encode", **{"embedding.batch_size": len(missing), "embedding.lexical": True}):
+                output = self._get_model().encode(
+                    missing, batch_size=self.batch_size, max_length=self.max_length, return_dense=True, return_sparse=True
+                )
+            encoded = output['dense_vecs']
+            encoded_weights = [
+                np.array([value for token, weight in weights.items() for value in (float(token), float(weight))],
+                         dtype=np.float32)
+                for weights in output['lexical_weights']
+            ]
+            self.cache.set_many(missing, encoded)
+            self.lexical_cache.set_many(missing, encoded_weights)
+            encoded_by_text = dict(zip(missing, zip(encoded, encoded_weights)))
+            embeddings = [encoded_by_text[text][0] if text in encoded_by_text else embedding
+                          for text, embedding in zip(input, embeddings)]
+            packed = [encoded_by_text[text][1] if text in encoded_by_text else weights
+                      for text, weights in zip(input, packed)]
+
+        lexical_weights = [
+            dict(zip(map(str, weights[0::2].astype(np.int64).tolist()), weights[1::2].tolist())) for weights in packed
+        ]
+        return [embedding.tolist() for embedding in embeddings], lexical_weights
 
 # default_ef = embedding_functions.DefaultEmbeddingFunction()
 # 使用自定义的 BGE-M3 嵌入函数
-default_ef = BGEM3EmbeddingFunction()
+default_ef = BGEM3EmbeddingFunction(cache_path=os.getenv("EMBEDDING_CACHE_PATH"))
 
 class ChromaDB_VectorStore(VannaBase):
+    """
+    Training data in three Chroma collections (sql, ddl, documentation).
+
+    With config["retrieval_mode"] = "hybrid" the lexical weights of every document are also kept
+    in a [`LexicalIndex`][vanna.chromadb.lexical_index.LexicalIndex] (lexical_index.sqlite3 next to
+    the Chroma files), and the lookups fuse the dense matches with the lexical ones, which find exact
+    identifiers such as table and column names that dense retrieval ranks low:
+
+    - `hybrid_fusion`: "rrf" (reciprocal rank fusion, `hybrid_rrf_k`, default 60) or "weighted"
+      (`hybrid_lexical_weight` of the scaled lexical score plus the rest of the dense similarity)
+    - `hybrid_candidates`: how many dense and lexical matches each are fused (default 20)
+    - `hybrid_min_lexical_score` (default 0.05) and `hybrid_min_lexical_ratio` (of the best lexical
+      score, default 0.3): the floor a lexical match must clear to be fused, so that documents sharing
+      only a common token with the question are left out; like `min_similarity`, the absolute floor
+      can also be passed per lookup as `min_lexical_score`
+
+    Hybrid mode needs an embedding function with `encode_hybrid` (the default BGE-M3 one), so
+    documents and questions are still encoded once. Documents stored before it was enabled are
+    indexed on the first lookup of their collection.
+    """
+
     def __init__(self, config=None):
         VannaBase.__init__(self, config=config)
         if config is None:
@@ -40,6 +213,28 @@ class ChromaDB_VectorStore(VannaBase):
         self.n_results_documentation = config.get("n_results_documentation", config.get("n_results", 10))
         self.n_results_ddl = config.get("n_results_ddl", config.get("n_results", 10))
 
+        self.retrieval_mode = config.get("retrieval_mode", "dense")
+        if self.retrieval_mode not in ("dense", "hybrid"):
+            raise ValueError(f"Unsupported retrieval mode: {self.retrieval_mode}")
+        self.hybrid_fusion = config.get("hybrid_fusion", "rrf")
+        if self.hybrid_fusion not in ("rrf", "weighted"):
+            raise ValueError(f"Unsupported hybrid fusion: {self.hybrid_fusion}")
+        self.hybrid_rrf_k = config.get("hybrid_rrf_k", 60)
+        self.hybrid_lexical_weight = config.get("hybrid_lexical_weight", 0.3)
+        self.hybrid_candidates = config.get("hybrid_candidates", 20)
+        self.hybrid_min_lexical_score = config.get("hybrid_min_lexical_score", 0.05)
+        self.hybrid_min_lexical_ratio = config.get("hybrid_min_lexical_ratio", 0.3)
+        self.lexical_index = None
+        if self.retrieval_mode == "hybrid":
+            if not hasattr(self.embedding_function, "encode_hybrid"):
+                raise ValueError("retrieval_mode 'hybrid' needs an embedding function with encode_hybrid, e.g. BGEM3EmbeddingFunction")
+            self.lexical_index = LexicalIndex(
+                os.path.join(path, "lexical_index.sqlite3") if curr_client == "persistent" else None
+            )
+        # Collections whose lexical index was checked against the Chroma records
+        self._lexical_synced = set()
+        self._lexical_sync_lock = threading.Lock()
+
         if curr_client == "persistent":
             self.chroma_client = chromadb.PersistentClient(
                 path=path, settings=Settings(anonymized_telemetry=False)
@@ -76,192 +271,272 @@ class ChromaDB_VectorStore(VannaBase):
             return embedding[0]
         return embedding
 
-    def add_question_sql(self, question: str, sql: str, **kwargs) -> str:
-        # 打印接收到的参数，用于调试
-        print(f"add_question_sql 接收到的参数: question={question}, sql={sql}, kwargs={kwargs}")
-        
-        # 提取标题和备注，确保它们是简单的字符串类型
-        title = str(kwargs.get("title", "")) if kwargs.get("title") is not None else ""
-        note = str(kwargs.get("note", "")) if kwargs.get("note") is not None else ""
-        
-        # 清理可能的 Form 对象字符串
-        if "annotation=NoneType" in title:
-            title = ""
-        if "annotation=NoneType" in note:
-            note = ""
-        
-        print(f"处理后的元数据: title={title}, note={note}")
-        
-        question_sql_json = json.dumps(
-            {
-                "question": question,
-                "sql": sql,
-                "title": title,
-                "note": note,
-            },
-            ensure_ascii=False,
-        )
-        id = deterministic_uuid(question_sql_json) + "-sql"
-        
-        # 添加元数据
-        metadata = {
-            "title": title,
-            "note": note,
-        }
-        
-        self.sql_collection.add(
-            documents=question_sql_json,
-            embeddings=self.generate_embedding(question_sql_json),
-            ids=id,
-            metadatas=metadata,
-        )
-    
-        return id
+    def _embed_documents(self, documents: List[str]) -> Tuple[List[List[float]], Union[List[LexicalWeights], None]]:
+        """The vectors of documents, and in hybrid mode their lexical weights from the same encode."""
+        if self.lexical_index is not None:
+            return self.embedding_function.encode_hybrid(documents)
+        return self.embedding_function(documents), None
+
+    def prepare_retrieval(self, question: str, **kwargs) -> dict:
+        # Embed the question once and share the vector across the sql, ddl and documentation queries
+        if self.lexical_index is not None:
+            if kwargs.get("query_embedding") is None or kwargs.get("query_lexical_weights") is None:
+                embeddings, lexical_weights = self.embedding_function.encode_hybrid([question])
+                kwargs["query_embedding"] = embeddings[0]
+                kwargs["query_lexical_weights"] = lexical_weights[0]
+        elif kwargs.get("query_embedding") is None:
+            kwargs["query_embedding"] = self.generate_embedding(question)
+        return kwargs
+
+    def _query_embedding(self, question: str, **kwargs) -> List[float]:
+        query_embedding = kwargs.get("query_embedding")
+        if query_embedding is None:
+            query_embedding = self.generate_embedding(question)
+        return query_embedding
+
+    def _query_lexical_weights(self, question: str, **kwargs) -> LexicalWeights:
+        lexical_weights = kwargs.get("query_lexical_weights")
+        if lexical_weights is None:
+            lexical_weights = self.embedding_function.encode_hybrid([question])[1][0]
+        return lexical_weights
 
-    def add_ddl(self, ddl: str, **kwargs) -> str:
-        # 提取标题和备注，确保它们是字符串类型
-        title = str(kwargs.get("title", "")) if kwargs.get("title") is not None else ""
-        note = str(kwargs.get("note", "")) if kwargs.get("note") is not None else ""
-        
-        id = deterministic_uuid(ddl) + "-ddl"
-        
-        # 添加元数据
-        metadata = {
-            "title": title,
-            "note": note,
-        }
-        
-        self.ddl_collection.add(
-            documents=ddl,
-            embeddings=self.generate_embedding(ddl),
-            ids=id,
-            metadatas=metadata,
-        )
-        return id
+    @staticmethod
+    def _clean_metadata_value(value) -> str:
+        # 提取标题和备注，确保它们是简单的字符串类型；清理可能的 Form 对象字符串
+        value = str(value) if value is not None else ""
+        return "" if "annotation=NoneType" in value else value
 
-    def add_documentation(self, documentation: str, **kwargs) -> str:
-        # 提取标题和备注，确保它们是字符串类型
-        title = str(kwargs.get("title", "")) if kwargs.get("title") is not None else ""
-        note = str(kwargs.get("note", "")) if kwargs.get("note") is not None else ""
-        
-        id = deterministic_uuid(documentation) + "-doc"
-        
-        # 添加元数据
+    def _training_record(self, item: TrainingItem) -> tuple:
+        """
+        Build the collection, ID, document and metadata stored for a training item.
+
+        IDs are derived from the document, so adding the same item again maps to the same record.
+        """
+        title = self._clean_metadata_value(item.title)
+        note = self._clean_metadata_value(item.note)
         metadata = {
             "title": title,
             "note": note,
         }
-        
-        self.documentation_collection.add(
-            documents=documentation,
-            embeddings=self.generate_embedding(documentation),
+
+        if item.item_type == TrainingItem.ITEM_TYPE_SQL:
+            document = json.dumps(
+                {
+                    "question": item.question,
+                    "sql": item.content,
+                    "title": title,
+                    "note": note,
+                },
+                ensure_ascii=False,
+            )
+            return self.sql_collection, deterministic_uuid(document) + "-sql", document, metadata
+        if item.item_type == TrainingItem.ITEM_TYPE_DDL:
+            return self.ddl_collection, deterministic_uuid(item.content) + "-ddl", item.content, metadata
+        return self.documentation_collection, deterministic_uuid(item.content) + "-doc", item.content, metadata
+
+    def _add_training_record(self, item: TrainingItem) -> str:
+        collection, id, document, metadata = self._training_record(item)
+        embeddings, lexical_weights = self._embed_documents([document])
+        collection.add(
+            documents=document,
+            embeddings=embeddings[0],
             ids=id,
             metadatas=metadata,
         )
+        if lexical_weights is not None:
+            self.lexical_index.add(collection.name, [id], lexical_weights)
         return id
 
-    def get_training_data(self, **kwargs) -> pd.DataFrame:
-        print("开始获取训练数据...")
-        sql_data = self.sql_collection.get()
-        print(f"获取到的 SQL 数据: {sql_data}")
-    
-        df = pd.DataFrame()
-        
-        if sql_data is not None and "documents" in sql_data and len(sql_data["documents"]) > 0:
-            try:
-                # 安全地提取文档
-                documents = []
-                for doc in sql_data["documents"]:
-                    try:
-                        documents.append(json.loads(doc))
-                    except Exception as e:
-                        print(f"解析 SQL 文档时出错: {e}")
-                        documents.append({})
-                
-                ids = sql_data["ids"]
-                # 安全地获取元数据
-                metadatas = sql_data.get("metadatas", [{"title": "", "note": ""} for _ in ids])
-                
-                # 创建数据框
-                data = {
-                    "id": ids,
-                    "question": [doc.get("question", "") for doc in documents],
-                    "content": [doc.get("sql", "") for doc in documents],
-                    "title": [meta.get("title", "") if meta else "" for meta in metadatas],
-                    "note": [meta.get("note", "") if meta else "" for meta in metadatas],
-                }
-                
-                df_sql = pd.DataFrame(data)
-                df_sql["training_data_type"] = "sql"
-                df = pd.concat([df, df_sql])
-                
-                print(f"处理后的 SQL 数据框: {df_sql}")
-            except Exception as e:
-                print(f"处理 SQL 数据时出错: {e}")
-
-        # 类似地修改 ddl_data 和 doc_data 的处理
-        ddl_data = self.ddl_collection.get()
-
-        if ddl_data is not None:
-            # Extract the documents and ids
-            documents = [doc for doc in ddl_data["documents"]]
-            ids = ddl_data["ids"]
-            metadatas = ddl_data.get("metadatas", [{"title": "", "note": ""} for _ in ids])
-
-            # Create a DataFrame
-            df_ddl = pd.DataFrame(
-                {
-                    "id": ids,
-                    "question": [None for doc in documents],
-                    "content": [doc for doc in documents],
-                    "title": [meta.get("title", "") for meta in metadatas],
-                    "note": [meta.get("note", "") for meta in metadatas],
-                }
-            )
-
-            df_ddl["training_data_type"] = "ddl"
+    def add_question_sql(self, question: str, sql: str, **kwargs) -> str:
+        return self._add_training_record(TrainingItem(
+            TrainingItem.ITEM_TYPE_SQL, sql, question=question, title=kwargs.get("title"), note=kwargs.get("note")
+        ))
 
-            df = pd.concat([df, df_ddl])
+    def add_ddl(self, ddl: str, **kwargs) -> str:
+        return self._add_training_record(TrainingItem(
+            TrainingItem.ITEM_TYPE_DDL, ddl, title=kwargs.get("title"), note=kwargs.get("note")
+        ))
 
-        doc_data = self.documentation_collection.get()
+    def add_documentation(self, documentation: str, **kwargs) -> str:
+        return self._add_training_record(TrainingItem(
+            TrainingItem.ITEM_TYPE_DOCUMENTATION, documentation, title=kwargs.get("title"), note=kwargs.get("note")
+        ))
 
-        if doc_data is not None:
-            # Extract the documents and ids
-            documents = [doc for doc in doc_data["documents"]]
-            ids = doc_data["ids"]
-            metadatas = doc_data.get("metadatas", [{"title": "", "note": ""} for _ in ids])
+    def _add_training_batch(self, items: List[TrainingItem]) -> List[str]:
+        """
+        Embed and insert a batch with one embedding call and one `add` per collection.
 
-            # Create a DataFrame
-            df_doc = pd.DataFrame(
-                {
-                    "id": ids,
-                    "question": [None for doc in documents],
-                    "content": [doc for doc in documents],
-                    "title": [meta.get("title", "") for meta in metadatas],
-                    "note": [meta.get("note", "") for meta in metadatas],
-                }
-            )
+        Records that are already stored (same ID) or repeated within the batch are not embedded again.
+        """
+        ids = []
+        pending = {}
+        for item in items:
+            collection, id, document, metadata = self._training_record(item)
+            ids.append(id)
+            records = pending.setdefault(collection.name, (collection, {}))[1]
+            records.setdefault(id, (document, metadata))
+
+        for collection, records in pending.values():
+            existing = set(collection.get(ids=list(records), include=[])["ids"])
+            new_ids = [id for id in records if id not in existing]
+            if not new_ids:
+                continue
+
+            documents = [records[id][0] for id in new_ids]
+            with span("training.batch", collection=collection.name, batch_size=len(new_ids)):
+                embeddings, lexical_weights = self._embed_documents(documents)
+                collection.add(
+                    documents=documents,
+                    embeddings=embeddings,
+                    ids=new_ids,
+                    metadatas=[records[id][1] for id in new_ids],
+                )
+                if lexical_weights is not None:
+                    self.lexical_index.add(collection.name, new_ids, lexical_weights)
+
+        return ids
+
+    def add_training_batch(self, items: List[TrainingItem], batch_size: int = None, progress=None) -> List[str]:
+        # Chroma rejects writes larger than the client's max batch size
+        max_batch_size = getattr(self.chroma_client, "get_max_batch_size", lambda: None)()
+        batch_size = batch_size or self.config.get("training_batch_size", self.TRAINING_BATCH_SIZE)
+        if max_batch_size:
+            batch_size = min(batch_size, max_batch_size)
+        return super().add_training_batch(items, batch_size=batch_size, progress=progress)
+
+    TRAINING_DATA_COLUMNS = ["id", "question", "content", "title", "note", "training_data_type"]
+
+    # Shortest text filter Chroma's full-text index can match
+    MIN_CONTAINS_LENGTH = 3
+
+    def _training_collections(self, training_data_type: str = None) -> list:
+        """The (training data type, collection) pairs to read, in listing order."""
+        collections = [
+            ("sql", self.sql_collection),
+            ("ddl", self.ddl_collection),
+            ("documentation", self.documentation_collection),
+        ]
+        if training_data_type is None:
+            return collections
+        return [(data_type, collection) for data_type, collection in collections if data_type == training_data_type]
+
+    def _training_frame(self, training_data_type: str, data: dict) -> pd.DataFrame:
+        """Turn the result of a collection `get` into training data rows."""
+        ids = data["ids"]
+        if not ids:
+            return pd.DataFrame(columns=self.TRAINING_DATA_COLUMNS)
+
+        documents = data.get("documents") or [None] * len(ids)
+        metadatas = [metadata or {} for metadata in (data.get("metadatas") or [None] * len(ids))]
+
+        if training_data_type == "sql":
+            # 问题-SQL 以 JSON 存储，解析失败的记录内容为空
+            parsed = []
+            for document in documents:
+                try:
+                    parsed.append(json.loads(document))
+                except Exception:
+                    parsed.append({})
+            questions = [doc.get("question", "") for doc in parsed]
+            contents = [doc.get("sql", "") for doc in parsed]
+        else:
+            questions = [None] * len(ids)
+            contents = documents
 
-            df_doc["training_data_type"] = "documentation"
+        return pd.DataFrame(
+            {
+                "id": ids,
+                "question": questions,
+                "content": contents,
+                "title": [metadata.get("title", "") for metadata in metadatas],
+                "note": [metadata.get("note", "") for metadata in metadatas],
+                "training_data_type": training_data_type,
+            },
+            columns=self.TRAINING_DATA_COLUMNS,
+        )
 
-            df = pd.concat([df, df_doc])
+    def get_training_data(self, **kwargs) -> pd.DataFrame:
+        frames = [
+            self._training_frame(data_type, collection.get(include=["documents", "metadatas"]))
+            for data_type, collection in self._training_collections()
+        ]
+        return pd.concat(frames)
+
+    def get_training_data_page(
+        self,
+        limit: int = None,
+        offset: int = 0,
+        training_data_type: str = None,
+        title: str = None,
+        text: str = None,
+        **kwargs,
+    ) -> Tuple[pd.DataFrame, int]:
+        """
+        Page through the training data with Chroma's `limit`/`offset`/`where`, reading only the rows
+        of the page. Matches are counted from their IDs alone (or `count()` without filters).
 
-        print(f"最终返回的数据框: {df}")
-        return df
+        The title filter is an exact match (Chroma metadata filters compare whole values);
+        the text filter is a substring of the stored document.
+        """
+        where = {"title": title} if title else None
+        # Chroma matches `$contains` through a trigram index, which misses shorter (e.g. two-character
+        # Chinese) terms, so those are matched here against the documents of the filtered rows
+        match_locally = bool(text) and len(text) < self.MIN_CONTAINS_LENGTH
+        where_document = {"$contains": text} if text and not match_locally else None
+
+        frames = []
+        total = 0
+        remaining = limit
+        for data_type, collection in self._training_collections(training_data_type):
+            matching_ids = None
+            if match_locally:
+                data = collection.get(where=where, include=["documents"])
+                matching_ids = [id for id, document in zip(data["ids"], data["documents"]) if text in document]
+                count = len(matching_ids)
+            elif where is None and where_document is None:
+                count = collection.count()
+            else:
+                count = len(collection.get(where=where, where_document=where_document, include=[])["ids"])
+
+            # The page offset within this collection
+            start = max(offset - total, 0)
+            total += count
+            if start >= count or (remaining is not None and remaining <= 0):
+                continue
+
+            if matching_ids is not None:
+                end = None if remaining is None else start + remaining
+                data = collection.get(ids=matching_ids[start:end], include=["documents", "metadatas"])
+            else:
+                data = collection.get(
+                    where=where,
+                    where_document=where_document,
+                    limit=remaining,
+                    offset=start,
+                    include=["documents", "metadatas"],
+                )
+            frames.append(self._training_frame(data_type, data))
+            if remaining is not None:
+                remaining -= len(data["ids"])
+
+        df = pd.concat(frames) if frames else pd.DataFrame(columns=self.TRAINING_DATA_COLUMNS)
+        return df, total
 
     def remove_training_data(self, id: str, **kwargs) -> bool:
         if id.endswith("-sql"):
-            self.sql_collection.delete(ids=id)
-            return True
+            collection = self.sql_collection
         elif id.endswith("-ddl"):
-            self.ddl_collection.delete(ids=id)
-            return True
+            collection = self.ddl_collection
         elif id.endswith("-doc"):
-            self.documentation_collection.delete(ids=id)
-            return True
+            collection = self.documentation_collection
         else:
             return False
 
+        collection.delete(ids=id)
+        if self.lexical_index is not None:
+            self.lexical_index.remove(collection.name, [id])
+        return True
+
     def remove_collection(self, collection_name: str) -> bool:
         """
         This function can reset the collection to empty state.
@@ -272,6 +547,9 @@ class ChromaDB_VectorStore(VannaBase):
         Returns:
             bool: True if collection is deleted, False otherwise
         """
+        if self.lexical_index is not None and collection_name in ("sql", "ddl", "documentation"):
+            self.lexical_index.clear(collection_name)
+
         if collection_name == "sql":
             self.chroma_client.delete_collection(name="sql")
             self.sql_collection = self.chroma_client.get_or_create_collection(
@@ -321,71 +599,89 @@ class ChromaDB_VectorStore(VannaBase):
             return documents
         return []
 
-    def get_similar_question_sql(self, question: str, **kwargs) -> list:
+    def _sync_lexical_index(self, collection) -> None:
+        """Index the lexical weights of records stored before hybrid mode was enabled, once per collection."""
+        if collection.name in self._lexical_synced:
+            return
+        with self._lexical_sync_lock:
+            if collection.name in self._lexical_synced:
+                return
+            stored = set(collection.get(include=[])["ids"])
+            indexed = self.lexical_index.ids(collection.name)
+            self.lexical_index.remove(collection.name, indexed - stored)
+            missing = list(stored - indexed)
+            if missing:
+                with span("lexical_index.sync", collection=collection.name, documents=len(missing)):
+                    data = collection.get(ids=missing, include=["documents"])
+                    self.lexical_index.add(
+                        collection.name, data["ids"], self.embedding_function.encode_hybrid(data["documents"])[1]
+                    )
+            self._lexical_synced.add(collection.name)
+
+    def _query_documents(self, collection, question: str, n_results: int, **kwargs) -> List[str]:
+        """
+        The documents of a collection related to a question: the nearest ones within the
+        `min_similarity` distance (default 0.9), fused in hybrid mode with the lexical matches above
+        the `min_lexical_score` floor.
+        """
         min_similarity = kwargs.get("min_similarity", 0.9)
-        print(f"开始召回相关SQL: question={question}")
-        results = self.sql_collection.query(
-            query_texts=[question],
-            n_results=self.n_results_sql
+        if self.lexical_index is None:
+            results = collection.query(
+                query_embeddings=[self._query_embedding(question, **kwargs)],
+                n_results=n_results
+            )
+            return [
+                document for document, distance in zip(results["documents"][0], results["distances"][0])
+                if distance < min_similarity
+            ]
+
+        self._sync_lexical_index(collection)
+        n_candidates = max(n_results, self.hybrid_candidates)
+        results = collection.query(
+            query_embeddings=[self._query_embedding(question, **kwargs)],
+            n_results=n_candidates
+        )
+        documents = dict(zip(results["ids"][0], results["documents"][0]))
+        # Chroma's default l2 distance of normalized vectors is 2 - 2 * cosine similarity
+        dense = [
+            (id, 1 - distance / 2) for id, distance in zip(results["ids"][0], results["distances"][0])
+            if distance < min_similarity
+        ]
+        lexical = self.lexical_index.search(
+            collection.name, self._query_lexical_weights(question, **kwargs), n_candidates,
+            min_score=kwargs.get("min_lexical_score", self.hybrid_min_lexical_score),
+            min_relative_score=self.hybrid_min_lexical_ratio,
         )
-        # 添加过滤逻辑
-        filtered_results = {"documents": []}
-        if "documents" in results and "distances" in results:
-            filtered_documents = []
-            for i, distance in enumerate(results['distances'][0]):  # 获取第一个查询的距离结果
-                if distance < min_similarity:  # 比较单个浮点数
-                    if i < len(results['documents'][0]):  # 确保索引有效
-                        filtered_documents.append(results['documents'][0][i])
-            
-            # 创建一个新的结果字典，保持原始结构
-            filtered_results = {"documents": [filtered_documents]}
-            print(f"过滤后的SQL结果: filtered_results={filtered_results}")
-            return ChromaDB_VectorStore._extract_documents(filtered_results)
-        
-        return ChromaDB_VectorStore._extract_documents(results)
+
+        if self.hybrid_fusion == "weighted":
+            ids = weighted_fusion(dense, lexical, self.hybrid_lexical_weight)
+        else:
+            ids = reciprocal_rank_fusion([[id for id, _ in dense], [id for id, _ in lexical]], k=self.hybrid_rrf_k)
+        ids = ids[:n_results]
+
+        missing = [id for id in ids if id not in documents]
+        if missing:
+            # Lexical matches outside the dense candidates
+            data = collection.get(ids=missing, include=["documents"])
+            documents.update(zip(data["ids"], data["documents"]))
+        return [documents[id] for id in ids if id in documents]
+
+    def get_similar_question_sql(self, question: str, **kwargs) -> list:
+        print(f"开始召回相关SQL: question={question}")
+        filtered_results = {"documents": [self._query_documents(self.sql_collection, question, self.n_results_sql, **kwargs)]}
+        print(f"过滤后的SQL结果: filtered_results={filtered_results}")
+        return ChromaDB_VectorStore._extract_documents(filtered_results)
 
     def get_related_ddl(self, question: str, **kwargs) -> list:
-        min_similarity = kwargs.get("min_similarity", 0.9)
         print(f"开始召回相关 DDL: question={question}")
-        results = self.ddl_collection.query(
-            query_texts=[question],
-            n_results=self.n_results_ddl
-        )
-        # 添加过滤逻辑
-        filtered_results = {"documents": []}
-        if "documents" in results and "distances" in results:
-            filtered_documents = []
-            for i, distance in enumerate(results['distances'][0]):  # 获取第一个查询的距离结果
-                if distance < min_similarity:  # 比较单个浮点数
-                    if i < len(results['documents'][0]):  # 确保索引有效
-                        filtered_documents.append(results['documents'][0][i])
-            
-            # 创建一个新的结果字典，保持原始结构
-            filtered_results = {"documents": [filtered_documents]}
-            print(f"过滤后的DDL结果: filtered_results={filtered_results}")
-            return ChromaDB_VectorStore._extract_documents(filtered_results)
-        
-        return ChromaDB_VectorStore._extract_documents(results)
+        filtered_results = {"documents": [self._query_documents(self.ddl_collection, question, self.n_results_ddl, **kwargs)]}
+        print(f"过滤后的DDL结果: filtered_results={filtered_results}")
+        return ChromaDB_VectorStore._extract_documents(filtered_results)
 
     def get_related_documentation(self, question: str, **kwargs) -> list:
-        min_similarity = kwargs.get("min_similarity", 0.9)
         print(f"开始召回相关文档: question={question}")
-        results = self.documentation_collection.query(
-            query_texts=[question],
-            n_results=self.n_results_documentation
-        )
-        
-        # 修复过滤逻辑，确保返回正确的数据结构
-        if "documents" in results and "distances" in results:
-            filtered_documents = []
-            for i, distance in enumerate(results['distances'][0]):  # 获取第一个查询的距离结果
-                if distance < min_similarity:  # 比较单个浮点数
-                    if i < len(results['documents'][0]):  # 确保索引有效
-                        filtered_documents.append(results['documents'][0][i])
-            
-            # 创建一个新的结果字典，保持原始结构
-            filtered_results = {"documents": [filtered_documents]}
-            print(f"召回相关文档并过滤完成: filtered_results={filtered_results}")
-            return ChromaDB_VectorStore._extract_documents(filtered_results)
-        
-        return ChromaDB_VectorStore._extract_documents(results)
+        filtered_results = {"documents": [
+            self._query_documents(self.documentation_collection, question, self.n_results_documentation, **kwargs)
+        ]}
+        print(f"召回相关文档并过滤完成: filtered_results={filtered_results}")
+        return ChromaDB_VectorStore._extract_documents(filtered_results)
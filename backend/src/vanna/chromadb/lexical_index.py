@@ -0,0 +1,148 @@
+import heapq
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Sequence, Set, Tuple, Union
+
+# BGE-M3 lexical weights: token ID (as a string) -> weight
+LexicalWeights = Dict[str, float]
+
+
+class LexicalIndex:
+    """
+    An inverted index of sparse (BGE-M3 lexical) weights, one per Chroma collection.
+
+    A document's score for a query is the sum of the products of the weights of the tokens
+    they share, as in BGE-M3's `compute_lexical_matching_score`. Only the postings of the
+    query's tokens are visited, so exact identifiers such as table and column names are
+    matched without scanning every document.
+
+    The postings are kept in memory. When `path` is set, the weights are also stored in a
+    SQLite file and loaded back on start.
+
+    Args:
+        path (str): Optional SQLite file for the weights.
+    """
+
+    def __init__(self, path: Union[str, None] = None):
+        # collection -> token -> {document ID: weight}
+        self._postings: Dict[str, Dict[str, Dict[str, float]]] = {}
+        # collection -> document ID -> weights, to remove a document's postings
+        self._documents: Dict[str, Dict[str, LexicalWeights]] = {}
+        self._lock = threading.Lock()
+
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS lexical_weights ("
+                "collection TEXT NOT NULL, id TEXT NOT NULL, weights TEXT NOT NULL, PRIMARY KEY (collection, id))"
+            )
+            self._db.commit()
+            for collection, id, weights in self._db.execute("SELECT collection, id, weights FROM lexical_weights"):
+                self._index(collection, id, json.loads(weights))
+
+    def _index(self, collection: str, id: str, weights: LexicalWeights) -> None:
+        self._unindex(collection, id)
+        postings = self._postings.setdefault(collection, {})
+        for token, weight in weights.items():
+            postings.setdefault(token, {})[id] = weight
+        self._documents.setdefault(collection, {})[id] = weights
+
+    def _unindex(self, collection: str, id: str) -> None:
+        weights = self._documents.get(collection, {}).pop(id, None)
+        if weights is None:
+            return
+        postings = self._postings[collection]
+        for token in weights:
+            documents = postings.get(token)
+            if documents is not None:
+                documents.pop(id, None)
+                if not documents:
+                    del postings[token]
+
+    def add(self, collection: str, ids: Sequence[str], weights: Sequence[LexicalWeights]) -> None:
+        """Index (or re-index) the weights of several documents."""
+        weights = [{str(token): float(weight) for token, weight in document.items()} for document in weights]
+        with self._lock:
+            for id, document in zip(ids, weights):
+                self._index(collection, id, document)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO lexical_weights (collection, id, weights) VALUES (?, ?, ?)",
+                    [(collection, id, json.dumps(document)) for id, document in zip(ids, weights)],
+                )
+                self._db.commit()
+
+    def remove(self, collection: str, ids: Iterable[str]) -> None:
+        ids = list(ids)
+        with self._lock:
+            for id in ids:
+                self._unindex(collection, id)
+            if self._db is not None:
+                self._db.executemany(
+                    "DELETE FROM lexical_weights WHERE collection = ? AND id = ?", [(collection, id) for id in ids]
+                )
+                self._db.commit()
+
+    def clear(self, collection: str) -> None:
+        with self._lock:
+            self._postings.pop(collection, None)
+            self._documents.pop(collection, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM lexical_weights WHERE collection = ?", (collection,))
+                self._db.commit()
+
+    def ids(self, collection: str) -> Set[str]:
+        """The IDs of the documents indexed for a collection."""
+        with self._lock:
+            return set(self._documents.get(collection, {}))
+
+    def search(self, collection: str, weights: LexicalWeights, n_results: int, min_score: float = 0.0,
+               min_relative_score: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        The best matching documents of a collection for the weights of a query.
+
+        A single shared common token (的, 表, 数...) gives any document a small positive score,
+        so matches are only kept above a floor: at least `min_score`, and at least
+        `min_relative_score` times the best score.
+
+        Returns:
+            List[Tuple[str, float]]: Up to `n_results` (document ID, score) pairs above the floor, best first.
+        """
+        scores: Dict[str, float] = {}
+        with self._lock:
+            postings = self._postings.get(collection, {})
+            for token, query_weight in weights.items():
+                for id, weight in postings.get(str(token), {}).items():
+                    scores[id] = scores.get(id, 0.0) + float(query_weight) * weight
+        best = max(scores.values(), default=0.0)
+        floor = max(min_score, min_relative_score * best)
+        return heapq.nlargest(
+            n_results, ((id, score) for id, score in scores.items() if score > 0 and score >= floor), key=lambda x: x[1]
+        )
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[str]:
+    """
+    Merge rankings by reciprocal rank fusion: a document scores the sum of 1 / (k + rank) over
+    the rankings it appears in. Ties keep the order of the first ranking.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, id in enumerate(ranking, start=1):
+            scores[id] = scores.get(id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def weighted_fusion(dense: Sequence[Tuple[str, float]], lexical: Sequence[Tuple[str, float]],
+                    lexical_weight: float = 0.3) -> List[str]:
+    """
+    Merge scored results by a weighted sum of the dense similarity (0 to 1) and the lexical
+    score scaled by the best lexical score, so that the two are on the same scale.
+    """
+    scores: Dict[str, float] = {id: (1 - lexical_weight) * similarity for id, similarity in dense}
+    best = max((score for _, score in lexical), default=0.0)
+    for id, score in lexical:
+        scores[id] = scores.get(id, 0.0) + lexical_weight * score / best
+    return sorted(scores, key=scores.get, reverse=True)
@@ -0,0 +1,154 @@
+from typing import Callable, List, Union
+
+import pandas as pd
+
+# Columns with at most this many distinct values are treated as categories for group totals
+GROUP_MAX_CARDINALITY = 20
+
+
+def _approx_tokens(text: str) -> float:
+    return len(text) / 4
+
+
+def _fmt(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    return str(value)
+
+
+def _column_stats(df: pd.DataFrame, top_k: int) -> List[str]:
+    lines = []
+    for column in df.columns:
+        series = df[column]
+        nulls = int(series.isna().sum())
+        parts = [f"{column} ({series.dtype})", f"nulls={nulls}"]
+        non_null = series.dropna()
+
+        if pd.api.types.is_bool_dtype(series.dtype):
+            parts.append(f"true={int(non_null.sum())}")
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            if len(non_null):
+                parts.append(
+                    f"min={_fmt(non_null.min())} max={_fmt(non_null.max())} "
+                    f"mean={_fmt(float(non_null.mean()))} sum={_fmt(non_null.sum())}"
+                )
+        elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+            if len(non_null):
+                parts.append(f"min={non_null.min()} max={non_null.max()}")
+        else:
+            as_text = non_null.astype(str)
+            counts = as_text.value_counts()
+            parts.append(f"distinct={len(counts)}")
+            if len(counts) and counts.iloc[0] == 1:
+                parts.append("all values distinct")
+            elif len(counts):
+                top = ", ".join(f"{value[:40]}: {count}" for value, count in counts.head(top_k).items())
+                parts.append(f"top: {top}")
+
+        lines.append("- " + "; ".join(parts))
+    return lines
+
+
+def _group_totals(df: pd.DataFrame, top_k: int) -> Union[str, None]:
+    numeric = [
+        column for column in df.columns
+        if pd.api.types.is_numeric_dtype(df[column].dtype) and not pd.api.types.is_bool_dtype(df[column].dtype)
+    ]
+    if not numeric:
+        return None
+
+    for column in df.columns:
+        if column in numeric:
+            continue
+        cardinality = df[column].nunique(dropna=True)
+        if 1 < cardinality <= GROUP_MAX_CARDINALITY and cardinality < len(df):
+            totals = df.groupby(column, dropna=True)[numeric].sum()
+            totals = totals.sort_values(numeric[0], ascending=False).head(top_k)
+            return f"Totals of the numeric columns by {column} (top {len(totals)} of {cardinality}):\n{totals.to_markdown()}"
+    return None
+
+
+def _unique_columns(df: pd.DataFrame) -> pd.DataFrame:
+    # Column lookups by name return a DataFrame for duplicated names (e.g. two columns aliased alike)
+    if not df.columns.duplicated().any():
+        return df
+    seen = {}
+    columns = []
+    for column in df.columns:
+        count = seen.get(column, 0)
+        seen[column] = count + 1
+        columns.append(column if count == 0 else f"{column}.{count}")
+    return df.set_axis(columns, axis=1)
+
+
+def build_result_digest(
+    df: pd.DataFrame,
+    max_tokens: int = 2000,
+    token_counter: Union[Callable[[str], float], None] = None,
+    sample_rows: int = 5,
+    top_k: int = 5,
+) -> str:
+    """
+    Describe a query result for an LLM prompt within a token budget.
+
+    Small results that fit the budget are rendered in full with `df.to_markdown()`, exactly as before.
+    Larger results are replaced by a digest: the row and column counts, per-column statistics
+    (null counts, min/max/mean/sum of numeric columns, top-k values of categorical columns),
+    group totals over the first low-cardinality column, and head/tail samples. Sections are
+    added in order of usefulness until the budget is used up.
+
+    Args:
+        df (pd.DataFrame): The query result.
+        max_tokens (int): Token budget of the returned text.
+        token_counter (Callable): Counts the tokens of a string, defaults to ~4 characters per token.
+        sample_rows (int): Rows shown from the head and from the tail of the result.
+        top_k (int): Values shown per categorical column and groups shown in the totals.
+
+    Returns:
+        str: The markdown table or the digest.
+    """
+    count = token_counter or _approx_tokens
+
+    # The full table is only rendered when its rough size can fit, so a 20k row result is never formatted
+    if len(df) * max(len(df.columns), 1) <= max_tokens:
+        full = df.to_markdown()
+        if count(full) <= max_tokens:
+            return full
+
+    df = _unique_columns(df)
+    sections = [f"The result has {len(df)} rows and {len(df.columns)} columns. Only a digest is shown."]
+    used = count(sections[0])
+
+    def add(text: Union[str, None]) -> bool:
+        nonlocal used
+        if not text:
+            return False
+        tokens = count(text)
+        if used + tokens > max_tokens:
+            return False
+        sections.append(text)
+        used += tokens
+        return True
+
+    stats = _column_stats(df, top_k)
+    if not add("Column statistics:\n" + "\n".join(stats)):
+        # Too many columns: keep as many statistics lines as fit
+        kept = []
+        for line in stats:
+            if used + count("\n".join(kept + [line])) > max_tokens:
+                break
+            kept.append(line)
+        add("Column statistics (truncated):\n" + "\n".join(kept) if kept else None)
+
+    rows = sample_rows
+    while rows > 0 and not add(f"First {rows} rows:\n{df.head(rows).to_markdown()}"):
+        rows //= 2
+
+    add(_group_totals(df, top_k))
+
+    if len(df) > sample_rows:
+        rows = sample_rows
+        while rows > 0 and not add(f"Last {rows} rows:\n{df.tail(rows).to_markdown()}"):
+            rows //= 2
+
+    return "\n\n".join(sections)
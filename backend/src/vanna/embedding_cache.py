@@ -0,0 +1,127 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Sequence, Union
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    A content-hash keyed LRU cache of embedding vectors with an optional on-disk store.
+
+    Keys are the SHA-256 of the namespace (usually the model name) and the text, so the
+    same text embedded by two different models never collides. When `path` is set,
+    vectors are also persisted to a SQLite file and survive restarts; disk hits are
+    promoted back into memory.
+
+    Vectors are kept as read-only float32 numpy arrays (4 bytes per dimension, against
+    about 32 for a list of Python floats); callers convert them where a list is needed.
+
+    Args:
+        max_entries (int): Maximum number of vectors kept in memory.
+        path (str): Optional SQLite file for the on-disk store.
+        namespace (str): Prefix mixed into every key, e.g. the model name.
+    """
+
+    def __init__(self, max_entries: int = 4096, path: Union[str, None] = None, namespace: str = ""):
+        self.max_entries = max_entries
+        self.namespace = namespace
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get_many(self, texts: Sequence[str]) -> List[Union[np.ndarray, None]]:
+        """
+        Look up the vectors of several texts at once.
+
+        Returns:
+            List: One float32 vector per text, or None where the text is not cached.
+        """
+        keys = [self._key(text) for text in texts]
+        results: List[Union[np.ndarray, None]] = [None] * len(keys)
+        missing = []
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    results[i] = vector
+                else:
+                    missing.append(i)
+
+            if missing and self._db is not None:
+                placeholders = ",".join("?" * len(missing))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    [keys[i] for i in missing],
+                ).fetchall()
+                found = {key: np.frombuffer(blob, dtype=np.float32) for key, blob in rows}
+                still_missing = []
+                for i in missing:
+                    vector = found.get(keys[i])
+                    if vector is not None:
+                        self._remember(keys[i], vector)
+                        self._stats["disk_hits"] += 1
+                        results[i] = vector
+                    else:
+                        still_missing.append(i)
+                missing = still_missing
+
+            self._stats["misses"] += len(missing)
+
+        return results
+
+    def set_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """Store the vectors of several texts at once."""
+        with self._lock:
+            rows = []
+            for text, vector in zip(texts, vectors):
+                key = self._key(text)
+                # Copy, so that a row of a batch matrix does not keep the whole matrix alive
+                vector = np.array(vector, dtype=np.float32)
+                vector.flags.writeable = False
+                self._remember(key, vector)
+                if self._db is not None:
+                    rows.append((key, vector.tobytes()))
+
+            if rows:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows
+                )
+                self._db.commit()
+
+    def clear(self) -> None:
+        """Drop every in-memory vector; the on-disk store is kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "persistent": self._db is not None,
+                **self._stats,
+            }
@@ -44,3 +44,9 @@ class APIError(Exception):
     """Raise for API errors"""
 
     pass
+
+
+class StageTimeoutError(Exception):
+    """Raise when a pipeline stage exceeds its time budget"""
+
+    pass
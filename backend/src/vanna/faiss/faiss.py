@@ -1,5 +1,7 @@
-import os 
+import atexit
+import os
 import json
+import threading
 import uuid
 from typing import List, Dict, Any
 
@@ -9,14 +11,334 @@ import pandas as pd
 
 from ..base import VannaBase
 from ..exceptions import DependencyError
+from ..types import TrainingItem
+
+METRICS = {
+    "l2": faiss.METRIC_L2,
+    "ip": faiss.METRIC_INNER_PRODUCT,
+}
+
+
+def _base_index(index):
+    """The index holding the vectors, below the `IndexIDMap2` if there is one."""
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def _stored_ids(index) -> np.ndarray:
+    """The IDs of the vectors an index holds."""
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.vector_to_array(index.id_map)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is None:
+        return np.arange(index.ntotal, dtype=np.int64)
+    invlists = ivf.invlists
+    ids = [
+        faiss.rev_swig_ptr(invlists.get_ids(list_no), invlists.list_size(list_no)).copy()
+        for list_no in range(ivf.nlist) if invlists.list_size(list_no)
+    ]
+    return np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+
+
+class _IndexSpec:
+    """
+    How the store builds its indexes, from the FAISS config:
+
+    - `index_type`: "flat" (exact), "hnsw", "ivf" or "ivfpq", or `index_factory` for any
+      FAISS factory string.
+    - `metric`: "l2", or "ip" (inner product). With "ip" vectors are L2-normalized, so
+      scores are cosine similarities.
+    - HNSW: `hnsw_m`, `hnsw_ef_construction`, `hnsw_ef_search`.
+    - IVF: `ivf_nlist`, `ivf_nprobe`, and for PQ `pq_m` (sub-quantizers) and `pq_bits`.
+
+    Index types that need training (IVF, PQ) keep an exact flat index until a collection
+    holds `ivf_train_size` vectors, then train on all of them and switch over.
+    """
+
+    def __init__(self, dimension: int, config: dict):
+        self.dimension = dimension
+        metric = config.get("metric", "l2")
+        if metric not in METRICS:
+            raise ValueError(f"Unsupported FAISS metric: {metric}")
+        self.metric = METRICS[metric]
+        self.normalize = self.metric == faiss.METRIC_INNER_PRODUCT
+
+        self.hnsw_ef_construction = config.get("hnsw_ef_construction", 200)
+        self.hnsw_ef_search = config.get("hnsw_ef_search", 64)
+        self.ivf_nprobe = config.get("ivf_nprobe", 10)
+
+        index_type = config.get("index_type", "flat")
+        nlist = config.get("ivf_nlist", 100)
+        pq_bits = config.get("pq_bits", 8)
+        descriptions = {
+            "flat": "Flat",
+            "hnsw": f"HNSW{config.get('hnsw_m', 32)}",
+            "ivf": f"IVF{nlist},Flat",
+            "ivfpq": f"IVF{nlist},PQ{config.get('pq_m', 8)}x{pq_bits}",
+        }
+        if config.get("index_factory"):
+            self.description = config["index_factory"]
+        elif index_type in descriptions:
+            self.description = descriptions[index_type]
+        else:
+            raise ValueError(f"Unsupported FAISS index type: {index_type}")
+
+        self.requires_training = not self.create().is_trained
+        # FAISS recommends at least 39 training points per k-means centroid
+        default_train_size = 39 * nlist
+        if "PQ" in self.description:
+            default_train_size = max(default_train_size, 39 * 2 ** pq_bits)
+        self.train_size = config.get("ivf_train_size", default_train_size)
+
+    def create(self):
+        """
+        An empty index of the configured type. IVF indexes store the vectors under their IDs
+        themselves, with a hash table direct map to reconstruct and remove them by ID (removing
+        through an `IndexIDMap` would renumber them); other indexes are wrapped in an `IndexIDMap2`.
+        """
+        index = faiss.index_factory(self.dimension, self.description, self.metric)
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+        else:
+            index = faiss.index_factory(self.dimension, "IDMap2," + self.description, self.metric)
+        base = _base_index(index)
+        if isinstance(base, faiss.IndexHNSW):
+            base.hnsw.efConstruction = self.hnsw_ef_construction
+        self.configure(index)
+        return index
+
+    def create_exact(self):
+        return faiss.index_factory(self.dimension, "IDMap2,Flat", self.metric)
+
+    def configure(self, index) -> None:
+        """Apply the search-time parameters, which are not taken from index files."""
+        base = _base_index(index)
+        if isinstance(base, faiss.IndexHNSW):
+            base.hnsw.efSearch = self.hnsw_ef_search
+        ivf = faiss.try_extract_index_ivf(base)
+        if ivf is not None:
+            ivf.nprobe = self.ivf_nprobe
+
+    def is_staging(self, index) -> bool:
+        """Whether an index is the exact index used until the configured one can be trained."""
+        return self.requires_training and isinstance(_base_index(index), faiss.IndexFlat)
+
+    def matches(self, index) -> bool:
+        """Whether an index is of the configured type, or the exact index used before training."""
+        if index.metric_type != self.metric:
+            return False
+        if self.is_staging(index):
+            return True
+        expected = self.create()
+        # Read and factory-built indexes can differ by subclass (IndexFlatL2 and IndexFlat)
+        base, expected_base = _base_index(index), _base_index(expected)
+        return isinstance(base, type(expected_base)) or isinstance(expected_base, type(base))
+
+
+class _FaissCollection:
+    """
+    A FAISS index and the metadata of its vectors.
+
+    Vectors are added under sequential int64 IDs (see `_IndexSpec.create`), so an entry is
+    deleted with `remove_ids` without re-embedding or re-adding any other vector. The IDs are
+    stored with the metadata (`faiss_id`) and survive restarts. Indexes that cannot remove
+    vectors (HNSW) drop the entry and leave the vector as a tombstone that searches skip;
+    the index is rebuilt from its stored vectors once a quarter of them are tombstones.
+    """
+
+    def __init__(self, name: str, index_file: str, metadata_file: str, index, metadata: List[Dict[str, Any]],
+                 spec: _IndexSpec, path: str = ".", mapped: bool = False, adopt: bool = False):
+        self.name = name
+        self.index_file = index_file
+        self.metadata_file = metadata_file
+        self.path = os.path.join(path, index_file)
+        self.spec = spec
+        # Loaded memory-mapped: IVF lists are then read-only until the index is loaded into memory
+        self.mapped = mapped
+        self.entries: Dict[int, Dict[str, Any]] = {}
+        self.faiss_ids: Dict[str, int] = {}
+
+        if not isinstance(index, faiss.IndexFlat):
+            self.index = index
+            # The index and metadata files are replaced one after the other, so after a crash
+            # between the two writes they can disagree: entries without a vector are dropped,
+            # and vectors without an entry are removed (or kept as tombstones)
+            stored = _stored_ids(index)
+            stored_set = set(stored.tolist())
+            for entry in metadata:
+                entry = dict(entry)
+                faiss_id = int(entry.pop("faiss_id"))
+                if faiss_id in stored_set:
+                    self._register(faiss_id, entry)
+            # IDs of tombstones and orphaned vectors are never handed out again
+            self.next_id = max(max(self.entries, default=-1), int(stored.max(initial=-1))) + 1
+            if not index.is_trained or (not adopt and not spec.matches(index)):
+                # A new index that needs training, or the configured index type changed:
+                # rebuild from the stored vectors
+                self._ensure_writable()
+                self._compact()
+            else:
+                spec.configure(index)
+                orphans = np.array([faiss_id for faiss_id in stored_set if faiss_id not in self.entries], dtype=np.int64)
+                if len(orphans):
+                    self._ensure_writable()
+                    try:
+                        self.index.remove_ids(orphans)
+                    except RuntimeError:
+                        pass  # The index cannot remove vectors: they stay as tombstones
+        else:
+            # Indexes written before IDs were used keep the vectors by position, in metadata order:
+            # move the stored vectors under IDs 0..n-1 instead of embedding the entries again
+            if index.ntotal != len(metadata):
+                raise ValueError(
+                    f"{index_file} has {index.ntotal} vectors but {metadata_file} has {len(metadata)} entries"
+                )
+            vectors = index.reconstruct_n(0, index.ntotal) if index.ntotal else np.empty((0, spec.dimension), dtype=np.float32)
+            for position, entry in enumerate(metadata):
+                self._register(position, dict(entry))
+            self.next_id = len(metadata)
+            self._rebuild(vectors, list(range(len(metadata))))
+
+    def _register(self, faiss_id: int, entry: Dict[str, Any]) -> None:
+        self.entries[faiss_id] = entry
+        self.faiss_ids[entry["id"]] = faiss_id
+
+    @property
+    def tombstones(self) -> int:
+        return self.index.ntotal - len(self.entries)
+
+    def _ensure_writable(self) -> None:
+        if self.mapped and faiss.try_extract_index_ivf(_base_index(self.index)) is not None:
+            # Reload the unchanged file into memory; nothing was written since it was mapped
+            self.index = faiss.read_index(self.path)
+            self.spec.configure(self.index)
+        self.mapped = False
+
+    def _vectors(self, faiss_ids: List[int]) -> np.ndarray:
+        if not faiss_ids:
+            return np.empty((0, self.spec.dimension), dtype=np.float32)
+        ivf = faiss.try_extract_index_ivf(_base_index(self.index))
+        if ivf is not None and ivf.direct_map.type == faiss.DirectMap.NoMap:
+            ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+        return self.index.reconstruct_batch(np.array(faiss_ids, dtype=np.int64))
+
+    def _rebuild(self, vectors: np.ndarray, faiss_ids: List[int]) -> None:
+        """Build a fresh index of the configured type from stored vectors, training it when it is large enough."""
+        if self.spec.requires_training and len(faiss_ids) < self.spec.train_size:
+            index = self.spec.create_exact()
+        else:
+            index = self.spec.create()
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if self.spec.normalize and len(vectors):
+            faiss.normalize_L2(vectors)
+        if not index.is_trained:
+            index.train(vectors)
+        if len(faiss_ids):
+            index.add_with_ids(vectors, np.array(faiss_ids, dtype=np.int64))
+        self.index = index
+        # The new index lives in memory, not in the mapped file
+        self.mapped = False
+
+    def add(self, vectors: np.ndarray, entries: List[Dict[str, Any]]) -> None:
+        self._ensure_writable()
+        ids = np.arange(self.next_id, self.next_id + len(entries), dtype=np.int64)
+        self.index.add_with_ids(vectors, ids)
+        for faiss_id, entry in zip(ids.tolist(), entries):
+            self._register(faiss_id, entry)
+        self.next_id += len(entries)
+
+        if self.spec.is_staging(self.index) and len(self.entries) >= self.spec.train_size:
+            # First load large enough to train the approximate index on
+            self._compact()
+
+    def remove(self, id: str) -> bool:
+        faiss_id = self.faiss_ids.pop(id, None)
+        if faiss_id is None:
+            return False
+        self._ensure_writable()
+        del self.entries[faiss_id]
+        try:
+            self.index.remove_ids(np.array([faiss_id], dtype=np.int64))
+        except RuntimeError:
+            # The index cannot remove vectors: keep a tombstone until enough accumulate
+            if self.tombstones * 4 >= self.index.ntotal:
+                self._compact()
+        return True
+
+    def _compact(self) -> None:
+        """Rebuild the index from the vectors of the live entries."""
+        faiss_ids = list(self.entries)
+        self._rebuild(self._vectors(faiss_ids), faiss_ids)
+
+    def search(self, vector: np.ndarray, n_results: int) -> List[Dict[str, Any]]:
+        if not self.entries:
+            return []
+        # Ask for extra neighbours to make up for tombstones
+        k = min(n_results + self.tombstones, self.index.ntotal)
+        _, ids = self.index.search(vector, k)
+        results = [self.entries[faiss_id] for faiss_id in ids[0].tolist() if faiss_id in self.entries]
+        return results[:n_results]
+
+    def serialize_metadata(self) -> List[Dict[str, Any]]:
+        return [{"faiss_id": faiss_id, **entry} for faiss_id, entry in self.entries.items()]
+
+
+class _Persister:
+    """
+    Write-behind persistence: changed collections are written by a background thread every
+    `interval` seconds, and by `flush()`. Snapshots are taken under the store lock and the
+    files are written outside of it, each through a temporary file.
+    """
+
+    def __init__(self, store: "FAISS", interval: float):
+        self.store = store
+        self.interval = interval
+        self._dirty = set()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="vanna-faiss-persister", daemon=True)
+        self._thread.start()
+
+    def mark(self, name: str) -> None:
+        self._dirty.add(name)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Failed to persist the FAISS indexes: {e}")
+
+    def flush(self) -> None:
+        with self._write_lock:
+            with self.store._lock:
+                names, self._dirty = self._dirty, set()
+                snapshots = [self.store._snapshot(self.store.collections[name]) for name in names]
+            for snapshot in snapshots:
+                self.store._write(*snapshot)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
 
 class FAISS(VannaBase):
+    # Collection name -> (index file, metadata file)
+    COLLECTIONS = {
+        "sql": ("sql_index.faiss", "sql_metadata.json"),
+        "ddl": ("ddl_index.faiss", "ddl_metadata.json"),
+        "documentation": ("doc_index.faiss", "doc_metadata.json"),
+    }
+
     def __init__(self, config=None):
         if config is None:
             config = {}
-        
+
         VannaBase.__init__(self, config=config)
-        
+
         try:
             import faiss
         except ImportError:
@@ -30,41 +352,54 @@ class FAISS(VannaBase):
             raise DependencyError(
                 "SentenceTransformer is not installed. Please install it with 'pip install sentence-transformers'."
             )
-        
+
         self.path = config.get("path", ".")
         self.embedding_dim = config.get('embedding_dim', 384)
         self.n_results_sql = config.get('n_results_sql', config.get("n_results", 10))
         self.n_results_ddl = config.get('n_results_ddl', config.get("n_results", 10))
         self.n_results_documentation = config.get('n_results_documentation', config.get("n_results", 10))
         self.curr_client = config.get("client", "persistent")
+        self.index_spec = _IndexSpec(self.embedding_dim, config)
+        # Memory-map index files on load (not on Windows, where a mapped file cannot be replaced)
+        self.mmap = config.get("mmap", os.name != "nt")
+        # Searches and updates of an index must not overlap
+        self._lock = threading.RLock()
 
+        adopt = False
         if self.curr_client == 'persistent':
-            self.sql_index = self._load_or_create_index('sql_index.faiss')
-            self.ddl_index = self._load_or_create_index('ddl_index.faiss')
-            self.doc_index = self._load_or_create_index('doc_index.faiss')
+            loaded = [self._load_or_create_index(index_file) for index_file, _ in self.COLLECTIONS.values()]
         elif self.curr_client == 'in-memory':
-            self.sql_index = faiss.IndexFlatL2(self.embedding_dim)
-            self.ddl_index = faiss.IndexFlatL2(self.embedding_dim)
-            self.doc_index = faiss.IndexFlatL2(self.embedding_dim)
+            loaded = [(self.index_spec.create(), False) for _ in self.COLLECTIONS]
         elif isinstance(self.curr_client, list) and len(self.curr_client) == 3 and all(isinstance(idx, faiss.Index) for idx in self.curr_client):
-            self.sql_index = self.curr_client[0]
-            self.ddl_index = self.curr_client[1]
-            self.doc_index = self.curr_client[2]
+            # Indexes passed in are used as they are
+            loaded = [(index, False) for index in self.curr_client]
+            adopt = True
         else:
             raise ValueError(f"Unsupported storage type was set in config: {self.curr_client}")
 
-        self.sql_metadata: List[Dict[str, Any]] = self._load_or_create_metadata('sql_metadata.json')
-        self.ddl_metadata: List[Dict[str, str]] = self._load_or_create_metadata('ddl_metadata.json')
-        self.doc_metadata: List[Dict[str, str]] = self._load_or_create_metadata('doc_metadata.json')
+        self.collections: Dict[str, _FaissCollection] = {}
+        for (name, (index_file, metadata_file)), (index, mapped) in zip(self.COLLECTIONS.items(), loaded):
+            collection = _FaissCollection(
+                name, index_file, metadata_file, index, self._load_or_create_metadata(metadata_file),
+                self.index_spec, path=self.path, mapped=mapped, adopt=adopt,
+            )
+            self.collections[name] = collection
+
+        # Seconds between background writes of changed indexes; 0 writes them after every change
+        persist_interval = config.get("persist_interval", 5.0)
+        self._persister = None
+        if self.curr_client == 'persistent' and persist_interval > 0:
+            self._persister = _Persister(self, persist_interval)
+            atexit.register(self.flush)
 
         model_name = config.get('embedding_model', 'all-MiniLM-L6-v2')
         self.embedding_model = SentenceTransformer(model_name)
 
-    def _load_or_create_index(self, filename):
+    def _load_or_create_index(self, filename) -> tuple:
         filepath = os.path.join(self.path, filename)
         if os.path.exists(filepath):
-            return faiss.read_index(filepath)
-        return faiss.IndexFlatL2(self.embedding_dim)
+            return faiss.read_index(filepath, faiss.IO_FLAG_MMAP if self.mmap else 0), self.mmap
+        return self.index_spec.create(), False
 
     def _load_or_create_metadata(self, filename):
         filepath = os.path.join(self.path, filename)
@@ -73,104 +408,148 @@ class FAISS(VannaBase):
                 return json.load(f)
         return []
 
-    def _save_index(self, index, filename):
-        if self.curr_client == 'persistent':
-            filepath = os.path.join(self.path, filename)
-            faiss.write_index(index, filepath)
+    def _snapshot(self, collection: _FaissCollection) -> tuple:
+        return collection.index_file, faiss.serialize_index(collection.index), collection.metadata_file, collection.serialize_metadata()
 
-    def _save_metadata(self, metadata, filename):
-        if self.curr_client == 'persistent':
-            filepath = os.path.join(self.path, filename)
-            with open(filepath, 'w') as f:
-                json.dump(metadata, f)
+    def _write(self, index_file: str, index_data: np.ndarray, metadata_file: str, metadata: List[Dict[str, Any]]) -> None:
+        """Write an index and its metadata, each through a temporary file so a crash never leaves a partial file."""
+        index_path = os.path.join(self.path, index_file)
+        with open(index_path + ".tmp", 'wb') as f:
+            f.write(index_data.tobytes())
+        os.replace(index_path + ".tmp", index_path)
+
+        metadata_path = os.path.join(self.path, metadata_file)
+        with open(metadata_path + ".tmp", 'w') as f:
+            json.dump(metadata, f)
+        os.replace(metadata_path + ".tmp", metadata_path)
+
+    def _save(self, collection: _FaissCollection) -> None:
+        """Persist a changed collection, now or (with a write-behind persister) on the next flush. Call with the lock held."""
+        if self.curr_client != 'persistent':
+            return
+        if self._persister is not None:
+            self._persister.mark(collection.name)
+        else:
+            self._write(*self._snapshot(collection))
+
+    def flush(self) -> None:
+        """Write the changes the write-behind persister has not written yet."""
+        if self._persister is not None:
+            self._persister.flush()
+
+    def close(self) -> None:
+        """Stop the write-behind persister after writing pending changes."""
+        if self._persister is not None:
+            self._persister.close()
+            self._persister = None
 
     def generate_embedding(self, data: str, **kwargs) -> List[float]:
-        embedding = self.embedding_model.encode(data)
-        assert embedding.shape[0] == self.embedding_dim, \
-            f"Embedding dimension mismatch: expected {self.embedding_dim}, got {embedding.shape[0]}"
-        return embedding.tolist()
-
-    def _add_to_index(self, index, metadata_list, text, extra_metadata=None) -> str:
-        embedding = self.generate_embedding(text)
-        index.add(np.array([embedding], dtype=np.float32))
-        entry_id = str(uuid.uuid4())
-        metadata_list.append({"id": entry_id, **(extra_metadata or {})})
-        return entry_id
-    
+        return self._embed([data])[0].tolist()
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        embeddings = np.ascontiguousarray(
+            np.asarray(self.embedding_model.encode(texts), dtype=np.float32).reshape(len(texts), -1)
+        )
+        assert embeddings.shape[1] == self.embedding_dim, \
+            f"Embedding dimension mismatch: expected {self.embedding_dim}, got {embeddings.shape[1]}"
+        if self.index_spec.normalize:
+            faiss.normalize_L2(embeddings)
+        return embeddings
+
+    @staticmethod
+    def _training_entry(item: TrainingItem) -> tuple:
+        """The collection, embedded text and metadata of a training item."""
+        metadata = {"id": str(uuid.uuid4())}
+        if item.item_type == TrainingItem.ITEM_TYPE_SQL:
+            metadata.update(question=item.question, sql=item.content)
+            text = item.question + " " + item.content
+        elif item.item_type == TrainingItem.ITEM_TYPE_DDL:
+            metadata["ddl"] = item.content
+            text = item.content
+        else:
+            metadata["documentation"] = item.content
+            text = item.content
+        if item.title:
+            metadata["title"] = item.title
+        if item.note:
+            metadata["note"] = item.note
+        return item.item_type, text, metadata
+
+    def _add_training_batch(self, items: List[TrainingItem]) -> List[str]:
+        """Embed a batch in one `encode` call, add it with one `add_with_ids` per index and save each index once."""
+        pending: Dict[str, tuple] = {}
+        ids = []
+        for item in items:
+            name, text, metadata = self._training_entry(item)
+            texts, entries = pending.setdefault(name, ([], []))
+            texts.append(text)
+            entries.append(metadata)
+            ids.append(metadata["id"])
+
+        embeddings = {name: self._embed(texts) for name, (texts, _) in pending.items()}
+        with self._lock:
+            for name, (_, entries) in pending.items():
+                collection = self.collections[name]
+                collection.add(embeddings[name], entries)
+                self._save(collection)
+        return ids
+
     def add_question_sql(self, question: str, sql: str, **kwargs) -> str:
-        entry_id = self._add_to_index(self.sql_index, self.sql_metadata, question + " " + sql, {"question": question, "sql": sql})
-        self._save_index(self.sql_index, 'sql_index.faiss')
-        self._save_metadata(self.sql_metadata, 'sql_metadata.json')
-        return entry_id
+        return self._add_training_batch([TrainingItem(
+            TrainingItem.ITEM_TYPE_SQL, sql, question=question, title=kwargs.get("title") or "", note=kwargs.get("note") or ""
+        )])[0]
 
     def add_ddl(self, ddl: str, **kwargs) -> str:
-        entry_id = self._add_to_index(self.ddl_index, self.ddl_metadata, ddl, {"ddl": ddl})
-        self._save_index(self.ddl_index, 'ddl_index.faiss')
-        self._save_metadata(self.ddl_metadata, 'ddl_metadata.json')
-        return entry_id
+        return self._add_training_batch([TrainingItem(
+            TrainingItem.ITEM_TYPE_DDL, ddl, title=kwargs.get("title") or "", note=kwargs.get("note") or ""
+        )])[0]
 
     def add_documentation(self, documentation: str, **kwargs) -> str:
-        entry_id = self._add_to_index(self.doc_index, self.doc_metadata, documentation, {"documentation": documentation})
-        self._save_index(self.doc_index, 'doc_index.faiss')
-        self._save_metadata(self.doc_metadata, 'doc_metadata.json')
-        return entry_id
+        return self._add_training_batch([TrainingItem(
+            TrainingItem.ITEM_TYPE_DOCUMENTATION, documentation, title=kwargs.get("title") or "", note=kwargs.get("note") or ""
+        )])[0]
 
-    def _get_similar(self, index, metadata_list, text, n_results) -> list:
-        embedding = self.generate_embedding(text)
-        D, I = index.search(np.array([embedding], dtype=np.float32), k=n_results)
-        return [] if len(I[0]) == 0 or I[0][0] == -1 else [metadata_list[i] for i in I[0]]
+    def _get_similar(self, name: str, text: str, n_results: int) -> list:
+        embedding = self._embed([text])
+        with self._lock:
+            return self.collections[name].search(embedding, n_results)
 
     def get_similar_question_sql(self, question: str, **kwargs) -> list:
-        return self._get_similar(self.sql_index, self.sql_metadata, question, self.n_results_sql)
-    
+        return self._get_similar("sql", question, self.n_results_sql)
+
     def get_related_ddl(self, question: str, **kwargs) -> list:
-        return [metadata["ddl"] for metadata in self._get_similar(self.ddl_index, self.ddl_metadata, question, self.n_results_ddl)]
+        return [metadata["ddl"] for metadata in self._get_similar("ddl", question, self.n_results_ddl)]
 
     def get_related_documentation(self, question: str, **kwargs) -> list:
-        return [metadata["documentation"] for metadata in self._get_similar(self.doc_index, self.doc_metadata, question, self.n_results_documentation)]
+        return [metadata["documentation"] for metadata in self._get_similar("documentation", question, self.n_results_documentation)]
 
     def get_training_data(self, **kwargs) -> pd.DataFrame:
-        sql_data = pd.DataFrame(self.sql_metadata)
-        sql_data['training_data_type'] = 'sql'
-
-        ddl_data = pd.DataFrame(self.ddl_metadata)
-        ddl_data['training_data_type'] = 'ddl'
-
-        doc_data = pd.DataFrame(self.doc_metadata)
-        doc_data['training_data_type'] = 'documentation'
-
-        return pd.concat([sql_data, ddl_data, doc_data], ignore_index=True)
+        frames = []
+        with self._lock:
+            for name, collection in self.collections.items():
+                df = pd.DataFrame(list(collection.entries.values()))
+                df['training_data_type'] = name
+                frames.append(df)
+        return pd.concat(frames, ignore_index=True)
 
     def remove_training_data(self, id: str, **kwargs) -> bool:
-        for metadata_list, index, index_name in [
-            (self.sql_metadata, self.sql_index, 'sql_index.faiss'),
-            (self.ddl_metadata, self.ddl_index, 'ddl_index.faiss'),
-            (self.doc_metadata, self.doc_index, 'doc_index.faiss')
-        ]:
-            for i, item in enumerate(metadata_list):
-                if item['id'] == id:
-                    del metadata_list[i]
-                    new_index = faiss.IndexFlatL2(self.embedding_dim)
-                    embeddings = [self.generate_embedding(json.dumps(m)) for m in metadata_list]
-                    if embeddings:
-                        new_index.add(np.array(embeddings, dtype=np.float32))
-                    setattr(self, index_name.split('.')[0], new_index)
-                    
-                    if self.curr_client == 'persistent':
-                        self._save_index(new_index, index_name)
-                        self._save_metadata(metadata_list, f"{index_name.split('.')[0]}_metadata.json")
-                    
+        with self._lock:
+            for collection in self.collections.values():
+                if collection.remove(id):
+                    self._save(collection)
                     return True
         return False
 
     def remove_collection(self, collection_name: str) -> bool:
-        if collection_name in ["sql", "ddl", "documentation"]:
-            setattr(self, f"{collection_name}_index", faiss.IndexFlatL2(self.embedding_dim))
-            setattr(self, f"{collection_name}_metadata", [])
-            
-            if self.curr_client == 'persistent':
-                self._save_index(getattr(self, f"{collection_name}_index"), f"{collection_name}_index.faiss")
-                self._save_metadata([], f"{collection_name}_metadata.json")
-            
-            return True
-        return False
\ No newline at end of file
+        with self._lock:
+            collection = self.collections.get(collection_name)
+            if collection is None:
+                return False
+
+            empty = _FaissCollection(
+                collection_name, collection.index_file, collection.metadata_file, self.index_spec.create(), [],
+                self.index_spec, path=self.path,
+            )
+            self.collections[collection_name] = empty
+            self._save(empty)
+        return True
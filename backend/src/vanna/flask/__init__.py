@@ -685,7 +685,7 @@ class VannaFlaskAPI:
                     code = vn.generate_plotly_code(
                         question=question,
                         sql=sql,
-                        df_metadata=f"Running df.dtypes gives:\n {df.dtypes}",
+                        df_metadata=vn.get_df_metadata(df),
                     )
                     self.cache.set(id=id, field="plotly_code", value=code)
 
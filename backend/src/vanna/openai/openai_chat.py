@@ -1,12 +1,13 @@
 import os
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from ..base import VannaBase
+from ..tracing import current_span
 
 
 class OpenAI_Chat(VannaBase):
-    def __init__(self, client=None, config=None):
+    def __init__(self, client=None, config=None, async_client=None):
         VannaBase.__init__(self, config=config)
 
         # default parameters - can be overrided using config
@@ -30,16 +31,24 @@ class OpenAI_Chat(VannaBase):
                 "Passing api_version is now deprecated. Please pass an OpenAI client instead."
             )
 
+        # Without an async client submit_prompt_async falls back to running
+        # the blocking client on the executor (see VannaBase.submit_prompt_async)
+        self.async_client = async_client
+
         if client is not None:
             self.client = client
             return
 
         if config is None and client is None:
             self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            if self.async_client is None:
+                self.async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
             return
 
         if "api_key" in config:
             self.client = OpenAI(api_key=config["api_key"])
+            if self.async_client is None:
+                self.async_client = AsyncOpenAI(api_key=config["api_key"])
 
     def system_message(self, message: str) -> any:
         return {"role": "system", "content": message}
@@ -50,7 +59,7 @@ class OpenAI_Chat(VannaBase):
     def assistant_message(self, message: str) -> any:
         return {"role": "assistant", "content": message}
 
-    def submit_prompt(self, prompt, **kwargs) -> str:
+    def _get_completion_kwargs(self, prompt, **kwargs) -> dict:
         if prompt is None:
             raise Exception("Prompt is None")
 
@@ -58,53 +67,38 @@ class OpenAI_Chat(VannaBase):
             raise Exception("Prompt is empty")
 
         # Count the number of tokens in the message log
-        # Use 4 as an approximation for the number of characters per token
         num_tokens = 0
         for message in prompt:
-            num_tokens += len(message["content"]) / 4
+            num_tokens += self.str_to_approx_token_count(message["content"])
+
+        completion_kwargs = {
+            "messages": prompt,
+            "stop": None,
+            "temperature": self.temperature,
+        }
 
         if kwargs.get("model", None) is not None:
             model = kwargs.get("model", None)
             print(
                 f"Using model {model} for {num_tokens} tokens (approx)"
             )
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=prompt,
-                stop=None,
-                temperature=self.temperature,
-            )
+            completion_kwargs["model"] = model
         elif kwargs.get("engine", None) is not None:
             engine = kwargs.get("engine", None)
             print(
                 f"Using model {engine} for {num_tokens} tokens (approx)"
             )
-            response = self.client.chat.completions.create(
-                engine=engine,
-                messages=prompt,
-                stop=None,
-                temperature=self.temperature,
-            )
+            completion_kwargs["engine"] = engine
         elif self.config is not None and "engine" in self.config:
             print(
                 f"Using engine {self.config['engine']} for {num_tokens} tokens (approx)"
             )
-            response = self.client.chat.completions.create(
-                engine=self.config["engine"],
-                messages=prompt,
-                stop=None,
-                temperature=self.temperature,
-            )
+            completion_kwargs["engine"] = self.config["engine"]
         elif self.config is not None and "model" in self.config:
             print(
                 f"Using model {self.config['model']} for {num_tokens} tokens (approx)"
             )
-            response = self.client.chat.completions.create(
-                model=self.config["model"],
-                messages=prompt,
-                stop=None,
-                temperature=self.temperature,
-            )
+            completion_kwargs["model"] = self.config["model"]
         else:
             if num_tokens > 3500:
                 model = "gpt-3.5-turbo-16k"
@@ -112,13 +106,14 @@ class OpenAI_Chat(VannaBase):
                 model = "gpt-3.5-turbo"
 
             print(f"Using model {model} for {num_tokens} tokens (approx)")
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=prompt,
-                stop=None,
-                temperature=self.temperature,
-            )
+            completion_kwargs["model"] = model
+
+        current_span().set_attribute("llm.model", completion_kwargs.get("model") or completion_kwargs.get("engine"))
 
+        return completion_kwargs
+
+    @staticmethod
+    def _extract_response_text(response) -> str:
         # Find the first response from the chatbot that has text in it (some responses may not have text)
         for choice in response.choices:
             if "text" in choice:
@@ -126,3 +121,59 @@ class OpenAI_Chat(VannaBase):
 
         # If no response with text is found, return the first response's content (which may be empty)
         return response.choices[0].message.content
+
+    def _record_usage(self, usage) -> None:
+        # Prompt tokens served from the provider's prefix cache are reported as
+        # usage.prompt_tokens_details.cached_tokens (OpenAI, Qwen) or usage.prompt_cache_hit_tokens (DeepSeek)
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) if details is not None else None
+        if cached is None:
+            cached = getattr(usage, "prompt_cache_hit_tokens", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        self._record_llm_usage(prompt_tokens, cached or 0, completion_tokens)
+
+        current = current_span()
+        current.set_attribute("llm.prompt_tokens", prompt_tokens)
+        current.set_attribute("llm.cached_tokens", cached or 0)
+        current.set_attribute("llm.completion_tokens", completion_tokens)
+
+    def submit_prompt(self, prompt, **kwargs) -> str:
+        completion_kwargs = self._get_completion_kwargs(prompt, **kwargs)
+        response = self.client.chat.completions.create(**completion_kwargs)
+        self._record_usage(getattr(response, "usage", None))
+
+        return self._extract_response_text(response)
+
+    async def submit_prompt_async(self, prompt, **kwargs) -> str:
+        if self.async_client is None:
+            return await super().submit_prompt_async(prompt, **kwargs)
+
+        completion_kwargs = self._get_completion_kwargs(prompt, **kwargs)
+        response = await self.async_client.chat.completions.create(**completion_kwargs)
+        self._record_usage(getattr(response, "usage", None))
+
+        return self._extract_response_text(response)
+
+    async def submit_prompt_stream_async(self, prompt, **kwargs):
+        if self.async_client is None:
+            async for chunk in super().submit_prompt_stream_async(prompt, **kwargs):
+                yield chunk
+            return
+
+        completion_kwargs = self._get_completion_kwargs(prompt, **kwargs)
+        if self.config is not None and self.config.get("stream_usage"):
+            # The usage arrives in a final chunk without choices
+            completion_kwargs["stream_options"] = {"include_usage": True}
+        stream = await self.async_client.chat.completions.create(stream=True, **completion_kwargs)
+
+        try:
+            async for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    self._record_usage(chunk.usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
@@ -0,0 +1,242 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Union
+
+from .exceptions import ConnectionError
+
+
+class ConnectionPool:
+    """
+    A small thread-safe pool of DB-API connections.
+
+    Connections are checked out with [`acquire`][vanna.pool.ConnectionPool.acquire] (or the
+    [`connection`][vanna.pool.ConnectionPool.connection] context manager) and handed back with
+    [`release`][vanna.pool.ConnectionPool.release], so concurrent queries each get their own
+    connection instead of sharing one cursor.
+
+    Args:
+        connect (Callable): Factory that opens a new connection.
+        min_size (int): Connections opened up front and never closed for being idle.
+        max_size (int): Upper bound on open connections; further checkouts wait.
+        idle_timeout (float): Seconds after which an idle connection above `min_size` is closed.
+        checkout_timeout (float): Seconds to wait for a free connection before giving up.
+        health_check (Callable): Called with a connection on checkout, must return False or raise if it is unusable.
+        health_check_interval (float): Skip the health check for connections used less than this many seconds ago.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        min_size: int = 1,
+        max_size: int = 10,
+        idle_timeout: float = 300.0,
+        checkout_timeout: float = 30.0,
+        health_check: Union[Callable[[Any], bool], None] = None,
+        health_check_interval: float = 5.0,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("min_size must be between 0 and max_size")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self._health_check = health_check
+        self.health_check_interval = health_check_interval
+
+        self._cond = threading.Condition()
+        # (connection, last_used) pairs, most recently returned on the right
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+
+        self._stats = {
+            "created": 0,
+            "closed": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "checkout_timeouts": 0,
+            "health_check_failures": 0,
+        }
+
+        for _ in range(min_size):
+            conn = self._open()
+            self._idle.append((conn, time.monotonic()))
+
+    def _open(self):
+        conn = self._connect()
+        with self._cond:
+            self._size += 1
+            self._stats["created"] += 1
+        return conn
+
+    def _close(self, conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats["closed"] += 1
+            self._cond.notify()
+
+    def _is_healthy(self, conn, last_used: float) -> bool:
+        if self._health_check is None:
+            return True
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            return self._health_check(conn) is not False
+        except Exception:
+            return False
+
+    def acquire(self, timeout: Union[float, None] = None):
+        """
+        Check out a connection, opening a new one if the pool has room.
+
+        Args:
+            timeout (float): Seconds to wait for a free connection, defaults to `checkout_timeout`.
+
+        Returns:
+            The checked out connection.
+        """
+        if timeout is None:
+            timeout = self.checkout_timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        started = time.monotonic()
+
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise ConnectionError("Connection pool is closed")
+
+                candidate = None
+                open_new = False
+                while candidate is None and not open_new:
+                    if self._idle:
+                        candidate = self._idle.pop()
+                    elif self._size < self.max_size:
+                        # Reserve the slot before connecting outside the lock
+                        self._size += 1
+                        open_new = True
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats["checkout_timeouts"] += 1
+                            raise ConnectionError(
+                                f"Timed out after {timeout}s waiting for a free connection "
+                                f"(max_size={self.max_size})"
+                            )
+                        waited = True
+                        self._cond.wait(remaining)
+
+                if waited:
+                    self._stats["waits"] += 1
+                    self._stats["wait_time_total"] += time.monotonic() - started
+                    waited = False
+
+            if open_new:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats["created"] += 1
+                    self._stats["checkouts"] += 1
+                return conn
+
+            conn, last_used = candidate
+            if self._is_healthy(conn, last_used):
+                with self._cond:
+                    self._stats["checkouts"] += 1
+                return conn
+
+            with self._cond:
+                self._stats["health_check_failures"] += 1
+            self._close(conn)
+
+    def release(self, conn, discard: bool = False) -> None:
+        """
+        Return a checked out connection to the pool.
+
+        Args:
+            conn: The connection returned by `acquire`.
+            discard (bool): Close the connection instead of reusing it, e.g. after a connection error.
+        """
+        if discard or self._closed:
+            self._close(conn)
+            return
+
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+        self.prune_idle()
+
+    @contextmanager
+    def connection(self, timeout: Union[float, None] = None):
+        conn = self.acquire(timeout=timeout)
+        try:
+            yield conn
+        except Exception:
+            self.release(conn, discard=True)
+            raise
+        else:
+            self.release(conn)
+
+    def prune_idle(self) -> int:
+        """
+        Close connections above `min_size` that have been idle for longer than `idle_timeout`.
+
+        Returns:
+            int: The number of connections closed.
+        """
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            # The oldest idle connections sit on the left
+            while (
+                self._idle
+                and self._size - len(expired) > self.min_size
+                and now - self._idle[0][1] > self.idle_timeout
+            ):
+                expired.append(self._idle.popleft()[0])
+
+        for conn in expired:
+            self._close(conn)
+
+        return len(expired)
+
+    def close(self) -> None:
+        """Close every idle connection; connections still checked out are closed when released."""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+
+        for conn in idle:
+            self._close(conn)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the pool size and counters."""
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": idle,
+                "in_use": self._size - idle,
+                **self._stats,
+            }
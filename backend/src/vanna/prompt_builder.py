@@ -0,0 +1,69 @@
+from typing import Callable, Iterable, List
+
+# Tokens a chat API adds around every message (role and separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class PromptBuilder:
+    """
+    Assembles a prompt from sections in one pass against token budgets.
+
+    Every piece of text is measured once when it is offered and the running total is kept,
+    so adding n items costs n token counts instead of re-measuring the growing prompt.
+
+    Args:
+        count_tokens (Callable): Returns the token count of a string.
+        initial_text (str): Text the prompt starts with; always included.
+    """
+
+    def __init__(self, count_tokens: Callable[[str], int], initial_text: str = ""):
+        self.count_tokens = count_tokens
+        self._parts: List[str] = []
+        self.tokens = 0
+        self.skipped = 0
+        self.add_text(initial_text)
+
+    def add_text(self, text: str) -> int:
+        """Append text that must be included, returning its token count."""
+        if not text:
+            return 0
+        tokens = self.count_tokens(text)
+        self._parts.append(text)
+        self.tokens += tokens
+        return tokens
+
+    def add_section(self, header: str, items: Iterable[str], budget: int, template: str = "{}\n\n") -> int:
+        """
+        Append a section with as many items as fit in `budget` tokens (header included).
+
+        Items that do not fit are skipped, later and shorter ones may still fit.
+        Nothing is appended, not even the header, when no item fits.
+
+        Returns:
+            int: The tokens used by the section.
+        """
+        items = [template.format(item) for item in items if item]
+        if not items:
+            return 0
+
+        used = self.count_tokens(header)
+        accepted = []
+        for item in items:
+            tokens = self.count_tokens(item)
+            if used + tokens <= budget:
+                accepted.append(item)
+                used += tokens
+            else:
+                self.skipped += 1
+
+        if not accepted:
+            return 0
+
+        self._parts.append(header)
+        self._parts.extend(accepted)
+        self.tokens += used
+        return used
+
+    def build(self) -> str:
+        return "".join(self._parts)
+
@@ -0,0 +1,85 @@
+import math
+import re
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, Union
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+DEFAULT_ENCODING = "cl100k_base"
+
+# CJK ideographs, kana, hangul and full-width punctuation: BPE vocabularies spend
+# roughly one token (often more) on each of these characters
+_WIDE_CHARS = re.compile(
+    "[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]"
+)
+
+
+def approx_token_count(text: str) -> int:
+    """
+    Estimate the token count of a string without a tokenizer.
+
+    Every CJK character counts as one token and the remaining text as one token per
+    four characters, which is close to cl100k_base for mixed Chinese/English prompts
+    (the plain `len(text) / 4` estimate undercounts Chinese text about four times).
+    """
+    wide = len(_WIDE_CHARS.findall(text))
+    return wide + math.ceil((len(text) - wide) / 4)
+
+
+class TokenCounter:
+    """
+    Counts tokens with a tiktoken encoding, falling back to
+    [`approx_token_count`][vanna.tokenizer.approx_token_count] when tiktoken or the
+    encoding is not available. Counts are memoized, since the same DDL and documentation
+    strings are measured for every question.
+
+    Args:
+        encoding (str): A tiktoken encoding name such as "cl100k_base" or "o200k_base", or a model name.
+        cache_size (int): Number of strings whose counts are memoized.
+    """
+
+    def __init__(self, encoding: str = DEFAULT_ENCODING, cache_size: int = 8192):
+        self.encoding_name = encoding
+        self.backend = "approx"
+        count: Callable[[str], int] = approx_token_count
+
+        if tiktoken is not None:
+            try:
+                try:
+                    enc = tiktoken.get_encoding(encoding)
+                except ValueError:
+                    enc = tiktoken.encoding_for_model(encoding)
+                count = lambda text: len(enc.encode(text, disallowed_special=()))
+                self.backend = "tiktoken"
+            except Exception as e:
+                # Unknown model name, or the encoding file could not be downloaded
+                print(f"Tokenizer '{encoding}' unavailable, using approximate token counts: {e}")
+
+        self._count = lru_cache(maxsize=cache_size)(count)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return self._count(text)
+
+    __call__ = count
+
+    def cache_info(self):
+        return self._count.cache_info()
+
+
+_counters: Dict[str, TokenCounter] = {}
+_counters_lock = threading.Lock()
+
+
+def get_token_counter(encoding: Union[str, None] = None) -> TokenCounter:
+    """Return a shared [`TokenCounter`][vanna.tokenizer.TokenCounter] for the encoding (or model name)."""
+    encoding = encoding or DEFAULT_ENCODING
+    with _counters_lock:
+        if encoding not in _counters:
+            _counters[encoding] = TokenCounter(encoding)
+        return _counters[encoding]
@@ -0,0 +1,360 @@
+import contextvars
+import functools
+import inspect
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Union
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("vanna_current_span", default=None)
+_request_id: contextvars.ContextVar = contextvars.ContextVar("vanna_request_id", default=None)
+
+# Called with every finished span: exporters, metrics, ...
+_processors: List[Callable[["Span"], None]] = []
+
+
+class Span:
+    """
+    A timed operation within a request. Spans nest through a context variable, so a span
+    started while another one is open (in the same task, or in a thread that runs with a
+    copy of the context) becomes its child.
+    """
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "request_id",
+        "start_ns", "end_ns", "attributes", "status", "error",
+    )
+
+    def __init__(self, name: str, parent: Union["Span", None] = None, attributes: Union[dict, None] = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.request_id = _request_id.get()
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes) if attributes else {}
+        self.status = "ok"
+        self.error = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = "error"
+        self.error = f"{type(error).__name__}: {error}"
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def end(self) -> None:
+        """Finish the span and hand it to the span processors. Calling it again has no effect."""
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        for processor in list(_processors):
+            try:
+                processor(self)
+            except Exception as e:
+                print(f"Span processor failed: {e}")
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "request_id": self.request_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stands in for a span while no span processor is registered, so tracing costs nothing."""
+
+    name = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def tracing_enabled() -> bool:
+    return bool(_processors)
+
+
+def current_span() -> Union[Span, _NoopSpan]:
+    """Return the innermost open span, or a no-op span outside of any span."""
+    return _current_span.get() or _NOOP_SPAN
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def get_request_id() -> Union[str, None]:
+    return _request_id.get()
+
+
+@contextmanager
+def request_scope(request_id: Union[str, None] = None) -> Iterator[str]:
+    """
+    Run a block as one request: spans started inside carry the request ID and start a new trace.
+
+    Args:
+        request_id (str): The ID to use, e.g. one sent by the client. A new one is generated when omitted.
+
+    Yields:
+        str: The request ID.
+    """
+    request_id = request_id or new_request_id()
+    request_token = _request_id.set(request_id)
+    span_token = _current_span.set(None)
+    try:
+        yield request_id
+    finally:
+        _current_span.reset(span_token)
+        _request_id.reset(request_token)
+
+
+def start_span(name: str, **attributes) -> Union[Span, _NoopSpan]:
+    """
+    Start a child of the current span without making it current; call `end()` when done.
+
+    Use this for work that spans the yields of an async generator, where a context
+    variable set by the generator would leak into its consumer.
+    """
+    if not _processors:
+        return _NOOP_SPAN
+    return Span(name, _current_span.get(), attributes)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Union[Span, _NoopSpan]]:
+    """
+    Example:
+    ```python
+    with span("sql", rows=len(df)) as s:
+        ...
+        s.set_attribute("cached", True)
+    ```
+
+    Time a block as a child of the current span. Exceptions are recorded on the span and re-raised.
+    """
+    if not _processors:
+        yield _NOOP_SPAN
+        return
+
+    current = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+
+@contextmanager
+def use_span(current: Union[Span, _NoopSpan]) -> Iterator[Union[Span, _NoopSpan]]:
+    """
+    Make a span from [`start_span`][vanna.tracing.start_span] current for a block, so spans started
+    in the block become its children. The block must not cross a `yield` of an async generator.
+    """
+    if not isinstance(current, Span):
+        yield current
+        return
+
+    token = _current_span.set(current)
+    try:
+        yield current
+    finally:
+        _current_span.reset(token)
+
+
+def traced(name: Union[str, None] = None):
+    """Decorator that runs a function, sync or async, in a span named after it."""
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def add_span_processor(processor: Callable[[Span], None]) -> None:
+    """Register a callable that receives every finished span. It must be fast and thread-safe."""
+    _processors.append(processor)
+
+
+def remove_span_processor(processor: Callable[[Span], None]) -> None:
+    if processor in _processors:
+        _processors.remove(processor)
+
+
+class _FileSpanExporter:
+    """
+    Base of the file exporters: spans are queued by the request path and written in batches
+    by a daemon thread, so exporting never blocks the event loop on file I/O.
+    """
+
+    def __init__(self, path: str, max_batch: int = 512):
+        self.path = path
+        self.max_batch = max_batch
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="vanna-span-exporter", daemon=True)
+        self._thread.start()
+
+    def __call__(self, span: Span) -> None:
+        self._queue.put(span)
+
+    def _format(self, spans: List[Span]) -> List[str]:
+        raise NotImplementedError
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            spans = [item for item in batch if item is not None]
+            if spans:
+                try:
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.writelines(line + "\n" for line in self._format(spans))
+                except Exception as e:
+                    print(f"Failed to export {len(spans)} spans to {self.path}: {e}")
+            if stop:
+                return
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Write the queued spans and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+
+class JsonlSpanExporter(_FileSpanExporter):
+    """Writes every finished span as one JSON object per line."""
+
+    def _format(self, spans: List[Span]) -> List[str]:
+        return [json.dumps(span.to_dict(), ensure_ascii=False, default=str) for span in spans]
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class OtlpFileSpanExporter(_FileSpanExporter):
+    """
+    Writes batches of spans in the OTLP/JSON format, one ExportTraceServiceRequest per line,
+    the layout of the OpenTelemetry Collector file exporter, so the file can be replayed
+    into any OTLP backend (e.g. with the collector's `otlpjsonfile` receiver).
+    """
+
+    def __init__(self, path: str, service_name: str = "smart-dashboard", max_batch: int = 512):
+        self.service_name = service_name
+        super().__init__(path, max_batch=max_batch)
+
+    def _format(self, spans: List[Span]) -> List[str]:
+        otlp_spans = []
+        for span in spans:
+            attributes = dict(span.attributes)
+            attributes["request.id"] = span.request_id
+            otlp_span = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                # SPAN_KIND_INTERNAL
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": _otlp_attributes(attributes),
+                # STATUS_CODE_OK / STATUS_CODE_ERROR
+                "status": {"code": 2, "message": span.error} if span.status == "error" else {"code": 1},
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            otlp_spans.append(otlp_span)
+
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{"scope": {"name": "vanna.tracing"}, "spans": otlp_spans}],
+            }]
+        }
+        return [json.dumps(request, ensure_ascii=False)]
+
+
+def configure_tracing(exporter: Union[str, None], path: Union[str, None] = None, **kwargs) -> Union[_FileSpanExporter, None]:
+    """
+    Register a file exporter for finished spans.
+
+    Args:
+        exporter (str): "jsonl", "otlp", or None/"none" to leave tracing off.
+        path (str): The file spans are appended to. Defaults to traces.jsonl / traces.otlp.jsonl.
+
+    Returns:
+        The registered exporter (call `shutdown()` on exit to flush it), or None.
+    """
+    if not exporter or exporter == "none":
+        return None
+    if exporter == "jsonl":
+        instance = JsonlSpanExporter(path or "traces.jsonl", **kwargs)
+    elif exporter == "otlp":
+        instance = OtlpFileSpanExporter(path or "traces.otlp.jsonl", **kwargs)
+    else:
+        raise ValueError(f"Unknown trace exporter: {exporter}")
+
+    add_span_processor(instance)
+    return instance
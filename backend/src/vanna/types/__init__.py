@@ -231,6 +231,25 @@ class TrainingPlanItem:
     ITEM_TYPE_IS = "is"
 
 
+@dataclass
+class TrainingItem:
+    """
+    One piece of training data for [`vn.add_training_batch()`][vanna.base.base.VannaBase.add_training_batch].
+
+    `content` is the SQL, DDL or documentation text; `question` is required for SQL items.
+    """
+
+    item_type: str
+    content: str
+    question: Union[str, None] = None
+    title: str = ""
+    note: str = ""
+
+    ITEM_TYPE_SQL = "sql"
+    ITEM_TYPE_DDL = "ddl"
+    ITEM_TYPE_DOCUMENTATION = "documentation"
+
+
 class TrainingPlan:
     """
     A class representing a training plan. You can see what's in it, and remove items from it that you don't want trained.
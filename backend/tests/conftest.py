@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 测试以 backend 目录为根导入 src 包
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
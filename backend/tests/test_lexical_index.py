@@ -0,0 +1,56 @@
+from src.vanna.chromadb.chromadb_vector import ChromaDB_VectorStore
+from src.vanna.chromadb.lexical_index import LexicalIndex
+from src.vanna.mock import MockLLM
+from src.vanna.types import TrainingItem
+
+# 表 is a common token; 101 and 202 stand for the tokens of two table names
+COMMON, DEPT, ORDER = "7", "101", "202"
+
+DOCUMENTS = {
+    "CREATE TABLE `tem_dept` (`dept_name` varchar(64)) COMMENT '部门表';": ([1.0, 0.0], {DEPT: 0.3, COMMON: 0.05}),
+    "CREATE TABLE `tem_order` (`amount` int) COMMENT '订单表';": ([0.0, 1.0], {ORDER: 0.3, COMMON: 0.05}),
+}
+QUESTION = ("各部门有多少人", [1.0, 0.0], {DEPT: 0.25, COMMON: 0.1})
+
+
+class FakeHybridEmbedding:
+    """Fixed vectors and lexical weights, so the test does not need the BGE-M3 model."""
+
+    def __init__(self):
+        self.known = dict(DOCUMENTS)
+        self.known[QUESTION[0]] = QUESTION[1:]
+
+    def __call__(self, input):
+        return [self.known[text][0] for text in input]
+
+    def encode_hybrid(self, input):
+        return [self.known[text][0] for text in input], [self.known[text][1] for text in input]
+
+
+class HybridStore(ChromaDB_VectorStore, MockLLM):
+    def __init__(self, config=None):
+        ChromaDB_VectorStore.__init__(self, config=config)
+
+
+def test_search_drops_matches_below_the_floor():
+    index = LexicalIndex()
+    index.add("ddl", ["dept", "order"], [weights for _, weights in DOCUMENTS.values()])
+
+    # Without a floor one shared common token is enough to match
+    assert [id for id, _ in index.search("ddl", QUESTION[2], 10)] == ["dept", "order"]
+    assert [id for id, _ in index.search("ddl", QUESTION[2], 10, min_score=0.05)] == ["dept"]
+    assert [id for id, _ in index.search("ddl", QUESTION[2], 10, min_relative_score=0.3)] == ["dept"]
+
+
+def test_hybrid_lookup_leaves_out_a_document_sharing_one_common_token():
+    store = HybridStore({
+        "client": "in-memory",
+        "embedding_function": FakeHybridEmbedding(),
+        "retrieval_mode": "hybrid",
+    })
+    store.remove_collection("ddl")
+    store.add_training_batch([TrainingItem(TrainingItem.ITEM_TYPE_DDL, ddl) for ddl in DOCUMENTS])
+
+    ddl = store.get_related_ddl(QUESTION[0], **store.prepare_retrieval(QUESTION[0]))
+
+    assert ddl == [next(iter(DOCUMENTS))]
@@ -0,0 +1,34 @@
+from src.vanna.prompt_builder import PromptBuilder
+
+
+def count_characters(text: str) -> int:
+    return len(text)
+
+
+def test_section_keeps_the_items_that_fit():
+    builder = PromptBuilder(count_characters, "intro\n")
+
+    used = builder.add_section("===Tables\n", ["a" * 20, "b" * 100, "c" * 10], budget=50, template="{}\n")
+
+    assert builder.build() == "intro\n===Tables\n" + "a" * 20 + "\n" + "c" * 10 + "\n"
+    assert used == len("===Tables\n") + 21 + 11
+    assert builder.tokens == len("intro\n") + used
+    assert builder.skipped == 1
+
+
+def test_section_is_left_out_when_the_budget_is_exhausted():
+    builder = PromptBuilder(count_characters, "intro\n")
+
+    used = builder.add_section("===Additional Context\n", ["x" * 40], budget=30)
+
+    assert used == 0
+    assert builder.build() == "intro\n"
+    assert builder.tokens == len("intro\n")
+    assert builder.skipped == 1
+
+
+def test_section_without_items_is_left_out():
+    builder = PromptBuilder(count_characters)
+
+    assert builder.add_section("===Tables\n", ["", None], budget=100) == 0
+    assert builder.build() == ""